@@ -12,6 +12,28 @@ def create_app(config_class=Config):
     
     login_manager.init_app(app)
     
+    from app.models.storage import storage
+    storage.init_app(app)
+    
+    from app.services.metrics import metrics
+    metrics.init_app(app)
+    
+    from app.services.blob_store import blob_store
+    blob_store.init_app(app)
+    
+    from app.services.job_queue import job_queue
+    from app.services.ai_cache import ai_cache
+    from app.services.project_cache import project_cache
+    from app.services.llm_client import llm_client
+    from app.services.plan_editor import plan_editors
+    from app.services.near_duplicates import near_duplicates
+    job_queue.init_app(app)
+    ai_cache.init_app(app)
+    project_cache.init_app(app)
+    llm_client.init_app(app)
+    plan_editors.init_app(app)
+    near_duplicates.init_app(app)
+    
     # Add context processor to make 'now' available in all templates
     @app.context_processor
     def inject_now():
@@ -20,9 +42,20 @@ def create_app(config_class=Config):
     from app.routes.auth import auth as auth_blueprint
     from app.routes.main import main as main_blueprint
     from app.routes.projects import projects as projects_blueprint
+    from app.routes.api import api as api_blueprint
     
     app.register_blueprint(auth_blueprint)
     app.register_blueprint(main_blueprint)
     app.register_blueprint(projects_blueprint)
+    app.register_blueprint(api_blueprint)
+    
+    from app.services.bulk_import import import_overviews_command
+    from app.services.near_duplicates import index_overviews_command
+    app.cli.add_command(import_overviews_command)
+    app.cli.add_command(index_overviews_command)
+    
+    # Wraps registered views, so it has to come after the blueprints
+    from app.services.profiling import profiler
+    profiler.init_app(app)
     
     return app
\ No newline at end of file
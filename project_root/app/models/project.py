@@ -1,53 +1,174 @@
+import json
 import uuid
+import hashlib
 import datetime
+from app.models.storage import storage
+from app.models.task_store import TaskStore
+from app.services.plan_editor import PlanEditor
 
-# Simple in-memory project store (replace with a database in production)
-projects_db = {}
+# Columns Project.update may change
+UPDATABLE_COLUMNS = ('project_name', 'project_file', 'task_count', 'resource_count', 'updated_at')
 
 class Project:
-    def __init__(self, id, project_name, owner_id, overview_file, project_file=None):
+    def __init__(self, id, project_name, owner_id, overview_file, project_file=None, created_at=None,
+                 task_count=0, resource_count=0, updated_at=None):
         self.id = id
         self.project_name = project_name
         self.owner_id = owner_id
         self.overview_file = overview_file
         self.project_file = project_file
-        self.created_at = datetime.datetime.now()
-        self.tasks = []
-        self.resources = []
-    
+        self.created_at = created_at or datetime.datetime.now()
+        self.task_count = task_count
+        self.resource_count = resource_count
+        # When the project or its plan last changed
+        self.updated_at = updated_at or self.created_at
+        self.tasks = TaskStore()
+        self.resources = self.tasks.resources
+
+    @staticmethod
+    def _from_row(row):
+        updated_at = row['updated_at']
+        return Project(
+            row['id'], row['project_name'], row['owner_id'], row['overview_file'], row['project_file'],
+            datetime.datetime.fromisoformat(row['created_at']), row['task_count'], row['resource_count'],
+            datetime.datetime.fromisoformat(updated_at) if updated_at else None
+        )
+
     @staticmethod
     def get(project_id):
-        return projects_db.get(project_id)
-    
+        row = storage.fetch_one("SELECT * FROM projects WHERE id = ?", (project_id,))
+        return Project._from_row(row) if row else None
+
     @staticmethod
     def get_by_owner(owner_id):
-        return [p for p in projects_db.values() if p.owner_id == owner_id]
-    
+        rows = storage.fetch_all(
+            "SELECT * FROM projects WHERE owner_id = ? ORDER BY created_at, rowid", (owner_id,)
+        )
+        return [Project._from_row(row) for row in rows]
+
     @staticmethod
-    def create(project_name, owner_id, overview_file, project_file=None):
+    def page_by_owner(owner_id, after=None, limit=50):
+        """Up to limit of the owner's projects, oldest first, following the (created_at, id) key after"""
+        if after is None:
+            rows = storage.fetch_all(
+                "SELECT * FROM projects WHERE owner_id = ? ORDER BY created_at, id LIMIT ?", (owner_id, limit)
+            )
+        else:
+            created_at, project_id = after
+            rows = storage.fetch_all(
+                "SELECT * FROM projects WHERE owner_id = ? AND (created_at > ? OR (created_at = ? AND id > ?)) "
+                "ORDER BY created_at, id LIMIT ?", (owner_id, created_at, created_at, project_id, limit)
+            )
+        return [Project._from_row(row) for row in rows]
+
+    @staticmethod
+    def create(project_name, owner_id, overview_file, project_file=None, task_count=0, resource_count=0):
         project_id = str(uuid.uuid4())
-        project = Project(project_id, project_name, owner_id, overview_file, project_file)
-        projects_db[project_id] = project
+        project = Project(project_id, project_name, owner_id, overview_file, project_file,
+                          task_count=task_count, resource_count=resource_count)
+        storage.execute(
+            "INSERT INTO projects (id, project_name, owner_id, overview_file, project_file, created_at, "
+            "task_count, resource_count, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (project.id, project.project_name, project.owner_id, project.overview_file, project.project_file,
+             project.created_at.isoformat(), task_count, resource_count, project.created_at.isoformat())
+        )
         return project
-    
+
+    def save_plan(self, project_data, expected_seq=None):
+        """Store the validated plan the project file is generated from; returns its digest
+
+        Edits recorded against the previous plan are dropped, since project_data
+        replaces it. With expected_seq, nothing is saved (and None is returned)
+        unless that is still the last recorded edit.
+        """
+        plan = json.dumps(project_data, sort_keys=True, separators=(',', ':'))
+        digest = hashlib.sha256(plan.encode('utf-8')).hexdigest()
+        with storage.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if expected_seq is not None:
+                    last = conn.execute(
+                        "SELECT COALESCE(MAX(seq), 0) FROM plan_edits WHERE project_id = ?", (self.id,)
+                    ).fetchone()[0]
+                    if last != expected_seq:
+                        conn.execute("ROLLBACK")
+                        return None
+                conn.execute(
+                    "INSERT OR REPLACE INTO project_plans (project_id, digest, plan) VALUES (?, ?, ?)",
+                    (self.id, digest, plan)
+                )
+                conn.execute("DELETE FROM plan_edits WHERE project_id = ?", (self.id,))
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return digest
+
+    def plan_state(self):
+        """(digest of the stored plan, number of the last edit recorded on it), or (None, None)"""
+        row = storage.fetch_one(
+            "SELECT digest, (SELECT COALESCE(MAX(seq), 0) FROM plan_edits WHERE project_id = ?) AS seq "
+            "FROM project_plans WHERE project_id = ?", (self.id, self.id)
+        )
+        return (row['digest'], row['seq']) if row else (None, None)
+
+    def plan_digest(self):
+        """Version of the current plan: the stored plan's digest, plus the edit count once it has been edited"""
+        digest, seq = self.plan_state()
+        if digest is None:
+            return None
+        return f"{digest}+{seq}" if seq else digest
+
+    def load_plan(self, apply_edits=True):
+        """The current plan and its version, or (None, None) for projects saved before plans were kept
+
+        With apply_edits=False, the plan as last saved and its digest.
+        """
+        row = storage.fetch_one("SELECT digest, plan FROM project_plans WHERE project_id = ?", (self.id,))
+        if row is None:
+            return None, None
+        plan = json.loads(row['plan'])
+        if not apply_edits:
+            return plan, row['digest']
+        edits = self.plan_edits()
+        if not edits:
+            return plan, row['digest']
+        editor = PlanEditor(plan)
+        for _, edit in edits:
+            editor.apply(edit)
+        return editor.plan, f"{row['digest']}+{edits[-1][0]}"
+
+    def plan_edits(self, after=0):
+        """(seq, edit) pairs recorded since the plan was saved, oldest first"""
+        rows = storage.fetch_all(
+            "SELECT seq, edit FROM plan_edits WHERE project_id = ? AND seq > ? ORDER BY seq", (self.id, after)
+        )
+        return [(row['seq'], json.loads(row['edit'])) for row in rows]
+
+    def record_plan_edit(self, seq, edit):
+        """Append an edit; raises sqlite3.IntegrityError if another writer already recorded seq"""
+        storage.execute(
+            "INSERT INTO plan_edits (project_id, seq, edit) VALUES (?, ?, ?)",
+            (self.id, seq, json.dumps(edit, separators=(',', ':')))
+        )
+
+    def update(self, **fields):
+        """Change stored columns, e.g. update(project_file=None, task_count=12); also moves updated_at"""
+        unknown = set(fields) - set(UPDATABLE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Cannot update {', '.join(sorted(unknown))}")
+        if not fields:
+            return
+        fields.setdefault('updated_at', datetime.datetime.now())
+        values = [value.isoformat() if isinstance(value, datetime.datetime) else value for value in fields.values()]
+        assignments = ', '.join(f"{column} = ?" for column in fields)
+        storage.execute(f"UPDATE projects SET {assignments} WHERE id = ?", (*values, self.id))
+        for column, value in fields.items():
+            setattr(self, column, value)
+
     def add_task(self, name, duration, predecessors=None, resources=None):
         task_id = len(self.tasks) + 1
-        task = {
-            'id': task_id,
-            'name': name,
-            'duration': duration,
-            'predecessors': predecessors or [],
-            'resources': resources or []
-        }
-        self.tasks.append(task)
-        return task
-    
+        return self.tasks.append(task_id, name, duration, predecessors, resources)
+
     def add_resource(self, name, capacity=100):
-        resource_id = len(self.resources) + 1
-        resource = {
-            'id': resource_id,
-            'name': name,
-            'capacity': capacity
-        }
-        self.resources.append(resource)
-        return resource
\ No newline at end of file
+        return self.tasks.add_resource(name, capacity)
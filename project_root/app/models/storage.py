@@ -0,0 +1,118 @@
+import os
+import queue
+import sqlite3
+import contextlib
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    email TEXT NOT NULL,
+    password_hash TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email ON users (email);
+
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    project_name TEXT NOT NULL,
+    owner_id TEXT NOT NULL,
+    overview_file TEXT,
+    project_file TEXT,
+    created_at TEXT NOT NULL,
+    task_count INTEGER NOT NULL DEFAULT 0,
+    resource_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_projects_owner ON projects (owner_id, created_at);
+
+CREATE TABLE IF NOT EXISTS blobs (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL DEFAULT 0,
+    refcount INTEGER NOT NULL DEFAULT 0,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_blobs_unreferenced ON blobs (refcount, last_used);
+
+CREATE TABLE IF NOT EXISTS project_plans (
+    project_id TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    plan TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS plan_edits (
+    project_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    edit TEXT NOT NULL,
+    PRIMARY KEY (project_id, seq)
+);
+
+CREATE TABLE IF NOT EXISTS document_signatures (
+    project_id TEXT PRIMARY KEY,
+    owner_id TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS document_buckets (
+    bucket INTEGER NOT NULL,
+    project_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_document_buckets ON document_buckets (bucket);
+CREATE INDEX IF NOT EXISTS idx_document_buckets_project ON document_buckets (project_id);
+"""
+
+class Storage:
+    """SQLite store for users and projects, shared by every worker process"""
+    def __init__(self, app=None):
+        self.db_path = None
+        self._pool = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Open (and if needed create) the database configured for this app"""
+        self.db_path = app.config.get('DATABASE_PATH') or os.path.join(app.instance_path, 'app.sqlite3')
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._pool = queue.LifoQueue(maxsize=app.config.get('DATABASE_POOL_SIZE', 8))
+        with self.connection() as conn:
+            conn.executescript(_SCHEMA)
+        app.extensions['storage'] = self
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Borrow a pooled connection for the duration of the block"""
+        if self._pool is None:
+            raise RuntimeError("Storage is not initialised; call storage.init_app(app) first")
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def fetch_one(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def fetch_all(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def execute(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).rowcount
+
+
+storage = Storage()
@@ -0,0 +1,284 @@
+import sys
+from array import array
+from app.services.scheduler import schedule_csr
+
+# Keys a TaskView answers to, in the order to_dict() returns them
+TASK_KEYS = ('id', 'name', 'description', 'duration', 'predecessors', 'resources')
+SCHEDULE_KEYS = ('early_start', 'early_finish', 'late_start', 'late_finish', 'total_float', 'critical')
+LEVELED_KEYS = ('leveled_start', 'leveled_finish')
+
+
+class TaskView:
+    """Read-only dict-like view of one task in a TaskStore, for templates and the scheduler"""
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def __getitem__(self, key):
+        store = self.store
+        i = self.index
+        if key == 'id':
+            return store.decode_id(store.ids[i])
+        if key == 'name':
+            return store.names[i]
+        if key == 'duration':
+            return store.durations[i]
+        if key == 'predecessors':
+            return store.predecessors(i)
+        if key == 'resources':
+            return store.task_resources(i)
+        if key == 'description':
+            return store.descriptions[i]
+        if store.early_start is not None:
+            if key == 'total_float':
+                return store.late_start[i] - store.early_start[i]
+            if key == 'critical':
+                return store.late_start[i] == store.early_start[i]
+            if key in SCHEDULE_KEYS:
+                return getattr(store, key)[i]
+        if store.leveled_start is not None:
+            if key == 'leveled_start':
+                return store.leveled_start[i]
+            if key == 'leveled_finish':
+                return store.leveled_finish[i]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        keys = TASK_KEYS
+        if self.store.early_start is not None:
+            keys += SCHEDULE_KEYS
+        if self.store.leveled_start is not None:
+            keys += LEVELED_KEYS
+        return keys
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def to_dict(self):
+        return {key: self[key] for key in self.keys()}
+
+    def __repr__(self):
+        return f"<TaskView {self.to_dict()!r}>"
+
+
+class TaskStore:
+    """Columnar storage for a project's tasks
+
+    Ids, durations and schedule dates live in ``array`` columns,
+    predecessors in a CSR pair (pred_ids[pred_start[i]:pred_start[i + 1]])
+    and task resources as indices into one interned table of resource names,
+    so a task costs a few dozen bytes instead of a dict with nested lists.
+    Integer ids are stored as they are; any other id (such as an XML UID
+    like "T1") switches the store to string ids interned in id_table, whose
+    indices the id columns then hold. Indexing or iterating yields TaskView
+    objects that read like the task dicts they replace.
+    """
+    def __init__(self, id_type=int):
+        self.id_type = id_type
+        self.id_table = [] if id_type is str else None
+        self._id_index = {}
+        self.ids = array('q')
+        self.durations = array('l')
+        self.names = []
+        self.descriptions = []
+        self.pred_start = array('l', [0])
+        self.pred_ids = array('q')
+        self.res_start = array('l', [0])
+        self.res_index = array('l')
+        self.resource_names = []
+        self._resource_index = {}
+        self.resources = []
+        self.early_start = None
+        self.early_finish = None
+        self.late_start = None
+        self.late_finish = None
+        self.leveled_start = None
+        self.leveled_finish = None
+
+    @classmethod
+    def from_dicts(cls, tasks, resources=()):
+        """Build a store from task and resource dicts such as parse_project_file returns"""
+        store = cls(str if tasks and isinstance(tasks[0]['id'], str) else int)
+        for resource in resources:
+            store.add_resource(resource['name'], resource.get('capacity', 100), resource.get('role'),
+                               resource.get('id'))
+        for task in tasks:
+            store.append(task['id'], task['name'], task.get('duration') or 0, task.get('predecessors'),
+                         task.get('resources'), task.get('description') or '')
+        return store
+
+    @classmethod
+    def from_columns(cls, id_type, columns, names, descriptions, resources, resource_names, id_table=None):
+        """Wrap existing columns, such as views of a mapped snapshot, without copying them
+
+        columns maps column names (ids, durations, pred_start, ..., late_finish)
+        to int sequences; id_table holds the ids of a store with string ids.
+        Such a store is read-only: append() needs the arrays a store builds
+        itself.
+        """
+        store = cls(id_type)
+        if id_table is not None:
+            store.id_table = id_table
+        for name, column in columns.items():
+            setattr(store, name, column)
+        store.names = names
+        store.descriptions = descriptions
+        store.resources = resources
+        for name in resource_names:
+            store._intern_resource(name)
+        return store
+
+    def _intern_id(self, task_id):
+        code = self._id_index.get(task_id)
+        if code is None:
+            code = self._id_index[task_id] = len(self.id_table)
+            self.id_table.append(task_id)
+        return code
+
+    def _use_string_ids(self):
+        """Re-encode the integer ids stored so far as interned strings"""
+        self.id_type = str
+        self.id_table = []
+        self.ids = array('q', (self._intern_id(str(task_id)) for task_id in self.ids))
+        self.pred_ids = array('q', (self._intern_id(str(task_id)) for task_id in self.pred_ids))
+
+    def encode_id(self, task_id):
+        """The value the id columns hold for task_id, interning it if needed"""
+        if self.id_table is None:
+            if type(task_id) is int:
+                return task_id
+            self._use_string_ids()
+        return self._intern_id(str(task_id))
+
+    def decode_id(self, code):
+        """The task id stored in the id columns as code"""
+        if self.id_table is None:
+            return code
+        return self.id_table[code]
+
+    def _intern_resource(self, name):
+        index = self._resource_index.get(name)
+        if index is None:
+            index = self._resource_index[name] = len(self.resource_names)
+            self.resource_names.append(name)
+        return index
+
+    def add_resource(self, name, capacity=100, role=None, resource_id=None):
+        resource = {
+            'id': resource_id if resource_id is not None else len(self.resources) + 1,
+            'name': name,
+            'capacity': capacity
+        }
+        if role:
+            resource['role'] = role
+        self._intern_resource(name)
+        self.resources.append(resource)
+        return resource
+
+    def append(self, task_id, name, duration, predecessors=None, resources=None, description=''):
+        """Add a task; returns its view"""
+        predecessors = predecessors or ()
+        if self.id_table is None:
+            if type(task_id) is not int or any(type(pred_id) is not int for pred_id in predecessors):
+                self._use_string_ids()
+        if self.id_table is None:
+            self.ids.append(task_id)
+            self.pred_ids.extend(predecessors)
+        else:
+            intern = self._intern_id
+            self.ids.append(intern(str(task_id)))
+            self.pred_ids.extend([intern(str(pred_id)) for pred_id in predecessors])
+        self.durations.append(int(duration))
+        self.names.append(name)
+        self.descriptions.append(description or '')
+        self.pred_start.append(len(self.pred_ids))
+        for resource_name in dict.fromkeys(resources or ()):
+            self.res_index.append(self._intern_resource(resource_name))
+        self.res_start.append(len(self.res_index))
+        # Dates computed for earlier tasks no longer cover the whole store
+        self.early_start = self.early_finish = self.late_start = self.late_finish = None
+        self.leveled_start = self.leveled_finish = None
+        return TaskView(self, len(self.ids) - 1)
+
+    def predecessors(self, i):
+        codes = self.pred_ids[self.pred_start[i]:self.pred_start[i + 1]]
+        if self.id_table is None:
+            return list(codes)
+        table = self.id_table
+        return [table[code] for code in codes]
+
+    def task_resources(self, i):
+        names = self.resource_names
+        return [names[r] for r in self.res_index[self.res_start[i]:self.res_start[i + 1]]]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self.ids)
+        if not 0 <= i < len(self.ids):
+            raise IndexError(i)
+        return TaskView(self, i)
+
+    def __iter__(self):
+        for i in range(len(self.ids)):
+            yield TaskView(self, i)
+
+    def schedule(self):
+        """Run CPM straight off the columns and keep the dates; returns the ScheduleResult"""
+        index = {task_id: i for i, task_id in enumerate(self.ids)}
+        pred_flat = []
+        pred_start = [0] * (len(self.ids) + 1)
+        pred_ids = self.pred_ids
+        for i in range(len(self.ids)):
+            for k in range(self.pred_start[i], self.pred_start[i + 1]):
+                p = index.get(pred_ids[k])
+                if p is not None:
+                    pred_flat.append(p)
+            pred_start[i + 1] = len(pred_flat)
+        ids = [self.decode_id(code) for code in self.ids]
+        result = schedule_csr(ids, list(self.durations), pred_start, pred_flat)
+        self.early_start = array('l', result.early_start)
+        self.early_finish = array('l', result.early_finish)
+        self.late_start = array('l', result.late_start)
+        self.late_finish = array('l', result.late_finish)
+        return result
+
+    def apply_leveling(self, leveling):
+        """Keep the leveled dates from a LevelingResult computed over this store"""
+        self.leveled_start = array('l', leveling.start)
+        self.leveled_finish = array('l', leveling.finish)
+
+    def nbytes(self):
+        """Approximate memory held by the store
+
+        Columns mapped from a snapshot are shared page cache rather than this
+        process's memory, so only their view objects count.
+        """
+        size = sys.getsizeof(self.names) + sys.getsizeof(self.descriptions)
+        if isinstance(self.names, list):
+            size += sum(sys.getsizeof(name) for name in self.names)
+            size += sum(sys.getsizeof(description) for description in self.descriptions if description)
+        for column in (self.ids, self.durations, self.pred_start, self.pred_ids, self.res_start, self.res_index,
+                       self.early_start, self.early_finish, self.late_start, self.late_finish,
+                       self.leveled_start, self.leveled_finish):
+            if column is not None:
+                size += sys.getsizeof(column)
+        if isinstance(self.id_table, list):
+            size += sys.getsizeof(self.id_table) + sum(sys.getsizeof(task_id) for task_id in self.id_table)
+            size += sys.getsizeof(self._id_index)
+        size += sum(sys.getsizeof(name) for name in self.resource_names)
+        size += sum(sys.getsizeof(resource) for resource in self.resources)
+        return size
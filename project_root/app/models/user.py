@@ -1,11 +1,9 @@
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from app import login_manager
+from app.models.storage import storage
 import uuid
 
-# Simple in-memory user store (replace with a database in production)
-users_db = {}
-
 class User(UserMixin):
     def __init__(self, id, username, email):
         self.id = id
@@ -19,24 +17,32 @@ class User(UserMixin):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
+    @staticmethod
+    def _from_row(row):
+        user = User(row['id'], row['username'], row['email'])
+        user.password_hash = row['password_hash']
+        return user
+    
     @staticmethod
     def get(user_id):
-        return users_db.get(user_id)
+        row = storage.fetch_one("SELECT * FROM users WHERE id = ?", (user_id,))
+        return User._from_row(row) if row else None
     
     @staticmethod
     def create(username, email, password):
         user_id = str(uuid.uuid4())
         user = User(user_id, username, email)
         user.set_password(password)
-        users_db[user_id] = user
+        storage.execute(
+            "INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, ?)",
+            (user.id, user.username, user.email, user.password_hash)
+        )
         return user
     
     @staticmethod
     def get_by_email(email):
-        for user in users_db.values():
-            if user.email == email:
-                return user
-        return None
+        row = storage.fetch_one("SELECT * FROM users WHERE email = ?", (email,))
+        return User._from_row(row) if row else None
 
 @login_manager.user_loader
 def load_user(user_id):
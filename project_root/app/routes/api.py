@@ -0,0 +1,355 @@
+import json
+import base64
+import hashlib
+import datetime
+import functools
+from flask import Blueprint, request, current_app, jsonify, url_for
+from flask_login import current_user
+from werkzeug.http import is_resource_modified
+from app.services.project_cache import has_project_file, load_project_model
+from app.services.downloads import file_digest
+from app.models.task_store import TASK_KEYS, SCHEDULE_KEYS, LEVELED_KEYS
+from app.models.project import Project
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+PROJECT_FIELDS = ('id', 'project_name', 'created_at', 'updated_at', 'task_count', 'resource_count')
+RESOURCE_FIELDS = ('id', 'name', 'role', 'capacity', 'task_count', 'utilization')
+
+
+class ApiError(Exception):
+    """Turned into a JSON error response with the given status"""
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@api.errorhandler(ApiError)
+def handle_api_error(e):
+    return jsonify({'error': e.message}), e.status
+
+
+def api_login_required(view):
+    """Like login_required, but answers 401 JSON instead of redirecting to the login page"""
+    @functools.wraps(view)
+    def wrapped(*args, **kwargs):
+        if not current_user.is_authenticated:
+            raise ApiError('Authentication required', 401)
+        return view(*args, **kwargs)
+    return wrapped
+
+
+def owned_project(project_id):
+    project = Project.get(project_id)
+    if not project or project.owner_id != current_user.id:
+        raise ApiError('Project not found', 404)
+    return project
+
+
+def project_version(project):
+    """Version of everything a project's API responses are built from"""
+    if has_project_file(project):
+        content = file_digest(project.project_file)
+    else:
+        content = project.plan_digest()
+        if content is None:
+            raise ApiError('Project file not found', 404)
+    return f"{content}:{project.project_name}:{project.updated_at.isoformat()}"
+
+
+def representation_etag(version):
+    """ETag for this endpoint and query string on top of the given data version"""
+    query = sorted(request.args.items(multi=True))
+    key = json.dumps([version, request.endpoint, query], separators=(',', ':'))
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+
+def as_utc(value):
+    return value.astimezone(datetime.timezone.utc)
+
+
+def conditional_json(etag, last_modified, build):
+    """JSON response from build(), or an empty 304 when the client's copy is still current
+
+    build() is only called when the validators do not match, so a polling
+    client that already has this version costs a lookup rather than a render.
+    """
+    if last_modified is not None:
+        last_modified = as_utc(last_modified)
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Clients may keep the response but must check it is still current before using it
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def page_limit():
+    default = current_app.config.get('API_PAGE_SIZE', 100)
+    maximum = current_app.config.get('API_MAX_PAGE_SIZE', 1000)
+    try:
+        limit = int(request.args.get('limit', default))
+    except ValueError:
+        raise ApiError('limit must be a whole number')
+    if not 1 <= limit <= maximum:
+        raise ApiError(f"limit must be between 1 and {maximum}")
+    return limit
+
+
+def encode_cursor(value):
+    raw = json.dumps(value, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor():
+    """The decoded cursor argument, or None on the first page"""
+    cursor = request.args.get('cursor')
+    if not cursor:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        raise ApiError('Invalid cursor')
+
+
+def next_link(cursor):
+    if cursor is None:
+        return None
+    args = request.args.to_dict(flat=False)
+    args['cursor'] = cursor
+    return url_for(request.endpoint, **request.view_args, **args)
+
+
+def selected_fields(available, default=None):
+    """Fields named by the fields argument, checked against available; all of default otherwise"""
+    raw = request.args.get('fields')
+    if not raw:
+        return list(default or available)
+    fields = list(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}; choose from {', '.join(available)}")
+    return fields
+
+
+def flag(name):
+    """A true/false query argument, or None when it is absent"""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise ApiError(f"{name} must be true or false")
+
+
+def leveled_requested():
+    mode = request.args.get('mode', 'cpm')
+    if mode not in ('cpm', 'leveled'):
+        raise ApiError("mode must be cpm or leveled")
+    return mode == 'leveled'
+
+
+def project_summary(project, fields):
+    values = {
+        'id': project.id,
+        'project_name': project.project_name,
+        'created_at': project.created_at.isoformat(),
+        'updated_at': project.updated_at.isoformat(),
+        'task_count': project.task_count,
+        'resource_count': project.resource_count
+    }
+    return {field: values[field] for field in fields}
+
+
+def project_links(project_id):
+    return {
+        'self': url_for('api.get_project', project_id=project_id),
+        'tasks': url_for('api.list_tasks', project_id=project_id),
+        'resources': url_for('api.list_resources', project_id=project_id),
+        'schedule': url_for('api.get_schedule', project_id=project_id)
+    }
+
+
+def load_model(project, leveled=False):
+    try:
+        model = load_project_model(project)
+    except FileNotFoundError as e:
+        raise ApiError(str(e), 404)
+    leveling = model.leveling() if leveled else None
+    return model, leveling
+
+
+@api.route('/projects')
+@api_login_required
+def list_projects():
+    """The user's projects, oldest first, a page at a time"""
+    limit = page_limit()
+    fields = selected_fields(PROJECT_FIELDS)
+    after = decode_cursor()
+    if after is not None and not (isinstance(after, list) and len(after) == 2):
+        raise ApiError('Invalid cursor')
+    # One row more than the page shows whether there is a next page
+    projects = Project.page_by_owner(current_user.id, after, limit + 1)
+    has_more = len(projects) > limit
+    projects = projects[:limit]
+
+    etag = representation_etag([(p.id, p.updated_at.isoformat()) for p in projects] + [has_more])
+    last_modified = max((p.updated_at for p in projects), default=None)
+
+    def build():
+        cursor = None
+        if has_more:
+            last = projects[-1]
+            cursor = encode_cursor([last.created_at.isoformat(), last.id])
+        return {
+            'data': [dict(project_summary(p, fields), links=project_links(p.id)) for p in projects],
+            'next_cursor': cursor,
+            'links': {'next': next_link(cursor)}
+        }
+
+    return conditional_json(etag, last_modified, build)
+
+
+@api.route('/projects/<project_id>')
+@api_login_required
+def get_project(project_id):
+    """One project with its schedule totals"""
+    project = owned_project(project_id)
+    fields = selected_fields(PROJECT_FIELDS + ('total_duration', 'critical_path'))
+    etag = representation_etag(project_version(project))
+
+    def build():
+        data = project_summary(project, [field for field in fields if field in PROJECT_FIELDS])
+        if 'total_duration' in fields or 'critical_path' in fields:
+            model, _ = load_model(project)
+            if 'total_duration' in fields:
+                data['total_duration'] = model.total_duration
+            if 'critical_path' in fields:
+                data['critical_path'] = model.critical_path
+        return {'data': data, 'links': project_links(project.id)}
+
+    return conditional_json(etag, project.updated_at, build)
+
+
+@api.route('/projects/<project_id>/tasks')
+@api_login_required
+def list_tasks(project_id):
+    """A project's scheduled tasks in plan order, a page at a time
+
+    Filters: critical=true|false and resource=<name>. The cursor holds the
+    position after the last task returned and the version of the plan it
+    came from; once the plan changes, paging has to start over.
+    """
+    project = owned_project(project_id)
+    leveled = leveled_requested()
+    available = TASK_KEYS + SCHEDULE_KEYS + (LEVELED_KEYS if leveled else ())
+    fields = selected_fields(available)
+    limit = page_limit()
+    critical = flag('critical')
+    resource = request.args.get('resource')
+    version = project_version(project)
+    version_key = hashlib.sha256(version.encode('utf-8')).hexdigest()[:12]
+
+    start = 0
+    cursor = decode_cursor()
+    if cursor is not None:
+        if not (isinstance(cursor, list) and len(cursor) == 2 and type(cursor[0]) is int and cursor[0] >= 0):
+            raise ApiError('Invalid cursor')
+        if cursor[1] != version_key:
+            raise ApiError('The project changed since this cursor was issued; start again from the first page', 409)
+        start = cursor[0]
+
+    def build():
+        model, _ = load_model(project, leveled)
+        store = model.tasks
+        wanted = None
+        if resource is not None:
+            folded = resource.casefold()
+            wanted = next((r for r, name in enumerate(store.resource_names) if name.casefold() == folded), -1)
+
+        total = len(store)
+        if start > total:
+            raise ApiError('Invalid cursor')
+        data = []
+        i = start
+        # Filters read the columns directly; only matching tasks get a view
+        while i < total and len(data) < limit:
+            if critical is not None and (store.late_start[i] == store.early_start[i]) != critical:
+                i += 1
+                continue
+            if wanted is not None and wanted not in store.res_index[store.res_start[i]:store.res_start[i + 1]]:
+                i += 1
+                continue
+            view = store[i]
+            data.append({field: view[field] for field in fields})
+            i += 1
+
+        next_cursor = encode_cursor([i, version_key]) if i < total else None
+        return {
+            'data': data,
+            'total_tasks': total,
+            'next_cursor': next_cursor,
+            'links': {'next': next_link(next_cursor), 'project': url_for('api.get_project', project_id=project.id)}
+        }
+
+    return conditional_json(representation_etag(version), project.updated_at, build)
+
+
+@api.route('/projects/<project_id>/resources')
+@api_login_required
+def list_resources(project_id):
+    """A project's resources with how many tasks each is assigned (and, leveled, how busy it is)"""
+    project = owned_project(project_id)
+    leveled = leveled_requested()
+    fields = selected_fields(RESOURCE_FIELDS)
+    etag = representation_etag(project_version(project))
+
+    def build():
+        model, leveling = load_model(project, leveled)
+        store = model.tasks
+        assigned = [0] * len(store.resource_names)
+        for r in store.res_index:
+            assigned[r] += 1
+        data = []
+        for resource in model.resources:
+            values = dict(resource, task_count=assigned[store.resource_names.index(resource['name'])])
+            values.setdefault('role', None)
+            values['utilization'] = leveling.utilization.get(resource['name']) if leveling else None
+            data.append({field: values[field] for field in fields})
+        return {'data': data, 'links': {'project': url_for('api.get_project', project_id=project.id)}}
+
+    return conditional_json(etag, project.updated_at, build)
+
+
+@api.route('/projects/<project_id>/schedule')
+@api_login_required
+def get_schedule(project_id):
+    """Schedule results: duration and critical path, plus the leveled duration with mode=leveled"""
+    project = owned_project(project_id)
+    leveled = leveled_requested()
+    etag = representation_etag(project_version(project))
+
+    def build():
+        model, leveling = load_model(project, leveled)
+        data = {
+            'mode': 'leveled' if leveled else 'cpm',
+            'task_count': len(model.tasks),
+            'total_duration': model.total_duration,
+            'critical_path': model.critical_path,
+            'critical_task_count': sum(1 for es, ls in zip(model.tasks.early_start, model.tasks.late_start)
+                                       if es == ls)
+        }
+        if leveling:
+            data['leveled_duration'] = leveling.project_duration
+            data['utilization'] = leveling.utilization
+        return {'data': data, 'links': project_links(project.id)}
+
+    return conditional_json(etag, project.updated_at, build)
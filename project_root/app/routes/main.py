@@ -1,7 +1,9 @@
-from flask import Blueprint, render_template, request
+from flask import Blueprint, render_template, request, Response
 from flask_login import login_required, current_user
 from app.models.project import Project  # Import the correct Project model
-import xml.etree.ElementTree as ET
+import io
+from app.services.project_xml import parse_project_file
+from app.services.metrics import metrics
 
 main = Blueprint('main', __name__)
 
@@ -16,51 +18,17 @@ def dashboard():
     projects = Project.get_by_owner(current_user.id)
     return render_template('dashboard.html', projects=projects)
 
+@main.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape target, combining the counts of every worker process"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 def parse_project_xml(xml_string):
     """Parse XML string into a project object structure"""
-    root = ET.fromstring(xml_string)
-    
-    project = {
-        'project_name': root.find('./ProjectInfo/Name').text,
-        'created_at': root.find('./ProjectInfo/CreationDate').text,
-        'tasks': [],
-        'resources': [],
-        'project_file': '#'  # You might want to set this to the actual file path
-    }
-    
-    # Parse tasks
-    for task_elem in root.findall('./Tasks/Task'):
-        task = {
-            'id': task_elem.find('ID').text,
-            'name': task_elem.find('Name').text,
-            'duration': int(task_elem.find('Duration').text.rstrip('d')),
-            'predecessors': [pred.find('ID').text for pred in task_elem.findall('./Predecessors/Predecessor')],
-            'resources': []  # Will be populated from assignments
-        }
-        project['tasks'].append(task)
-    
-    # Parse resources
-    for res_elem in root.findall('./Resources/Resource'):
-        resource = {
-            'id': res_elem.find('ID').text,
-            'name': res_elem.find('Name').text,
-            'capacity': res_elem.find('Capacity').text
-        }
-        project['resources'].append(resource)
-    
-    # Parse assignments and link resources to tasks
-    for assign_elem in root.findall('./Assignments/Assignment'):
-        task_id = assign_elem.find('TaskID').text
-        resource_id = assign_elem.find('ResourceID').text
-        
-        # Find the resource name
-        resource_name = next((r['name'] for r in project['resources'] if r['id'] == resource_id), None)
-        
-        # Find the task and add the resource
-        for task in project['tasks']:
-            if task['id'] == task_id and resource_name:
-                task['resources'].append(resource_name)
-    
+    if isinstance(xml_string, str):
+        xml_string = xml_string.encode('utf-8')
+    project = parse_project_file(io.BytesIO(xml_string))
+    project['project_file'] = '#'  # You might want to set this to the actual file path
     return project
 
 def get_project_xml(project_id):
@@ -1,11 +1,23 @@
 import os
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, send_file, jsonify
-import xml.etree.ElementTree as ET
+import json
+import time
+import hashlib
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, send_file, jsonify, \
+    Response, stream_with_context
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
-from app.services.document_parser import extract_text_from_document
-from app.services.ai_processor import process_project_overview
-from app.services.ms_project import create_project_schedule
+from app.services.job_queue import job_queue, DONE, FAILED
+from app.services import pipeline  # noqa: F401 - registers the 'upload' job handler
+from app.services.pipeline import SIMILAR_CHOICES
+from app.services.near_duplicates import overview_diff
+from app.services.document_parser import extract_document
+from app.services import bulk_import  # noqa: F401 - registers the 'bulk_import' job handler
+from app.services.project_cache import has_project_file, load_project_model
+from app.services.blob_store import blob_store
+from app.services.project_xml import iter_project_xml
+from app.services.downloads import file_digest, iter_file, gzip_chunks, accepts_gzip, GZIP_MIN_BYTES
+from app.services.plan_editor import plan_editors, PlanEditError
+from app.services.scheduler import CycleError
 from app.models.project import Project
 
 projects = Blueprint('projects', __name__)
@@ -34,33 +46,226 @@ def upload_project():
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
             project_name = request.form.get('project_name', 'Untitled Project')
+            # Without a choice on the form, keep generating a new plan as before
+            similar = request.form.get('similar', 'generate')
+            if similar not in SIMILAR_CHOICES:
+                similar = 'generate'
             
-            # Create upload folder if it doesn't exist
-            os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
+            # Uploads are stored by content hash, so re-uploading a document reuses its file
+            file_path = blob_store.put_stream(file.stream, os.path.splitext(filename)[1])
             
-            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
+            # Hand the slow extraction / AI / scheduling work to the job queue
+            job_id = job_queue.enqueue('upload', {
+                'file_path': file_path,
+                'project_name': project_name,
+                'owner_id': current_user.id,
+                'similar': similar
+            }, owner_id=current_user.id)
             
-            # Extract text from document
-            document_text = extract_text_from_document(file_path)
-            
-            # Process with AI
-            project_data = process_project_overview(document_text)
-            
-            # Create Microsoft Project schedule
-            project_file_path = create_project_schedule(project_data, project_name)
+            if request.accept_mimetypes.best == 'application/json':
+                return jsonify({
+                    'job_id': job_id,
+                    'status_url': url_for('projects.job_status_json', job_id=job_id)
+                }), 202
+            return redirect(url_for('projects.job_status', job_id=job_id))
+    
+    return render_template('upload.html')
+
+@projects.route('/import', methods=['GET', 'POST'])
+@login_required
+def bulk_import_projects():
+    """Create one project per overview in an uploaded zip archive"""
+    if request.method == 'POST':
+        file = request.files.get('archive')
+        if not file or file.filename == '':
+            flash('No archive selected')
+            return redirect(request.url)
+        if not file.filename.lower().endswith('.zip'):
+            flash('Please upload a .zip archive of overview documents')
+            return redirect(request.url)
+        
+        max_workers = current_app.config.get('BULK_IMPORT_CONCURRENCY', 4)
+        workers = min(max(request.form.get('workers', max_workers, type=int) or max_workers, 1), max_workers)
+        archive_path = blob_store.put_stream(file.stream, '.zip')
+        job_id = job_queue.enqueue('bulk_import', {
+            'archive': archive_path,
+            'project_name': f"Import of {secure_filename(file.filename)}",
+            'owner_id': current_user.id,
+            'workers': workers
+        }, owner_id=current_user.id)
+        
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({
+                'job_id': job_id,
+                'status_url': url_for('projects.job_status_json', job_id=job_id)
+            }), 202
+        return redirect(url_for('projects.job_status', job_id=job_id))
+    
+    return render_template('bulk_import.html', max_workers=current_app.config.get('BULK_IMPORT_CONCURRENCY', 4))
+
+def get_owned_job(job_id):
+    job = job_queue.get(job_id)
+    if not job or job['owner_id'] != current_user.id:
+        return None
+    return job
+
+@projects.route('/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    job = get_owned_job(job_id)
+    if not job:
+        flash('Job not found')
+        return redirect(url_for('main.dashboard'))
+    return render_template('job_status.html', job=job)
+
+@projects.route('/jobs/<job_id>/status')
+@login_required
+def job_status_json(job_id):
+    job = get_owned_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    response = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'stage': job['stage'],
+        'progress': job['progress'],
+        'error': job['error']
+    }
+    if job['status'] == DONE:
+        response['result_url'] = url_for('projects.job_result', job_id=job_id)
+    return jsonify(response)
+
+def format_sse(kind, data, event_id=None):
+    message = f"event: {kind}\ndata: {json.dumps(data)}\n\n"
+    return f"id: {event_id}\n{message}" if event_id is not None else message
+
+@projects.route('/jobs/<job_id>/events')
+@login_required
+def job_events(job_id):
+    """Server-sent events: progress updates and each task as soon as the model produces it"""
+    if not get_owned_job(job_id):
+        return jsonify({'error': 'Job not found'}), 404
+    
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or 0)
+    except ValueError:
+        # A malformed header replays the stream from the start
+        last_event_id = 0
+    poll_interval = current_app.config.get('JOB_EVENTS_POLL_INTERVAL', 0.25)
+    
+    def stream():
+        last_id = last_event_id
+        last_progress = None
+        while True:
+            job = job_queue.get(job_id)
+            for event in job_queue.events_since(job_id, last_id):
+                last_id = event['id']
+                yield format_sse(event['kind'], event['data'], event['id'])
             
-            # Save project info
-            project = Project.create(
-                project_name=project_name,
-                owner_id=current_user.id,
-                overview_file=file_path,
-                project_file=project_file_path
-            )
+            progress = {'status': job['status'], 'stage': job['stage'], 'progress': job['progress']}
+            if progress != last_progress:
+                last_progress = progress
+                yield format_sse('progress', progress)
             
-            return redirect(url_for('projects.project_details', project_id=project.id))
+            if job['status'] == DONE:
+                yield format_sse('done', {'result_url': url_for('projects.job_result', job_id=job_id)})
+                return
+            if job['status'] == FAILED:
+                yield format_sse('failed', {'error': job['error']})
+                return
+            time.sleep(poll_interval)
     
-    return render_template('upload.html')
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@projects.route('/jobs/<job_id>/result')
+@login_required
+def job_result(job_id):
+    job = get_owned_job(job_id)
+    if not job:
+        flash('Job not found')
+        return redirect(url_for('main.dashboard'))
+    
+    if job['status'] == DONE and job['kind'] == 'bulk_import':
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify(job['result'])
+        return render_template('import_report.html', job=job, report=job['result'])
+    if job['status'] == DONE and 'follow_up_job_id' in job['result']:
+        return redirect(url_for('projects.job_status', job_id=job['result']['follow_up_job_id']))
+    if job['status'] == DONE and 'similar' in job['result']:
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify(dict(job['result'], choose_url=url_for('projects.choose_similar', job_id=job_id)))
+        return render_template('similar_overview.html', job=job, matches=job['result']['similar'])
+    if job['status'] == DONE:
+        return redirect(url_for('projects.project_details', project_id=job['result']['project_id']))
+    if job['status'] == FAILED:
+        flash(f"Project generation failed: {job['error']}")
+        if job['kind'] == 'bulk_import':
+            return redirect(url_for('projects.bulk_import_projects'))
+        return redirect(url_for('projects.upload_project'))
+    return redirect(url_for('projects.job_status', job_id=job_id))
+
+def get_similar_match(job, project_id):
+    """The near match project_id offered by a finished upload job, or None"""
+    if job['status'] != DONE or not job['result'] or 'similar' not in job['result']:
+        return None
+    return next((match for match in job['result']['similar'] if match['project_id'] == project_id), None)
+
+@projects.route('/jobs/<job_id>/similar', methods=['POST'])
+@login_required
+def choose_similar(job_id):
+    """Carry on with an upload that nearly matched earlier overviews: reuse one of their plans or generate"""
+    job = get_owned_job(job_id)
+    if not job or job['kind'] != 'upload' or job['status'] != DONE or 'similar' not in (job['result'] or {}):
+        flash('Job not found')
+        return redirect(url_for('main.dashboard'))
+    
+    # Only the first choice counts; repeat POSTs go to the job it started
+    new_job_id = job['result'].get('follow_up_job_id')
+    if new_job_id is None:
+        data = request.get_json(silent=True) or request.form
+        payload = {key: job['payload'][key] for key in ('file_path', 'project_name', 'owner_id')}
+        if data.get('choice') == 'reuse':
+            if get_similar_match(job, data.get('project_id')) is None:
+                flash('Choose one of the similar projects to reuse')
+                return redirect(url_for('projects.job_result', job_id=job_id))
+            payload['reuse_project_id'] = data['project_id']
+        else:
+            payload['similar'] = 'generate'
+        new_job_id = job_queue.enqueue_follow_up(job_id, 'upload', payload, owner_id=current_user.id)
+    
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({
+            'job_id': new_job_id,
+            'status_url': url_for('projects.job_status_json', job_id=new_job_id)
+        }), 202
+    return redirect(url_for('projects.job_status', job_id=new_job_id))
+
+@projects.route('/jobs/<job_id>/similar/<project_id>')
+@login_required
+def compare_similar(job_id, project_id):
+    """Differences between an upload and the earlier overview it nearly matches, with the plan that would be reused"""
+    job = get_owned_job(job_id)
+    match = get_similar_match(job, project_id) if job else None
+    project = Project.get(project_id) if match else None
+    if not project or project.owner_id != current_user.id:
+        flash('Similar project not found')
+        return redirect(url_for('main.dashboard'))
+    
+    try:
+        new_text = extract_document(job['payload']['file_path'])['text']
+        old_text = extract_document(project.overview_file)['text']
+        diff = overview_diff(old_text, new_text)
+    except Exception as e:
+        flash(f'The overviews could not be compared: {e}')
+        diff = None
+    plan, _ = project.load_plan()
+    return render_template('overview_diff.html', job=job, match=match, project=project, diff=diff,
+                           tasks=plan['tasks'] if plan else [])
 
 @projects.route('/projects/<project_id>')
 @login_required
@@ -70,82 +275,59 @@ def project_details(project_id):
         flash('Project not found')
         return redirect(url_for('main.dashboard'))
     
-    # Parse the XML file
+    leveled = request.args.get('mode') == 'leveled'
+    
+    # Parsed and scheduled models are cached per file version
     try:
-        tree = ET.parse(project.project_file)
-        root = tree.getroot()
+        model = load_project_model(project)
         
-        # Extract tasks
-        tasks = []
-        task_dict = {}  # Dictionary to store tasks by ID for easier reference
+        project.tasks = model.tasks
+        project.resources = model.resources
+        project.total_duration = model.total_duration
+        project.critical_path = model.critical_path
+        project.utilization = {}
         
-        for task_elem in root.findall('./Tasks/Task'):
-            task_id = task_elem.find('ID').text
-            task = {
-                'id': task_id,
-                'name': task_elem.find('Name').text,
-                'duration': int(task_elem.find('Duration').text.replace('d', '')),  # Convert "5d" to 5
-                'predecessors': [],
-                'resources': [],
-                'early_start': 0,
-                'early_finish': 0
-            }
-            
-            # Get predecessors
-            pred_elems = task_elem.findall('./Predecessors/Predecessor/ID')
-            if pred_elems:
-                task['predecessors'] = [pred.text for pred in pred_elems]
-            
-            # Find resources assigned to this task
-            for assign_elem in root.findall(f'./Assignments/Assignment[TaskID="{task_id}"]'):
-                resource_id = assign_elem.find('ResourceID').text
-                resource_name = root.find(f'./Resources/Resource[ID="{resource_id}"]/Name').text
-                task['resources'].append(resource_name)
-            
-            tasks.append(task)
-            task_dict[task_id] = task
-        
-        # Calculate early start and early finish times (forward pass)
-        for task in tasks:
-            if not task['predecessors']:
-                # No predecessors, start at time 0
-                task['early_start'] = 0
-                task['early_finish'] = task['duration']
-            else:
-                # Find the maximum early finish time of all predecessors
-                max_pred_finish = 0
-                for pred_id in task['predecessors']:
-                    if pred_id in task_dict:
-                        pred_finish = task_dict[pred_id]['early_finish']
-                        if pred_finish > max_pred_finish:
-                            max_pred_finish = pred_finish
-                
-                task['early_start'] = max_pred_finish
-                task['early_finish'] = max_pred_finish + task['duration']
-        
-        # Project duration is the maximum early finish time of any task
-        project_duration = max(task['early_finish'] for task in tasks) if tasks else 0
-        
-        # Extract resources
-        resources = []
-        for res_elem in root.findall('./Resources/Resource'):
-            resources.append({
-                'name': res_elem.find('Name').text,
-                'capacity': int(res_elem.find('Capacity').text.replace('%', ''))
-            })
-        
-        # Add tasks, resources, and calculated duration to project
-        project.tasks = tasks
-        project.resources = resources
-        project.total_duration = project_duration
+        # Optionally delay tasks so no resource is booked beyond its capacity
+        if leveled:
+            leveling = model.leveling()
+            project.total_duration = leveling.project_duration
+            project.utilization = leveling.utilization
         
     except Exception as e:
         flash(f'Error parsing project file: {str(e)}')
         project.tasks = []
         project.resources = []
         project.total_duration = 0
+        project.critical_path = []
+        project.utilization = {}
     
-    return render_template('project_details.html', project=project)
+    return render_template('project_details.html', project=project, leveled=leveled)
+
+PROJECT_MIMETYPE = 'application/vnd.ms-project'
+
+def use_gzip(size=None):
+    """Whether to compress this download: enabled, accepted, worth it and not a range request"""
+    return (
+        current_app.config.get('DOWNLOAD_GZIP', True)
+        and accepts_gzip(request)
+        and 'Range' not in request.headers
+        and (size is None or size >= GZIP_MIN_BYTES)
+    )
+
+def streamed_download(chunks, project, etag, gzip):
+    """Attachment response for generated chunks, answering If-None-Match with 304"""
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        # The compressed bytes differ, so they need their own strong validator
+        etag = f"{etag}-gzip"
+    response = Response(chunks, mimetype=PROJECT_MIMETYPE)
+    response.headers.set('Content-Disposition', 'attachment', filename=f"{project.project_name}.mpp")
+    if gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    response.vary.add('Accept-Encoding')
+    return response.make_conditional(request)
 
 @projects.route('/projects/<project_id>/download')
 @login_required
@@ -155,20 +337,71 @@ def download_project_file(project_id):
         flash('Project not found')
         return redirect(url_for('main.dashboard'))
     
-    # Check if project file path exists
-    if not project.project_file or not os.path.exists(project.project_file):
-        flash('Project file not found')
-        return redirect(url_for('projects.project_details', project_id=project_id))
-    
     try:
-        # Return file as an attachment
-        return send_file(
-            project.project_file,
-            as_attachment=True,
-            download_name=f"{project.project_name}.mpp",
-            mimetype='application/vnd.ms-project'
-        )
+        if has_project_file(project):
+            path = project.project_file
+            digest = file_digest(path)
+            if path.endswith('.xml') and use_gzip(os.path.getsize(path)):
+                return streamed_download(iter_file(path), project, digest, gzip=True)
+            # Strong content-hash ETag; conditional=True answers If-None-Match and Range requests
+            response = send_file(
+                path,
+                as_attachment=True,
+                download_name=f"{project.project_name}.mpp",
+                mimetype=PROJECT_MIMETYPE,
+                etag=digest,
+                conditional=True
+            )
+            response.vary.add('Accept-Encoding')
+            return response
+        
+        # No file on disk: stream the XML straight from the stored plan
+        plan, digest = project.load_plan()
+        if plan is None:
+            flash('Project file not found')
+            return redirect(url_for('projects.project_details', project_id=project_id))
+        created_at = project.created_at.isoformat()
+        etag = hashlib.sha256(f"{digest}:{project.project_name}:{created_at}".encode('utf-8')).hexdigest()
+        chunks = iter_project_xml(plan, project.project_name, created_at)
+        return streamed_download(chunks, project, etag, gzip=use_gzip())
     except Exception as e:
-        print(f"Download error: {str(e)}")
+        current_app.logger.exception("Download error for project %s: %s", project_id, e)
         flash(f"Error downloading file: {str(e)}")
-        return redirect(url_for('projects.project_details', project_id=project_id))
\ No newline at end of file
+        return redirect(url_for('projects.project_details', project_id=project_id))
+
+def apply_plan_edit(project_id, edit, status=200):
+    """Apply one edit to an owned project's plan; JSON with the rescheduled tasks, or an error"""
+    project = Project.get(project_id)
+    if not project or project.owner_id != current_user.id:
+        return jsonify({'error': 'Project not found'}), 404
+    try:
+        result = plan_editors.edit(project, edit)
+    except (PlanEditError, CycleError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result), status
+
+@projects.route('/projects/<project_id>/tasks', methods=['POST'])
+@login_required
+def add_task(project_id):
+    return apply_plan_edit(project_id, {'op': 'add_task', 'task': request.get_json(silent=True)}, 201)
+
+@projects.route('/projects/<project_id>/tasks/<int:task_id>', methods=['PATCH'])
+@login_required
+def update_task(project_id, task_id):
+    return apply_plan_edit(project_id, {'op': 'update_task', 'id': task_id, 'changes': request.get_json(silent=True)})
+
+@projects.route('/projects/<project_id>/tasks/<int:task_id>', methods=['DELETE'])
+@login_required
+def remove_task(project_id, task_id):
+    return apply_plan_edit(project_id, {'op': 'remove_task', 'id': task_id})
+
+@projects.route('/projects/<project_id>/tasks/<int:task_id>/predecessors', methods=['POST'])
+@login_required
+def add_dependency(project_id, task_id):
+    body = request.get_json(silent=True) or {}
+    return apply_plan_edit(project_id, {'op': 'add_dependency', 'id': task_id, 'predecessor': body.get('id')})
+
+@projects.route('/projects/<project_id>/tasks/<int:task_id>/predecessors/<int:predecessor_id>', methods=['DELETE'])
+@login_required
+def remove_dependency(project_id, task_id, predecessor_id):
+    return apply_plan_edit(project_id, {'op': 'remove_dependency', 'id': task_id, 'predecessor': predecessor_id})
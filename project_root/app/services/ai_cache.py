@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from app.services.metrics import CACHE_REQUESTS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ai_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_ai_cache_last_used ON ai_cache (last_used);
+"""
+
+
+def normalize_document_text(text):
+    """Normalize text so trivially different extractions of the same document hash alike"""
+    text = unicodedata.normalize('NFC', text or '')
+    return ' '.join(text.split())
+
+
+def make_cache_key(document_text, prompt_version, model, temperature):
+    """Content address for an AI extraction result"""
+    digest = hashlib.sha256()
+    digest.update(normalize_document_text(document_text).encode('utf-8'))
+    digest.update(f"\0{prompt_version}\0{model}\0{temperature}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class AICache:
+    """Persistent content-addressed cache of parsed AI schedule extractions"""
+    def __init__(self, app=None):
+        self.db_path = None
+        self.ttl = None
+        self.max_entries = None
+        self.max_bytes = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure the cache from app config and create its table"""
+        # Connections opened for an earlier app point at its database
+        self.db_path = None
+        self._local = threading.local()
+        if not app.config.get('AI_CACHE_ENABLED', True):
+            return
+        self.db_path = app.config.get('AI_CACHE_PATH') or os.path.join(app.instance_path, 'ai_cache.sqlite3')
+        self.ttl = app.config.get('AI_CACHE_TTL')
+        self.max_entries = app.config.get('AI_CACHE_MAX_ENTRIES')
+        self.max_bytes = app.config.get('AI_CACHE_MAX_BYTES')
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+        app.extensions['ai_cache'] = self
+
+    @property
+    def enabled(self):
+        return self.db_path is not None
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss or expired entry"""
+        if not self.enabled:
+            return None
+        conn = self._connection()
+        row = conn.execute("SELECT value, created_at FROM ai_cache WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or (self.ttl and now - row[1] > self.ttl):
+            if row is not None:
+                conn.execute("DELETE FROM ai_cache WHERE key = ?", (key,))
+                self._count('evictions')
+            self._count('misses')
+            CACHE_REQUESTS.inc(cache='ai', result='miss')
+            return None
+        conn.execute("UPDATE ai_cache SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        self._count('hits')
+        CACHE_REQUESTS.inc(cache='ai', result='hit')
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        """Store value under key and evict entries beyond the configured limits"""
+        if not self.enabled:
+            return
+        data = json.dumps(value)
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO ai_cache (key, value, size, created_at, last_used, hits) VALUES (?, ?, ?, ?, ?, 0)",
+            (key, data, len(data), now, now)
+        )
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until size limits hold"""
+        conn = self._connection()
+        removed = 0
+        if self.ttl:
+            removed += conn.execute("DELETE FROM ai_cache WHERE created_at < ?", (time.time() - self.ttl,)).rowcount
+        if self.max_entries:
+            removed += conn.execute(
+                "DELETE FROM ai_cache WHERE key IN ("
+                "SELECT key FROM ai_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+        if self.max_bytes:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ai_cache").fetchone()[0]
+            if total > self.max_bytes:
+                for key, size in conn.execute("SELECT key, size FROM ai_cache ORDER BY last_used").fetchall():
+                    conn.execute("DELETE FROM ai_cache WHERE key = ?", (key,))
+                    removed += 1
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+        if removed:
+            self._count('evictions', removed)
+
+    def clear(self):
+        if self.enabled:
+            self._connection().execute("DELETE FROM ai_cache")
+
+    def stats(self):
+        """Hit/miss counters for this process plus current cache size"""
+        entries, size = 0, 0
+        if self.enabled:
+            entries, size = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ai_cache"
+            ).fetchone()
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': entries,
+                'bytes': size
+            }
+
+
+ai_cache = AICache()
@@ -1,9 +1,14 @@
-import os
 import json
-import openai
 from flask import current_app
+from app.services.llm_client import llm_client
+from app.services.ai_cache import ai_cache, make_cache_key
+from app.services.chunked_processor import split_document, map_chunks, reduce_plans
+from app.services.json_stream import TaskStreamParser
+from app.services.metrics import FALLBACKS, ERRORS
 
 class ProjectTask:
+    __slots__ = ('name', 'duration', 'description', 'predecessors', 'resources')
+    
     def __init__(self, name, duration, description=None, predecessors=None, resources=None):
         self.name = name
         self.duration = duration  # in days
@@ -12,79 +17,201 @@ class ProjectTask:
         self.resources = resources or []
 
 class ProjectResource:
+    __slots__ = ('name', 'role', 'capacity')
+    
     def __init__(self, name, role=None, capacity=100):
         self.name = name
         self.role = role
         self.capacity = capacity  # percentage
 
-def process_project_overview(document_text):
-    """Process project overview with OpenAI and extract structured project data"""
-    openai.api_key = current_app.config['OPENAI_API_KEY']
-    
-    # Prepare the system prompt
-    system_prompt = """
-    You are a professional project manager assistant that helps plan projects. 
-    Your task is to analyze a project overview and identify:
-    1. Main project tasks and subtasks
-    2. Dependencies between tasks
-    3. Estimated duration for each task (in days)
-    4. Required resources for each task
-    5. A logical project schedule
-    
-    Return the results in the following JSON format:
-    {
-        "project_name": "Project name extracted from the overview",
-        "tasks": [
-            {
-                "id": 1,
-                "name": "Task name",
-                "description": "Task description",
-                "duration": 5,
-                "predecessors": [task_ids],
-                "resources": ["Resource names"]
-            }
-        ],
-        "resources": [
-            {
-                "id": 1,
-                "name": "Resource name",
-                "role": "Resource role",
-                "capacity": 100
-            }
+MODEL_NAME = "gpt-4-turbo"
+TEMPERATURE = 0.3
+# Bump whenever SYSTEM_PROMPT or the user message changes so cached results are not reused
+PROMPT_VERSION = 1
+
+SYSTEM_PROMPT = """
+You are a professional project manager assistant that helps plan projects. 
+Your task is to analyze a project overview and identify:
+1. Main project tasks and subtasks
+2. Dependencies between tasks
+3. Estimated duration for each task (in days)
+4. Required resources for each task
+5. A logical project schedule
+
+Return the results in the following JSON format:
+{
+    "project_name": "Project name extracted from the overview",
+    "tasks": [
+        {
+            "id": 1,
+            "name": "Task name",
+            "description": "Task description",
+            "duration": 5,
+            "predecessors": [task_ids],
+            "resources": ["Resource names"]
+        }
+    ],
+    "resources": [
+        {
+            "id": 1,
+            "name": "Resource name",
+            "role": "Resource role",
+            "capacity": 100
+        }
+    ]
+}
+"""
+
+class OpenAIChatModel:
+    """Chat completion client used for schedule extraction, sharing the pooled, rate-limited LLM client"""
+    def __init__(self, manager=None, model=MODEL_NAME, temperature=TEMPERATURE):
+        self.manager = manager or llm_client
+        self.model = model
+        self.temperature = temperature
+    
+    @staticmethod
+    def messages(system_prompt, user_message):
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
         ]
-    }
+    
+    def complete(self, system_prompt, user_message, max_tokens=4000):
+        """Return the text of a single chat completion"""
+        return self.manager.complete(
+            self.messages(system_prompt, user_message), self.model, self.temperature, max_tokens
+        )
+    
+    def stream(self, system_prompt, user_message, max_tokens=4000):
+        """Yield the completion text piece by piece as the model generates it"""
+        return self.manager.stream(
+            self.messages(system_prompt, user_message), self.model, self.temperature, max_tokens
+        )
+
+def get_model_client():
+    """Model client registered as app.extensions['model_client'] (e.g. a local fake), else OpenAI"""
+    client = current_app.extensions.get('model_client')
+    if client is None:
+        client = OpenAIChatModel()
+    return client
+
+def cache_key_for(document_text, prompt_version, model_client):
+    """AI cache key for a document as answered by model_client, so one model's plans are never served for another"""
+    model = getattr(model_client, 'model', None) or type(model_client).__name__
+    temperature = getattr(model_client, 'temperature', TEMPERATURE)
+    return make_cache_key(document_text, prompt_version, model, temperature)
+
+def extract_json_object(response_content):
+    """Parse the outermost JSON object in a model response, or return None if there is none"""
+    # Find the JSON part (in case there's explanatory text)
+    json_start = response_content.find('{')
+    json_end = response_content.rfind('}') + 1
+    if json_start >= 0 and json_end > json_start:
+        return json.loads(response_content[json_start:json_end])
+    return None
+
+def process_project_overview(document_text, model_client=None, on_task=None):
+    """Process project overview with OpenAI and extract structured project data
+
+    When the model client can stream, each task is passed to on_task as soon as
+    its JSON object is complete, before the rest of the response has arrived.
     """
+    model_client = model_client or get_model_client()
+    
+    # Long overviews are split into chunks and processed in parallel
+    chunk_chars = current_app.config.get('AI_CHUNK_CHARS')
+    if chunk_chars and len(document_text) > chunk_chars:
+        return process_in_chunks(document_text, model_client, on_task)
+    
+    # Identical documents are answered from the cache without calling the model
+    cache_key = cache_key_for(document_text, PROMPT_VERSION, model_client)
+    cached = ai_cache.get(cache_key)
+    if cached is not None:
+        if on_task:
+            for task in cached.get("tasks", []):
+                on_task(task)
+        return cached
     
     # Prepare user message
     user_message = f"Here's a project overview. Please analyze it and create a project schedule:\n\n{document_text}"
     
-    # Call OpenAI API
-    response = openai.chat.completions.create(
-        model="gpt-4-turbo",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message}
-        ],
-        temperature=0.3,
-        max_tokens=4000
-    )
+    # Call OpenAI API, parsing tasks out of the stream as they complete
+    project_data = None
+    if hasattr(model_client, 'stream'):
+        parser = TaskStreamParser()
+        for piece in model_client.stream(SYSTEM_PROMPT, user_message, max_tokens=4000):
+            for task in parser.feed(piece):
+                if on_task:
+                    on_task(task)
+        project_data = parser.result()
+        response_content = ''.join(parser.pieces)
+    else:
+        response_content = model_client.complete(SYSTEM_PROMPT, user_message, max_tokens=4000)
     
     # Parse the response
     try:
-        response_content = response.choices[0].message.content
-        # Find the JSON part (in case there's explanatory text)
-        json_start = response_content.find('{')
-        json_end = response_content.rfind('}') + 1
-        if json_start >= 0 and json_end > json_start:
-            json_content = response_content[json_start:json_end]
-            project_data = json.loads(json_content)
+        if project_data is None:
+            project_data = extract_json_object(response_content)
+        if project_data is not None:
+            ai_cache.set(cache_key, project_data)
             return project_data
         else:
             # Fallback if JSON is not found
+            FALLBACKS.inc(kind='unstructured_response')
             return process_unstructured_response(response_content)
     except Exception as e:
-        print(f"Error parsing AI response: {e}")
+        current_app.logger.exception("Error parsing AI response: %s", e)
+        ERRORS.inc(component='ai_processor')
+        return create_default_project()
+
+def process_in_chunks(document_text, model_client, on_task=None):
+    """Map-reduce extraction for overviews too long for a single request
+
+    Chunks are answered whole, so on_task gets the merged tasks once every
+    chunk is in. A plan missing a failed chunk's tasks is returned but not
+    cached, so the next upload of the document asks the model again.
+    """
+    chunk_chars = current_app.config['AI_CHUNK_CHARS']
+    cache_key = cache_key_for(document_text, f"{PROMPT_VERSION}-chunked-{chunk_chars}", model_client)
+    cached = ai_cache.get(cache_key)
+    if cached is not None:
+        if on_task:
+            for task in cached.get("tasks", []):
+                on_task(task)
+        return cached
+    
+    # Chunks are extracted on pool threads, outside the app context
+    logger = current_app.logger
+
+    def extract_chunk(chunk, index, total):
+        user_message = (
+            f"Here's part {index + 1} of {total} of a project overview. Please analyze this part and "
+            f"create a project schedule for the work it describes. Number task ids from 1 within this "
+            f"part only:\n\n{chunk}"
+        )
+        try:
+            return extract_json_object(model_client.complete(SYSTEM_PROMPT, user_message, max_tokens=4000))
+        except Exception as e:
+            logger.warning("Error processing overview part %s of %s: %s", index + 1, total, e)
+            ERRORS.inc(component='ai_processor')
+            return None
+    
+    chunks = split_document(document_text, chunk_chars)
+    plans = map_chunks(chunks, extract_chunk, max_workers=current_app.config.get('AI_CHUNK_CONCURRENCY', 4))
+    if not any(plan and plan.get("tasks") for plan in plans):
+        current_app.logger.error("Error parsing AI response: no chunk produced any tasks")
         return create_default_project()
+    
+    project_data = reduce_plans(plans)
+    failed = sum(plan is None for plan in plans)
+    if failed:
+        current_app.logger.warning("%s of %s overview parts failed; not caching the partial plan", failed, len(plans))
+    else:
+        ai_cache.set(cache_key, project_data)
+    if on_task:
+        for task in project_data["tasks"]:
+            on_task(task)
+    return project_data
         
 def process_unstructured_response(response_text):
     """Process unstructured text response from OpenAI"""
@@ -151,6 +278,7 @@ def process_unstructured_response(response_text):
 
 def create_default_project():
     """Create a default project structure if parsing fails"""
+    FALLBACKS.inc(kind='default_project')
     return {
         "project_name": "New Project",
         "tasks": [
@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from app.models.storage import storage
+
+# Bytes read per chunk when hashing or copying a stream
+READ_SIZE = 64 * 1024
+# Files derived from a blob and kept beside it as <blob path><suffix>; collected with it
+SIDECAR_SUFFIXES = ('.snap',)
+
+
+class BlobStore:
+    """Content-addressed files for uploads and generated schedules
+
+    Each blob lives at <root>/<name[:2]>/<name>, where name is a SHA-256 hex
+    digest plus the original extension, so storing the same bytes twice
+    reuses one file. A row in the ``blobs`` table tracks its size, when it
+    was last stored and how many projects refer to it. The background
+    collector deletes blobs nobody refers to once they are older than the
+    grace period, which leaves time for queued uploads to become projects.
+    """
+    def __init__(self, app=None):
+        self.root = None
+        self.grace = 24 * 3600
+        self.gc_interval = 3600
+        self.writes = 0
+        self.duplicates = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._collector = None
+        # The collector runs outside any app context, so it logs through the app's logger held here
+        self.logger = logging.getLogger(__name__)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.root = os.path.abspath(app.config.get('BLOB_STORE_PATH') or os.path.join(app.instance_path, 'blobs'))
+        self.grace = app.config.get('BLOB_GC_GRACE', self.grace)
+        self.gc_interval = app.config.get('BLOB_GC_INTERVAL', self.gc_interval)
+        self.logger = app.logger
+        os.makedirs(os.path.join(self.root, 'tmp'), exist_ok=True)
+        app.extensions['blob_store'] = self
+        if self.gc_interval:
+            self.start()
+
+    def path(self, name):
+        return os.path.join(self.root, name[:2], name)
+
+    def name_of(self, path):
+        """Blob name for a path inside the store, else None"""
+        if not path or self.root is None:
+            return None
+        path = os.path.abspath(path)
+        if os.path.dirname(os.path.dirname(path)) != self.root:
+            return None
+        return os.path.basename(path)
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _touch(self, name):
+        """Record that name was just stored; done before the file check so GC cannot race it"""
+        storage.execute(
+            "INSERT INTO blobs (name, size, refcount, last_used) VALUES (?, 0, 0, ?) "
+            "ON CONFLICT(name) DO UPDATE SET last_used = excluded.last_used",
+            (name, time.time())
+        )
+
+    def _commit(self, name, temp_path):
+        """Move a finished temp file into place and record its size"""
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+        storage.execute("UPDATE blobs SET size = ? WHERE name = ?", (os.path.getsize(path), name))
+        self._count('writes')
+        return path
+
+    def _temp_path(self):
+        return os.path.join(self.root, 'tmp', uuid.uuid4().hex)
+
+    def put_stream(self, stream, extension=''):
+        """Store the bytes of a file-like object; returns the blob path
+
+        Seekable streams (such as Werkzeug uploads) are hashed first and only
+        copied to disk when the content is new, so duplicate uploads cost no
+        writes. Other streams are hashed while being copied to a temp file.
+        """
+        extension = extension.lower()
+        if stream.seekable():
+            sha = hashlib.sha256()
+            start = stream.tell()
+            for chunk in iter(lambda: stream.read(READ_SIZE), b''):
+                sha.update(chunk)
+            name = sha.hexdigest() + extension
+            self._touch(name)
+            if os.path.exists(self.path(name)):
+                self._count('duplicates')
+                return self.path(name)
+            stream.seek(start)
+            temp_path = self._temp_path()
+            with open(temp_path, 'wb') as out:
+                for chunk in iter(lambda: stream.read(READ_SIZE), b''):
+                    out.write(chunk)
+            return self._commit(name, temp_path)
+
+        sha = hashlib.sha256()
+        temp_path = self._temp_path()
+        with open(temp_path, 'wb') as out:
+            for chunk in iter(lambda: stream.read(READ_SIZE), b''):
+                sha.update(chunk)
+                out.write(chunk)
+        name = sha.hexdigest() + extension
+        self._touch(name)
+        if os.path.exists(self.path(name)):
+            os.remove(temp_path)
+            self._count('duplicates')
+            return self.path(name)
+        return self._commit(name, temp_path)
+
+    def put_generated(self, key, extension, write):
+        """Store an artifact derived deterministically from inputs hashing to key
+
+        write(path) is only called when no blob exists for key yet, so
+        regenerating the same artifact costs nothing; anything else write puts
+        in the file, such as a timestamp, is fixed by that first write.
+        """
+        name = key + extension.lower()
+        self._touch(name)
+        if os.path.exists(self.path(name)):
+            self._count('duplicates')
+            return self.path(name)
+        temp_path = self._temp_path()
+        try:
+            write(temp_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return self._commit(name, temp_path)
+
+    def retain(self, path):
+        """Count a reference to the blob at path; paths outside the store are ignored"""
+        name = self.name_of(path)
+        if name is not None:
+            storage.execute("UPDATE blobs SET refcount = refcount + 1, last_used = ? WHERE name = ?",
+                            (time.time(), name))
+
+    def release(self, path):
+        name = self.name_of(path)
+        if name is not None:
+            storage.execute("UPDATE blobs SET refcount = MAX(refcount - 1, 0), last_used = ? WHERE name = ?",
+                            (time.time(), name))
+
+    def collect(self):
+        """Delete unreferenced blobs older than the grace period; returns (blobs, bytes) removed"""
+        cutoff = time.time() - self.grace
+        rows = storage.fetch_all(
+            "SELECT name, size FROM blobs WHERE refcount = 0 AND last_used < ?", (cutoff,)
+        )
+        removed = 0
+        freed = 0
+        for row in rows:
+            path = self.path(row['name'])
+            trash = self._temp_path()
+            # Move the file aside first: if a put touches the row meanwhile, the delete
+            # below matches nothing and the file is moved back
+            try:
+                os.replace(path, trash)
+            except FileNotFoundError:
+                trash = None
+            deleted = storage.execute(
+                "DELETE FROM blobs WHERE name = ? AND refcount = 0 AND last_used < ?", (row['name'], cutoff)
+            )
+            if trash is None:
+                continue
+            if deleted:
+                os.remove(trash)
+                for suffix in SIDECAR_SUFFIXES:
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
+                removed += 1
+                freed += row['size']
+            else:
+                os.replace(trash, path)
+
+        # Temp files left behind by interrupted writes
+        temp_dir = os.path.join(self.root, 'tmp')
+        for entry in os.scandir(temp_dir):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        return removed, freed
+
+    def stats(self):
+        row = storage.fetch_one(
+            "SELECT COUNT(*) AS blobs, COALESCE(SUM(size), 0) AS bytes, "
+            "COALESCE(SUM(refcount = 0), 0) AS unreferenced FROM blobs"
+        )
+        return {
+            'blobs': row['blobs'],
+            'bytes': row['bytes'],
+            'unreferenced': row['unreferenced'],
+            'writes': self.writes,
+            'duplicates': self.duplicates
+        }
+
+    def start(self):
+        """Start the background garbage collector"""
+        if self._collector is not None:
+            return
+        self._stopping.clear()
+        self._collector = threading.Thread(target=self._collect_loop, name='blob-gc', daemon=True)
+        self._collector.start()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        if self._collector is not None:
+            self._collector.join(timeout)
+            self._collector = None
+
+    def _collect_loop(self):
+        while not self._stopping.wait(self.gc_interval):
+            try:
+                removed, freed = self.collect()
+                if removed:
+                    self.logger.info("Blob GC removed %s unreferenced files (%s bytes)", removed, freed)
+            except Exception as e:
+                self.logger.exception("Blob GC error: %s", e)
+
+
+def plan_key(project_data, project_name):
+    """Content address for the schedule file generated from a plan"""
+    canonical = json.dumps([project_name, project_data], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+blob_store = BlobStore()
@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import zipfile
+import threading
+import click
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import current_app
+from flask.cli import with_appcontext
+from app.services.job_queue import job_queue, JobReporter
+from app.services.blob_store import blob_store
+from app.services.pipeline import run_upload_pipeline
+from app.services.metrics import UPLOADS
+from app.models.user import User
+
+
+class BulkImportError(ValueError):
+    """Raised for an archive or directory that cannot be imported"""
+
+
+class StageTimer(JobReporter):
+    """Reporter that records how long the pipeline spent in each stage it announced"""
+    def __init__(self):
+        super().__init__()
+        self.stages = {}
+        self._stage = None
+        self._since = time.perf_counter()
+
+    def __call__(self, progress, stage=None):
+        if stage is None:
+            return
+        self.finish()
+        self._stage = stage
+
+    def finish(self):
+        now = time.perf_counter()
+        if self._stage is not None:
+            self.stages[self._stage] = self.stages.get(self._stage, 0.0) + now - self._since
+        self._stage = None
+        self._since = now
+
+
+def _is_document(name, allowed_extensions):
+    base = os.path.basename(name)
+    if not base or base.startswith('.') or '__MACOSX' in name.split('/'):
+        return False
+    return os.path.splitext(base)[1].lstrip('.').lower() in allowed_extensions
+
+
+def store_archive_documents(archive_path, allowed_extensions, max_files, max_file_bytes):
+    """Copy the overviews in a zip archive into the blob store; returns [(name, blob path)]
+
+    Entries with other extensions, hidden files and macOS resource forks are
+    skipped. Entries that claim to be larger than max_file_bytes are refused
+    before anything is decompressed.
+    """
+    try:
+        archive = zipfile.ZipFile(archive_path)
+    except zipfile.BadZipFile as e:
+        raise BulkImportError(f"Not a zip archive: {e}")
+    with archive:
+        entries = [info for info in archive.infolist()
+                   if not info.is_dir() and _is_document(info.filename, allowed_extensions)]
+        if not entries:
+            raise BulkImportError("The archive contains no supported documents")
+        if len(entries) > max_files:
+            raise BulkImportError(f"The archive holds {len(entries)} documents; at most {max_files} can be imported at once")
+        documents = []
+        for info in entries:
+            if info.file_size > max_file_bytes:
+                raise BulkImportError(f"{info.filename} is larger than {max_file_bytes} bytes")
+            with archive.open(info) as stream:
+                documents.append((info.filename, blob_store.put_stream(stream, os.path.splitext(info.filename)[1])))
+    return documents
+
+
+def store_directory_documents(directory, allowed_extensions, max_files):
+    """Copy the overviews found under a directory into the blob store; returns [(relative name, blob path)]"""
+    if not os.path.isdir(directory):
+        raise BulkImportError(f"Not a directory: {directory}")
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in sorted(files):
+            relative = os.path.relpath(os.path.join(root, name), directory).replace(os.sep, '/')
+            if _is_document(relative, allowed_extensions):
+                paths.append(relative)
+    if not paths:
+        raise BulkImportError("The directory contains no supported documents")
+    if len(paths) > max_files:
+        raise BulkImportError(f"The directory holds {len(paths)} documents; at most {max_files} can be imported at once")
+    documents = []
+    for relative in paths:
+        with open(os.path.join(directory, relative), 'rb') as stream:
+            documents.append((relative, blob_store.put_stream(stream, os.path.splitext(relative)[1])))
+    return documents
+
+
+def project_name_for(name):
+    """Project name derived from a document's file name"""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return stem.replace('_', ' ').replace('-', ' ').strip() or 'Untitled Project'
+
+
+def import_documents(documents, owner_id, workers, report=None):
+    """Run the upload pipeline over (name, path) documents on a pool of workers
+
+    Each document becomes one Project; a failure is recorded and the rest
+    carry on. Returns the import report: totals, throughput and a row per
+    file with its project id or error and the seconds spent in each stage.
+    """
+    report = report or JobReporter()
+    app = current_app._get_current_object()
+    workers = max(1, min(workers, len(documents) or 1))
+    results = [None] * len(documents)
+    lock = threading.Lock()
+    finished = [0]
+
+    def run(index, name, path):
+        timer = StageTimer()
+        started = time.perf_counter()
+        row = {'file': name, 'project_name': project_name_for(name)}
+        try:
+            with app.app_context():
+                project = run_upload_pipeline(path, row['project_name'], owner_id, timer)
+            row.update(status='done', project_id=project.id)
+            UPLOADS.inc(status='done')
+        except Exception as e:
+            row.update(status='failed', error=str(e))
+            UPLOADS.inc(status='failed')
+        timer.finish()
+        row['seconds'] = round(time.perf_counter() - started, 3)
+        row['stages'] = {stage: round(seconds, 3) for stage, seconds in timer.stages.items()}
+        if timer.timings.get('llm_seconds') is not None:
+            row['llm_seconds'] = round(timer.timings['llm_seconds'], 3)
+        results[index] = row
+        with lock:
+            finished[0] += 1
+            report(5 + 95 * finished[0] // len(documents), f"imported {finished[0]} of {len(documents)}")
+
+    started = time.perf_counter()
+    report(5, f"importing {len(documents)} documents")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk-import') as executor:
+        futures = [executor.submit(run, index, name, path) for index, (name, path) in enumerate(documents)]
+        for future in as_completed(futures):
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    failed = [row for row in results if row['status'] == 'failed']
+    return {
+        'documents': len(results),
+        'succeeded': len(results) - len(failed),
+        'failed': len(failed),
+        'workers': workers,
+        'seconds': round(elapsed, 3),
+        'documents_per_minute': round(60 * len(results) / elapsed, 2) if elapsed else None,
+        'files': results
+    }
+
+
+def import_source(source, owner_id, workers=None, report=None):
+    """Import every overview in a zip archive or directory for owner_id; returns the import report"""
+    config = current_app.config
+    allowed = config['ALLOWED_EXTENSIONS']
+    max_files = config.get('BULK_IMPORT_MAX_FILES', 500)
+    workers = workers or config.get('BULK_IMPORT_CONCURRENCY', 4)
+    report = report or JobReporter()
+    report(1, 'unpacking')
+    if os.path.isdir(source):
+        documents = store_directory_documents(source, allowed, max_files)
+    else:
+        documents = store_archive_documents(source, allowed, max_files,
+                                            config.get('BULK_IMPORT_MAX_FILE_BYTES', 50 * 1024 * 1024))
+    return import_documents(documents, owner_id, workers, report)
+
+
+@job_queue.handler('bulk_import')
+def bulk_import_job(payload, report):
+    """Job queue entry point for an uploaded zip of overviews"""
+    return import_source(payload['archive'], payload['owner_id'], payload.get('workers'), report)
+
+
+@click.command('import-overviews')
+@click.argument('source', type=click.Path(exists=True))
+@click.option('--owner', required=True, help='Email of the user who will own the new projects.')
+@click.option('--workers', type=int, default=None, help='Documents processed at once (default BULK_IMPORT_CONCURRENCY).')
+@click.option('--report', 'report_path', type=click.Path(dir_okay=False), help='Also write the import report as JSON.')
+@with_appcontext
+def import_overviews_command(source, owner, workers, report_path):
+    """Create a project from every overview in SOURCE, a zip archive or a directory"""
+    user = User.get_by_email(owner)
+    if user is None:
+        raise click.ClickException(f"No user with email {owner}")
+    try:
+        result = import_source(source, user.id, workers)
+    except BulkImportError as e:
+        raise click.ClickException(str(e))
+
+    for row in result['files']:
+        outcome = row.get('project_id') if row['status'] == 'done' else f"FAILED: {row['error']}"
+        click.echo(f"{row['seconds']:8.2f}s  {row['file']}  {outcome}")
+    click.echo(f"{result['succeeded']} of {result['documents']} documents imported in {result['seconds']:.1f}s "
+               f"with {result['workers']} workers ({result['documents_per_minute']} per minute)")
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as out:
+            json.dump(result, out, indent=2)
+    if result['failed']:
+        raise SystemExit(1)
@@ -0,0 +1,160 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from app.services.plan_validator import as_duration, INVALID
+
+# Lines that look like section headings: markdown, numbered ("2.", "3.1"), ALL CAPS or "Title:"
+_HEADING = re.compile(r'^\s*(#{1,6}\s+\S|\d+(\.\d+)*[.)]?\s+\S.{0,80}$|[A-Z][A-Z0-9 &/,-]{3,80}$|[^.!?]{1,80}:$)')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def _units(text, max_chars):
+    """Break text into paragraphs, then lines, sentences and finally fixed slices until each fits"""
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            yield paragraph
+            continue
+        for line in paragraph.split('\n'):
+            if len(line) <= max_chars:
+                yield line
+                continue
+            for sentence in _SENTENCE_END.split(line):
+                for start in range(0, len(sentence), max_chars):
+                    yield sentence[start:start + max_chars]
+
+
+def split_document(text, max_chars):
+    """Split text into chunks of at most max_chars, preferring to break before headings"""
+    chunks = []
+    current = []
+    size = 0
+    for unit in _units(text, max_chars):
+        first_line = unit.split('\n', 1)[0]
+        starts_section = bool(_HEADING.match(first_line))
+        # Start a new chunk when this one is full, or at a heading once it is half full
+        if current and (size + len(unit) + 2 > max_chars or (starts_section and size >= max_chars // 2)):
+            chunks.append('\n\n'.join(current))
+            current = []
+            size = 0
+        current.append(unit)
+        size += len(unit) + 2
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+
+def map_chunks(chunks, extract, max_workers=4):
+    """Run extract(chunk, index, total) for every chunk on a bounded thread pool, keeping order"""
+    if not chunks:
+        return []
+    total = len(chunks)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total))) as executor:
+        return list(executor.map(lambda args: extract(args[1], args[0], total), enumerate(chunks)))
+
+
+def _normalize_name(name):
+    return re.sub(r'[^a-z0-9]+', ' ', str(name or '').lower()).strip()
+
+
+def _duration(task):
+    """The task's duration in whole days, so durations given as "5 days" and 5 compare"""
+    duration = as_duration(task.get("duration", 1))
+    return 1 if duration is INVALID else duration
+
+
+def reduce_plans(plans):
+    """Merge per-chunk plans into one: dedupe tasks and resources by name, renumber ids, remap predecessors
+
+    Chunks are extracted independently, so a predecessor that is not one of
+    its chunk's ids is looked up by task name among every chunk's tasks.
+    Overviews describe their work in order, so the tasks a chunk introduces
+    without any predecessor follow the previous chunk's exit tasks (those
+    no other task in that chunk depends on) rather than starting in parallel
+    with the whole project.
+    """
+    project_name = None
+    tasks = []
+    tasks_by_name = {}
+    resources = []
+    resources_by_name = {}
+    previous_exits = []
+
+    for plan in plans:
+        if not plan:
+            continue
+        project_name = project_name or plan.get("project_name")
+
+        for resource in plan.get("resources") or []:
+            key = _normalize_name(resource.get("name"))
+            if not key:
+                continue
+            existing = resources_by_name.get(key)
+            if existing is None:
+                resources_by_name[key] = {
+                    "id": len(resources) + 1,
+                    "name": resource["name"],
+                    "role": resource.get("role"),
+                    "capacity": resource.get("capacity", 100)
+                }
+                resources.append(resources_by_name[key])
+            else:
+                existing["capacity"] = max(existing["capacity"], resource.get("capacity", 100))
+
+        # Map this chunk's local task ids onto merged task ids
+        local_ids = {}
+        chunk_tasks = []
+        new_ids = set()
+        for task in plan.get("tasks") or []:
+            key = _normalize_name(task.get("name"))
+            if not key:
+                continue
+            merged = tasks_by_name.get(key)
+            if merged is None:
+                merged = {
+                    "id": len(tasks) + 1,
+                    "name": task["name"],
+                    "description": task.get("description", ""),
+                    "duration": _duration(task),
+                    "predecessors": [],
+                    "resources": []
+                }
+                tasks_by_name[key] = merged
+                tasks.append(merged)
+                new_ids.add(merged["id"])
+            else:
+                merged["duration"] = max(merged["duration"], _duration(task))
+                if not merged["description"]:
+                    merged["description"] = task.get("description", "")
+            local_ids[str(task.get("id"))] = merged["id"]
+            chunk_tasks.append((merged, task))
+
+        linked = set()
+        for merged, task in chunk_tasks:
+            for pred_id in task.get("predecessors") or []:
+                pred = local_ids.get(str(pred_id))
+                if pred is None:
+                    by_name = tasks_by_name.get(_normalize_name(pred_id))
+                    pred = by_name["id"] if by_name else None
+                if pred is not None and pred != merged["id"] and pred not in merged["predecessors"]:
+                    merged["predecessors"].append(pred)
+                    linked.add(pred)
+            for resource_name in task.get("resources") or []:
+                resource = resources_by_name.get(_normalize_name(resource_name))
+                name = resource["name"] if resource else resource_name
+                if name not in merged["resources"]:
+                    merged["resources"].append(name)
+
+        chunk_ids = [merged["id"] for merged, _ in chunk_tasks]
+        for merged, _ in chunk_tasks:
+            if merged["id"] in new_ids and not merged["predecessors"]:
+                merged["predecessors"].extend(pred for pred in previous_exits if pred != merged["id"])
+        if chunk_ids:
+            previous_exits = list(dict.fromkeys(task_id for task_id in chunk_ids if task_id not in linked))
+
+    return {
+        "project_name": project_name or "Extracted Project",
+        "tasks": tasks,
+        "resources": resources
+    }
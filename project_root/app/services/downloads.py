@@ -0,0 +1,58 @@
+import os
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Bytes read from disk per chunk when hashing or streaming a file
+READ_SIZE = 64 * 1024
+# Files smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+# File digests remembered, keyed by path and version
+MAX_DIGESTS = 1024
+
+_digests = OrderedDict()
+_digests_lock = threading.Lock()
+
+
+def iter_file(path, chunk_size=READ_SIZE):
+    with open(path, 'rb') as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def file_digest(path):
+    """SHA-256 of a file's content, recomputed only when its mtime or size changes"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _digests_lock:
+        digest = _digests.get(key)
+        if digest is not None:
+            _digests.move_to_end(key)
+            return digest
+    sha = hashlib.sha256()
+    for chunk in iter_file(path):
+        sha.update(chunk)
+    digest = sha.hexdigest()
+    with _digests_lock:
+        _digests[key] = digest
+        while len(_digests) > MAX_DIGESTS:
+            _digests.popitem(last=False)
+    return digest
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress an iterable of byte chunks into one gzip stream without buffering it all"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def accepts_gzip(request):
+    return request.accept_encodings['gzip'] > 0
@@ -0,0 +1,223 @@
+import time
+import random
+import datetime
+import contextlib
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+
+GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
+# Microsoft Graph accepts at most 20 requests per JSON batch
+BATCH_SIZE = 20
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# A batch item whose dependsOn item failed; sent again with it
+FAILED_DEPENDENCY = 424
+
+
+class GraphBatchError(Exception):
+    """Raised when a whole $batch request cannot be delivered"""
+
+
+def retry_after_seconds(value):
+    """Seconds to wait from a Retry-After header given as seconds or an HTTP date, or None if unreadable"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+def dependency_levels(depends_on):
+    """0 for items without dependencies, else one more than their deepest dependency; cycles are cut"""
+    levels = [None] * len(depends_on)
+    for root in range(len(depends_on)):
+        if levels[root] is not None:
+            continue
+        # Iterative depth-first walk; an item still on the stack is a back edge and is ignored
+        on_stack = {root}
+        stack = [(root, iter(depends_on[root]))]
+        while stack:
+            index, deps = stack[-1]
+            for dep in deps:
+                if levels[dep] is None and dep not in on_stack:
+                    on_stack.add(dep)
+                    stack.append((dep, iter(depends_on[dep])))
+                    break
+            else:
+                stack.pop()
+                on_stack.discard(index)
+                levels[index] = 1 + max((levels[dep] for dep in depends_on[index] if levels[dep] is not None),
+                                        default=-1)
+    return levels
+
+
+class GraphSyncEngine:
+    """Sends Microsoft Graph writes as JSON $batch requests over a pooled session"""
+    def __init__(self, token_provider, base_url=GRAPH_BASE_URL, max_workers=4, max_retries=3,
+                 backoff=0.5, timeout=30, session=None):
+        self.token_provider = token_provider
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = session or self._build_session(max_workers)
+        self.timings = {}
+        self.failures = []
+        self._token = None
+        self._headers = None
+
+    @staticmethod
+    def _build_session(max_workers):
+        # requests is imported when the first sync starts, not when the app boots
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def headers(self):
+        """Authorization headers, rebuilt only when the token changes"""
+        token = self.token_provider()
+        if token != self._token:
+            self._token = token
+            self._headers = {
+                'Authorization': f'Bearer {token}',
+                'Content-Type': 'application/json'
+            }
+        return self._headers
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Record the wall time spent in a named sync phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def post(self, path, body):
+        """Send a single POST outside of a batch"""
+        return self.session.post(f"{self.base_url}{path}", headers=self.headers(), json=body, timeout=self.timeout)
+
+    def post_many(self, requests_to_send, depends_on=None):
+        """POST (path, body) pairs in batches of 20; returns response bodies in order, None for failures
+
+        depends_on optionally lists, for each request, the indexes of the
+        requests that must be delivered before it. Requests are then batched
+        in dependency order and a batch is only sent once every batch it
+        depends on has been, so only independent batches run concurrently.
+        Within a batch the order is left to Graph through dependsOn.
+        """
+        requests_to_send = list(requests_to_send)
+        results = [None] * len(requests_to_send)
+        if not requests_to_send:
+            return results
+        if depends_on is None:
+            depends_on = [()] * len(requests_to_send)
+        depends_on = [[dep for dep in deps if 0 <= dep < len(requests_to_send) and dep != index]
+                      for index, deps in enumerate(depends_on)]
+        item_levels = dependency_levels(depends_on)
+        order = sorted(range(len(requests_to_send)), key=item_levels.__getitem__)
+        groups = [order[start:start + BATCH_SIZE] for start in range(0, len(order), BATCH_SIZE)]
+
+        # Groups are in dependency order, so every group a group depends on has a lower level already
+        group_of = {}
+        group_levels = []
+        for number, indexes in enumerate(groups):
+            for index in indexes:
+                group_of[index] = number
+            group_levels.append(1 + max(
+                (group_levels[group_of[dep]] for index in indexes for dep in depends_on[index]
+                 if group_of.get(dep, number) != number),
+                default=-1
+            ))
+
+        def run_group(indexes):
+            for index, body in self._send_group(indexes, requests_to_send, depends_on).items():
+                results[index] = body
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(groups))) as executor:
+            for level in range(max(group_levels) + 1):
+                list(executor.map(run_group, [g for g, l in zip(groups, group_levels) if l == level]))
+        return results
+
+    def _send_group(self, indexes, requests_to_send, depends_on=None):
+        """Deliver one batch, retrying only the items that failed with a retryable status"""
+        import requests
+        pending = list(indexes)
+        done = {}
+        retry_after = None
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self._delay(attempt, retry_after))
+            retry_after = None
+            batch = {'requests': []}
+            in_batch = set(pending)
+            for index in pending:
+                item = {
+                    'id': str(index),
+                    'method': 'POST',
+                    'url': requests_to_send[index][0],
+                    'headers': {'Content-Type': 'application/json'},
+                    'body': requests_to_send[index][1]
+                }
+                first = [str(dep) for dep in (depends_on[index] if depends_on else ()) if dep in in_batch]
+                if first:
+                    item['dependsOn'] = first
+                batch['requests'].append(item)
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/$batch", headers=self.headers(), json=batch, timeout=self.timeout
+                )
+            except requests.RequestException as e:
+                last_error = str(e)
+                continue
+            if response.status_code in RETRYABLE_STATUS:
+                last_error = response.text
+                retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+                continue
+            if response.status_code != 200:
+                raise GraphBatchError(f"Batch request failed: {response.status_code} {response.text}")
+
+            answered = set()
+            still_pending = []
+            for item in response.json().get('responses', []):
+                index = int(item['id'])
+                answered.add(index)
+                status = item.get('status', 0)
+                if 200 <= status < 300:
+                    done[index] = item.get('body')
+                elif status in RETRYABLE_STATUS or status == FAILED_DEPENDENCY:
+                    still_pending.append(index)
+                    item_retry_after = retry_after_seconds((item.get('headers') or {}).get('Retry-After'))
+                    if item_retry_after is not None:
+                        retry_after = max(item_retry_after, retry_after or 0)
+                else:
+                    self.failures.append((requests_to_send[index][0], status, item.get('body')))
+            # Items the server did not answer at all are retried as well
+            still_pending.extend(index for index in pending if index not in answered)
+            pending = still_pending
+            last_error = 'retries exhausted'
+            if not pending:
+                return done
+
+        for index in pending:
+            self.failures.append((requests_to_send[index][0], None, last_error))
+        return done
+
+    def _delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return retry_after
+        # Exponential backoff with full jitter
+        return random.uniform(0, self.backoff * (2 ** (attempt - 1)))
@@ -0,0 +1,349 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import datetime
+import threading
+import traceback
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    owner_id TEXT,
+    status TEXT NOT NULL,
+    stage TEXT,
+    progress INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    claimed_by TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events (job_id, id);
+"""
+
+
+class JobReporter:
+    """Handed to job handlers to record progress and publish events; a no-op without a queue"""
+    def __init__(self, queue=None, job_id=None):
+        self.queue = queue
+        self.job_id = job_id
+        # Stage timings the handler wants to keep with the job result
+        self.timings = {}
+
+    def __call__(self, progress, stage=None):
+        if self.queue is not None:
+            self.queue.update_progress(self.job_id, progress, stage)
+
+    def event(self, kind, data):
+        if self.queue is not None:
+            self.queue.add_event(self.job_id, kind, data)
+
+
+class JobQueue:
+    """Persistent job queue backed by a local SQLite file and drained by a worker thread pool
+
+    A claimed job carries a lease: the claiming process's boot id and an
+    expiry time that a heartbeat thread keeps pushing forward while the job
+    runs. Only jobs whose lease has expired, because their process died or
+    hung, are claimed again, so several processes can share one queue. A job
+    claimed max_attempts times without finishing is marked failed instead of
+    taking down one worker after another.
+    """
+    def __init__(self, app=None):
+        self.app = None
+        self.db_path = None
+        self.handlers = {}
+        self.poll_interval = 0.5
+        self.lease_seconds = 60
+        self.max_attempts = 3
+        self.num_workers = 0
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._workers = []
+        self._boot_id = None
+        self._heartbeat = None
+        self._heartbeat_lock = threading.Lock()
+        self._workers_pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Open the queue database; the worker pool starts with the first request this process serves
+
+        CLI commands such as import-overviews create the app too but serve no
+        requests, so they run no workers.
+        """
+        self.app = app
+        self.db_path = app.config.get('JOB_QUEUE_PATH') or os.path.join(app.instance_path, 'jobs.sqlite3')
+        self.poll_interval = app.config.get('JOB_QUEUE_POLL_INTERVAL', 0.5)
+        self.lease_seconds = app.config.get('JOB_QUEUE_LEASE_SECONDS', 60)
+        self.max_attempts = app.config.get('JOB_QUEUE_MAX_ATTEMPTS', 3)
+        self.num_workers = app.config.get('JOB_QUEUE_WORKERS', 2)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        # Connections opened for an earlier app point at its database
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+
+        app.extensions['job_queue'] = self
+        app.before_request(self._ensure_workers)
+
+    def _ensure_workers(self):
+        """Start the worker pool once per serving process (again after a fork)"""
+        if not self.num_workers or self._workers_pid == os.getpid():
+            return
+        with self._heartbeat_lock:
+            if self._workers_pid != os.getpid():
+                self._workers = []
+                self.start(self.num_workers)
+                self._workers_pid = os.getpid()
+
+    @property
+    def boot_id(self):
+        """Identifies this process in job leases; a forked child gets its own"""
+        if self._boot_id is None or self._boot_id[1] != os.getpid():
+            self._boot_id = (f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}", os.getpid())
+            self._heartbeat = None
+        return self._boot_id[0]
+
+    def register(self, kind, handler):
+        """Register the callable that runs jobs of the given kind"""
+        self.handlers[kind] = handler
+        return handler
+
+    def handler(self, kind):
+        """Decorator form of register()"""
+        def decorator(func):
+            return self.register(kind, func)
+        return decorator
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, kind, payload, owner_id=None):
+        """Persist a new job and wake a worker; returns the job id"""
+        job_id = str(uuid.uuid4())
+        now = _now()
+        self._connection().execute(
+            "INSERT INTO jobs (id, kind, owner_id, status, stage, progress, payload, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?)",
+            (job_id, kind, owner_id, QUEUED, 'queued', json.dumps(payload), now, now)
+        )
+        self._wakeup.set()
+        return job_id
+
+    def enqueue_follow_up(self, job_id, kind, payload, owner_id=None):
+        """Enqueue the one job that carries on from finished job_id; returns its id
+
+        The new job's id is stored in job_id's result as follow_up_job_id, so
+        later calls return that job instead of enqueuing another.
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            result = json.loads(row['result']) if row and row['result'] else {}
+            follow_up_id = result.get('follow_up_job_id')
+            if follow_up_id is None:
+                follow_up_id = str(uuid.uuid4())
+                now = _now()
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, owner_id, status, stage, progress, payload, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?)",
+                    (follow_up_id, kind, owner_id, QUEUED, 'queued', json.dumps(payload), now, now)
+                )
+                result['follow_up_job_id'] = follow_up_id
+                conn.execute("UPDATE jobs SET result = ?, updated_at = ? WHERE id = ?",
+                             (json.dumps(result), now, job_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._wakeup.set()
+        return follow_up_id
+
+    def get(self, job_id):
+        """Return the job as a dict, or None if it does not exist"""
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def update_progress(self, job_id, progress, stage=None):
+        """Record how far a running job has got"""
+        self._connection().execute(
+            "UPDATE jobs SET progress = ?, stage = COALESCE(?, stage), updated_at = ? WHERE id = ?",
+            (int(progress), stage, _now(), job_id)
+        )
+
+    def add_event(self, job_id, kind, data):
+        """Append an event (e.g. a partial result) to the job's event log"""
+        self._connection().execute(
+            "INSERT INTO job_events (job_id, kind, data, created_at) VALUES (?, ?, ?, ?)",
+            (job_id, kind, json.dumps(data), _now())
+        )
+
+    def events_since(self, job_id, last_id=0):
+        """Events logged for a job after the event with id last_id"""
+        rows = self._connection().execute(
+            "SELECT id, kind, data FROM job_events WHERE job_id = ? AND id > ? ORDER BY id",
+            (job_id, last_id)
+        ).fetchall()
+        return [{'id': row['id'], 'kind': row['kind'], 'data': json.loads(row['data'])} for row in rows]
+
+    def _finish(self, job_id, status, result=None, error=None):
+        # A job whose lease expired and was claimed elsewhere belongs to that process now
+        self._connection().execute(
+            "UPDATE jobs SET status = ?, stage = ?, progress = COALESCE(?, progress), result = ?, error = ?, "
+            "updated_at = ?, lease_expires = NULL WHERE id = ? AND claimed_by = ?",
+            (status, status, 100 if status == DONE else None, json.dumps(result) if result is not None else None,
+             error, _now(), job_id, self.boot_id)
+        )
+
+    def _claim_next(self):
+        """Atomically lease the oldest queued job, or one whose lease has expired, and return it
+
+        Every claim counts as an attempt. A job whose earlier claims all ended
+        with their process dying is failed once it has had max_attempts.
+        """
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            while True:
+                row = conn.execute(
+                    "SELECT id, attempts FROM jobs WHERE status = ? OR (status = ? AND COALESCE(lease_expires, 0) < ?) "
+                    "ORDER BY created_at LIMIT 1", (QUEUED, RUNNING, now)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                if row['attempts'] < self.max_attempts:
+                    break
+                conn.execute(
+                    "UPDATE jobs SET status = ?, stage = ?, error = ?, updated_at = ?, lease_expires = NULL WHERE id = ?",
+                    (FAILED, FAILED, f"Gave up after {row['attempts']} attempts: the process running it stopped "
+                     "each time", _now(), row['id'])
+                )
+            conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, updated_at = ?, claimed_by = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (RUNNING, 'started', _now(), self.boot_id, now + self.lease_seconds, row['id'])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._ensure_heartbeat()
+        return self.get(row['id'])
+
+    def renew_leases(self):
+        """Push back the lease expiry of every job this process is running"""
+        self._connection().execute(
+            "UPDATE jobs SET lease_expires = ? WHERE claimed_by = ? AND status = ?",
+            (time.time() + self.lease_seconds, self.boot_id, RUNNING)
+        )
+
+    def _ensure_heartbeat(self):
+        with self._heartbeat_lock:
+            if self._heartbeat is None or not self._heartbeat.is_alive():
+                self._heartbeat = threading.Thread(target=self._heartbeat_loop, name='job-heartbeat', daemon=True)
+                self._heartbeat.start()
+
+    def _heartbeat_loop(self):
+        while not self._stopping.wait(self.lease_seconds / 3):
+            try:
+                self.renew_leases()
+            except sqlite3.OperationalError:
+                # Database busy; the lease has two more intervals to go
+                pass
+
+    def run_job(self, job):
+        """Run a single claimed job inside the app context"""
+        handler = self.handlers.get(job['kind'])
+        if handler is None:
+            self._finish(job['id'], FAILED, error=f"No handler registered for job kind '{job['kind']}'")
+            return
+
+        try:
+            with self.app.app_context():
+                result = handler(job['payload'], JobReporter(self, job['id']))
+            self._finish(job['id'], DONE, result=result)
+        except Exception as e:
+            traceback.print_exc()
+            self._finish(job['id'], FAILED, error=str(e))
+
+    def run_pending(self):
+        """Drain the queue in the calling thread (used when no workers are configured)"""
+        count = 0
+        while True:
+            job = self._claim_next()
+            if job is None:
+                return count
+            self.run_job(job)
+            count += 1
+
+    def start(self, num_workers):
+        """Start the background worker threads"""
+        self._stopping.clear()
+        for i in range(num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self, timeout=None):
+        """Ask the worker threads to exit once their current job is done"""
+        self._stopping.set()
+        self._wakeup.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            try:
+                job = self._claim_next()
+            except sqlite3.OperationalError:
+                # Database busy with another process; try again shortly
+                job = None
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self.run_job(job)
+
+
+def _now():
+    return datetime.datetime.now().isoformat()
+
+
+job_queue = JobQueue()
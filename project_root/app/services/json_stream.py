@@ -0,0 +1,121 @@
+import json
+
+
+class TaskStreamParser:
+    """Incrementally scan a streamed model response and pull out complete task objects
+
+    Text is fed in arbitrary pieces. The parser tracks string/escape state and
+    nesting depth as it goes, so each character is examined once. Every object
+    that closes directly inside the root object's "tasks" array is decoded and
+    returned from feed() as soon as its closing brace arrives. Text before the
+    first '{' (and after the root object closes) is ignored. Only the part of
+    the text that may still be needed (an unfinished task or key) is kept in
+    the working window, so long responses are not re-copied on every feed.
+    """
+    def __init__(self, array_key="tasks"):
+        self.array_key = array_key
+        self.pieces = []
+        self.window = ''
+        self.offset = 0
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.root_start = None
+        self.root_end = None
+        self.string_start = None
+        self.last_key = None
+        self.expect_key = False
+        self.in_array = False
+        self.item_start = None
+        self.tasks = []
+
+    def feed(self, piece):
+        """Consume more response text; returns the task objects completed by it"""
+        if self.root_end is not None or not piece:
+            return []
+        self.pieces.append(piece)
+        text = self.window + piece
+        offset = self.offset
+        completed = []
+        i = self.pos
+        end = offset + len(text)
+        while i < end:
+            c = text[i - offset]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == '\\':
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.expect_key:
+                        self.last_key = text[self.string_start + 1 - offset:i - offset]
+                        self.expect_key = False
+            elif c == '"':
+                if self.root_start is not None:
+                    self.in_string = True
+                    self.string_start = i
+            elif c == '{':
+                if self.root_start is None:
+                    self.root_start = i
+                    self.expect_key = True
+                elif self.in_array and self.depth == 2:
+                    self.item_start = i
+                self.depth += 1
+            elif c == '}':
+                if self.root_start is not None:
+                    self.depth -= 1
+                    if self.depth == 0:
+                        self.root_end = i + 1
+                        self.pos = i + 1
+                        self.window = ''
+                        return completed
+                    if self.in_array and self.depth == 2 and self.item_start is not None:
+                        task = self._decode(text[self.item_start - offset:i + 1 - offset])
+                        if task is not None:
+                            self.tasks.append(task)
+                            completed.append(task)
+                        self.item_start = None
+            elif c == '[':
+                if self.root_start is not None:
+                    if self.depth == 1 and self.last_key == self.array_key:
+                        self.in_array = True
+                    self.depth += 1
+            elif c == ']':
+                if self.root_start is not None:
+                    self.depth -= 1
+                    if self.depth == 1:
+                        self.in_array = False
+            elif c == ',' and self.depth == 1:
+                self.expect_key = True
+            i += 1
+        self.pos = i
+
+        # Keep only what an unfinished task or key still needs
+        keep = i
+        if self.item_start is not None:
+            keep = min(keep, self.item_start)
+        if self.in_string and self.string_start is not None:
+            keep = min(keep, self.string_start)
+        self.window = text[keep - offset:]
+        self.offset = keep
+        return completed
+
+    @staticmethod
+    def _decode(fragment):
+        try:
+            value = json.loads(fragment)
+        except ValueError:
+            return None
+        return value if isinstance(value, dict) else None
+
+    def result(self):
+        """The complete root object once it has closed, else None"""
+        if self.root_end is None:
+            return None
+        text = ''.join(self.pieces)
+        try:
+            return json.loads(text[self.root_start:self.root_end])
+        except ValueError:
+            return None
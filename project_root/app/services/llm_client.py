@@ -0,0 +1,241 @@
+import os
+import time
+import queue
+import random
+import asyncio
+import threading
+import contextlib
+
+
+def _openai():
+    """The openai package, imported on first use: it costs more than the rest of the app to import"""
+    import openai
+    return openai
+
+
+def retryable_errors():
+    """Errors worth retrying: rate limits, dropped connections, timeouts and 5xx responses"""
+    openai = _openai()
+    return (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+
+class TokenBucket:
+    """Refilling budget of `per_minute` units; acquire() waits until enough units are available"""
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = None
+
+    async def acquire(self, amount=1):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # A single request larger than the whole budget waits for a full bucket
+        amount = min(float(amount), self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class LLMClientManager:
+    """Process-wide async OpenAI client with rate limiting, retries and request accounting
+
+    One AsyncOpenAI client (and its pooled HTTP connections) runs on a private
+    event loop thread. Requests from any thread are admitted through
+    requests-per-minute and tokens-per-minute buckets and a concurrency cap,
+    and retried with jittered exponential backoff on rate limits and transient
+    failures. complete() and stream() are synchronous wrappers so request
+    handlers and job workers can use it directly.
+    """
+    def __init__(self, app=None):
+        self.api_key = None
+        self.base_url = None
+        self.max_retries = 5
+        self.backoff = 1.0
+        self.max_backoff = 30.0
+        self.timeout = 120.0
+        self.max_concurrency = 8
+        self.requests_per_minute = 500
+        self.tokens_per_minute = 150000
+        self.in_flight = 0
+        self.queued = 0
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self._loop = None
+        self._client = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.api_key = app.config.get('OPENAI_API_KEY')
+        self.base_url = app.config.get('OPENAI_BASE_URL')
+        self.max_retries = app.config.get('OPENAI_MAX_RETRIES', self.max_retries)
+        self.timeout = app.config.get('OPENAI_TIMEOUT', self.timeout)
+        self.max_concurrency = app.config.get('OPENAI_MAX_CONCURRENCY', self.max_concurrency)
+        self.requests_per_minute = app.config.get('OPENAI_REQUESTS_PER_MINUTE', self.requests_per_minute)
+        self.tokens_per_minute = app.config.get('OPENAI_TOKENS_PER_MINUTE', self.tokens_per_minute)
+        app.extensions['llm_client'] = self
+
+    def _ensure_started(self):
+        """Start the event loop thread and client on first use (again after a fork)"""
+        with self._start_lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return self._loop
+            import httpx
+            openai = _openai()
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='llm-client-loop', daemon=True).start()
+            self._client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=0,  # Retries are handled here so they respect the rate limiter
+                timeout=self.timeout,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_concurrency,
+                        max_keepalive_connections=self.max_concurrency
+                    ),
+                    timeout=self.timeout
+                )
+            )
+            self._request_bucket = TokenBucket(self.requests_per_minute)
+            self._token_bucket = TokenBucket(self.tokens_per_minute)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+            self._pid = os.getpid()
+            return loop
+
+    def stats(self):
+        """Request counters for this process"""
+        return {
+            'in_flight': self.in_flight,
+            'queued': self.queued,
+            'requests': self.requests,
+            'retries': self.retries,
+            'rate_limited': self.rate_limited
+        }
+
+    @staticmethod
+    def estimate_tokens(messages, max_tokens):
+        """Rough token cost of a request (about 4 characters per token) for the TPM budget"""
+        return sum(len(message['content']) for message in messages) // 4 + max_tokens
+
+    @contextlib.asynccontextmanager
+    async def _slot(self, tokens):
+        """Wait for rate-limit budget and a concurrency slot"""
+        self.queued += 1
+        try:
+            await self._request_bucket.acquire(1)
+            await self._token_bucket.acquire(tokens)
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        self.requests += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def _delay(self, attempt, error):
+        if isinstance(error, _openai().RateLimitError):
+            self.rate_limited += 1
+        self.retries += 1
+        retry_after = None
+        response = getattr(error, 'response', None)
+        if response is not None:
+            retry_after = response.headers.get('retry-after')
+        if retry_after:
+            try:
+                # Capped so one header cannot park a worker for as long as the server likes
+                return min(max(float(retry_after), 0.0), self.max_backoff)
+            except ValueError:
+                pass
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    async def _complete(self, messages, model, temperature, max_tokens):
+        tokens = self.estimate_tokens(messages, max_tokens)
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._slot(tokens):
+                    response = await self._client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    )
+                return response.choices[0].message.content
+            except retryable_errors() as e:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self._delay(attempt, e))
+
+    async def _stream(self, messages, model, temperature, max_tokens, pieces):
+        tokens = self.estimate_tokens(messages, max_tokens)
+        for attempt in range(self.max_retries + 1):
+            started = False
+            try:
+                async with self._slot(tokens):
+                    response = await self._client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        stream=True
+                    )
+                    async for chunk in response:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            started = True
+                            pieces.put(('piece', chunk.choices[0].delta.content))
+                return
+            except retryable_errors() as e:
+                # Once text has been handed out the request cannot be replayed transparently
+                if started or attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self._delay(attempt, e))
+
+    def complete(self, messages, model, temperature, max_tokens=4000):
+        """Return the text of a chat completion; blocks the calling thread"""
+        loop = self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(self._complete(messages, model, temperature, max_tokens), loop)
+        return future.result()
+
+    def stream(self, messages, model, temperature, max_tokens=4000):
+        """Yield completion text as it arrives; blocks the calling thread between pieces"""
+        loop = self._ensure_started()
+        pieces = queue.Queue()
+
+        async def run():
+            try:
+                await self._stream(messages, model, temperature, max_tokens, pieces)
+                pieces.put(('end', None))
+            except Exception as e:
+                pieces.put(('error', e))
+
+        future = asyncio.run_coroutine_threadsafe(run(), loop)
+        try:
+            while True:
+                kind, value = pieces.get()
+                if kind == 'piece':
+                    yield value
+                elif kind == 'error':
+                    raise value
+                else:
+                    return
+        finally:
+            future.cancel()
+
+
+llm_client = LLMClientManager()
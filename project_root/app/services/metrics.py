@@ -0,0 +1,263 @@
+import os
+import time
+import atexit
+import logging
+import sqlite3
+import threading
+import contextlib
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    name TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    le TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (name, labels, le)
+);
+"""
+
+# Latency buckets in seconds, from a cache hit to a slow model call
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Size buckets for characters, pages and task counts
+SIZE_BUCKETS = (1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000, 500000, 1000000, 5000000)
+
+
+def _format_labels(labels):
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """Monotonic count, optionally split by labels"""
+    kind = 'counter'
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def inc(self, amount=1, **labels):
+        self.registry.add(self.name, _format_labels(labels), '', amount)
+
+
+class Histogram:
+    """Distribution of observed values in cumulative buckets, Prometheus style"""
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        label_text = _format_labels(labels)
+        # Stored per bucket; render() accumulates them into Prometheus' cumulative form
+        le = next((_format_value(bound) for bound in self.buckets if value <= bound), '+Inf')
+        self.registry.add(self.name + '_bucket', label_text, le, 1)
+        self.registry.add(self.name + '_sum', label_text, '', value)
+        self.registry.add(self.name + '_count', label_text, '', 1)
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """Observe the duration of the block, in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+class MetricsRegistry:
+    """Counters and histograms shared by every process that uses the same metrics database
+
+    Increments are buffered in memory and added to SQLite rows by a
+    background flusher (and before every scrape), so recording a metric
+    never waits on the disk. Each flush adds to the stored totals with an
+    upsert, which keeps the numbers correct when several worker processes
+    write at once; /metrics reads the combined totals.
+    """
+    def __init__(self, app=None):
+        self.db_path = None
+        self.flush_interval = 1.0
+        self.metrics = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._flusher = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        # The flusher runs outside any app context, so it logs through the app's logger held here
+        self.logger = logging.getLogger(__name__)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        self.db_path = app.config.get('METRICS_PATH') or os.path.join(app.instance_path, 'metrics.sqlite3')
+        self.flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', self.flush_interval)
+        self.logger = app.logger
+        # Connections opened for an earlier app point at its database
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+        app.extensions['metrics'] = self
+        self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        """Start the background flusher in this process (again after a fork, which threads do not survive)"""
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is None:
+                atexit.register(self.flush)
+            else:
+                # Forked child: the parent flushes what it had buffered, and its
+                # lock and SQLite connection are not safe to use here
+                self._pending = {}
+                self._lock = threading.Lock()
+                self._local = threading.local()
+            self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+            self._flusher.start()
+            self._pid = os.getpid()
+
+    @property
+    def enabled(self):
+        return self.db_path is not None
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.metrics.setdefault(name, Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.metrics.setdefault(name, Histogram(self, name, documentation, labelnames, buckets))
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, name, labels, le, amount):
+        if not self.enabled:
+            return
+        if self._pid != os.getpid():
+            self._ensure_flusher()
+        key = (name, labels, le)
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + amount
+
+    def flush(self):
+        """Write buffered increments to the shared database"""
+        if not self.enabled:
+            return
+        if self._pid != os.getpid():
+            self._ensure_flusher()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT INTO metrics (name, labels, le, value) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(name, labels, le) DO UPDATE SET value = value + excluded.value",
+                    [(name, labels, le, amount) for (name, labels, le), amount in pending.items()]
+                )
+        except sqlite3.Error as e:
+            self.logger.warning("Error flushing metrics: %s", e)
+            # Keep the increments for the next attempt
+            with self._lock:
+                for key, amount in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + amount
+
+    def _flush_loop(self):
+        while not self._stopping.wait(self.flush_interval):
+            self.flush()
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        self.flush()
+        rows = {}
+        if self.enabled:
+            for name, labels, le, value in self._connection().execute(
+                "SELECT name, labels, le, value FROM metrics"
+            ):
+                rows.setdefault(name, []).append((labels, le, value))
+
+        lines = []
+        for name in sorted(self.metrics):
+            metric = self.metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            if metric.kind == 'counter':
+                for labels, _, value in sorted(rows.get(name, ())):
+                    lines.append(f"{name}{{{labels}}} {_format_value(value)}" if labels
+                                 else f"{name} {_format_value(value)}")
+                continue
+
+            counts = {}
+            for labels, le, value in rows.get(name + '_bucket', ()):
+                counts.setdefault(labels, {})[le] = value
+            sums = {labels: value for labels, _, value in rows.get(name + '_sum', ())}
+            totals = {labels: value for labels, _, value in rows.get(name + '_count', ())}
+            for labels in sorted(counts):
+                prefix = labels + ',' if labels else ''
+                cumulative = 0
+                for bound in [_format_value(b) for b in metric.buckets] + ['+Inf']:
+                    cumulative += counts[labels].get(bound, 0)
+                    lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {_format_value(cumulative)}')
+                suffix = f"{{{labels}}}" if labels else ''
+                lines.append(f"{name}_sum{suffix} {_format_value(sums.get(labels, 0))}")
+                lines.append(f"{name}_count{suffix} {_format_value(totals.get(labels, 0))}")
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    'upload_stage_seconds', 'Time spent in each stage of the upload pipeline', ['stage']
+)
+DOCUMENT_CHARACTERS = metrics.histogram(
+    'upload_document_characters', 'Characters of text extracted from uploaded documents', buckets=SIZE_BUCKETS
+)
+DOCUMENT_PAGES = metrics.histogram(
+    'upload_document_pages', 'Pages (PDF), paragraphs (DOCX) or 64 KB blocks (text) per upload', buckets=SIZE_BUCKETS
+)
+PLAN_TASKS = metrics.histogram(
+    'upload_plan_tasks', 'Tasks in the validated plan of each upload', buckets=SIZE_BUCKETS
+)
+PLAN_REPAIRS = metrics.counter(
+    'plan_repairs_total', 'Problems repaired in model-produced plans', ['kind']
+)
+CACHE_REQUESTS = metrics.counter(
+    'cache_requests_total', 'Cache lookups by cache and result', ['cache', 'result']
+)
+FALLBACKS = metrics.counter(
+    'fallbacks_total', 'Times a degraded path was used instead of the normal one', ['kind']
+)
+ERRORS = metrics.counter(
+    'errors_total', 'Errors caught and handled, by component', ['component']
+)
+PROJECT_LOAD_SECONDS = metrics.histogram(
+    'project_load_seconds', 'Time to build a project model on a cache miss, by source', ['source']
+)
+UPLOADS = metrics.counter(
+    'uploads_total', 'Upload jobs finished, by outcome', ['status']
+)
@@ -1,27 +1,42 @@
-import os
+import time
 import uuid
 import datetime
-import requests
-import json
 from flask import current_app
-from werkzeug.utils import secure_filename
-from xml.etree import ElementTree as ET
+from app.services.graph_sync import GraphSyncEngine, GRAPH_BASE_URL
+from app.services.project_xml import write_project_xml, parsed_plan
+from app.services.blob_store import blob_store, plan_key
+from app.services.project_cache import project_cache
+from app.services.metrics import STAGE_SECONDS, FALLBACKS, ERRORS
+
+# Microsoft OAuth token endpoint
+TOKEN_URL = "https://login.microsoftonline.com/common/oauth2/v2.0/token"
 
 class MSProjectClient:
     """Client for Microsoft Project integration"""
-    def __init__(self, client_id, client_secret):
+    def __init__(self, client_id, client_secret, base_url=GRAPH_BASE_URL, token_url=TOKEN_URL,
+                 max_workers=4, max_retries=3):
         self.client_id = client_id
         self.client_secret = client_secret
+        self.token_url = token_url
         self.access_token = None
         self.token_expires = datetime.datetime.now()
+        # One pooled session and batch engine is shared by every call this client makes
+        self.sync = GraphSyncEngine(
+            self.get_access_token,
+            base_url=base_url,
+            max_workers=max_workers,
+            max_retries=max_retries
+        )
+    
+    @property
+    def timings(self):
+        """Seconds spent in each sync phase so far"""
+        return self.sync.timings
     
     def get_access_token(self):
         """Get Microsoft Graph API access token"""
         if self.access_token and datetime.datetime.now() < self.token_expires:
             return self.access_token
-            
-        # Microsoft OAuth token endpoint
-        token_url = "https://login.microsoftonline.com/common/oauth2/v2.0/token"
         
         # Request body
         data = {
@@ -32,7 +47,7 @@ class MSProjectClient:
         }
         
         # Make request
-        response = requests.post(token_url, data=data)
+        response = self.sync.session.post(self.token_url, data=data)
         if response.status_code == 200:
             token_data = response.json()
             self.access_token = token_data['access_token']
@@ -45,40 +60,26 @@ class MSProjectClient:
     
     def create_project(self, project_name):
         """Create a new project in Microsoft Project"""
-        token = self.get_access_token()
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
-        
-        # Project creation endpoint
-        api_url = "https://graph.microsoft.com/v1.0/me/drive/root:/Projects"
-        
         # Project data
         data = {
             "name": f"{project_name}.mpp",
             "description": f"Project created by AI assistant on {datetime.datetime.now()}"
         }
         
-        # Make request
-        response = requests.post(f"{api_url}", headers=headers, json=data)
+        with self.sync.phase('create_project'):
+            response = self.sync.post("/me/drive/root:/Projects", data)
         if response.status_code in (200, 201):
             return response.json()
         else:
             raise Exception(f"Failed to create project: {response.text}")
     
     def add_tasks(self, project_id, tasks):
-        """Add tasks to a Microsoft Project file"""
-        token = self.get_access_token()
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
+        """Add tasks to a Microsoft Project file; results line up with tasks, None where a task failed"""
+        api_path = f"/me/drive/items/{project_id}/tasks"
         
-        # Tasks endpoint
-        api_url = f"https://graph.microsoft.com/v1.0/me/drive/items/{project_id}/tasks"
-        
-        results = []
+        batch = []
+        index_of = {task["id"]: index for index, task in enumerate(tasks)}
+        depends_on = []
         for task in tasks:
             # Task data
             task_data = {
@@ -91,77 +92,61 @@ class MSProjectClient:
             if task.get("predecessors"):
                 task_data["predecessors"] = [{"id": pred_id} for pred_id in task["predecessors"]]
             
-            # Make request
-            response = requests.post(api_url, headers=headers, json=task_data)
-            if response.status_code in (200, 201):
-                results.append(response.json())
-            else:
-                print(f"Failed to add task: {response.text}")
+            batch.append((api_path, task_data))
+            depends_on.append([index_of[pred_id] for pred_id in task.get("predecessors") or [] if pred_id in index_of])
         
-        return results
+        # Predecessors are created before the tasks that reference them
+        with self.sync.phase('tasks'):
+            return self.sync.post_many(batch, depends_on)
     
     def add_resources(self, project_id, resources):
-        """Add resources to a Microsoft Project file"""
-        token = self.get_access_token()
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
+        """Add resources to a Microsoft Project file; results line up with resources, None where one failed"""
+        api_path = f"/me/drive/items/{project_id}/resources"
         
-        # Resources endpoint
-        api_url = f"https://graph.microsoft.com/v1.0/me/drive/items/{project_id}/resources"
-        
-        results = []
-        for resource in resources:
-            # Resource data
-            resource_data = {
+        batch = [
+            (api_path, {
                 "name": resource["name"],
                 "capacity": resource.get("capacity", 100) / 100,  # Convert percentage to decimal
-            }
-            
-            # Make request
-            response = requests.post(api_url, headers=headers, json=resource_data)
-            if response.status_code in (200, 201):
-                results.append(response.json())
-            else:
-                print(f"Failed to add resource: {response.text}")
+            })
+            for resource in resources
+        ]
         
-        return results
+        with self.sync.phase('resources'):
+            return self.sync.post_many(batch)
     
     def assign_resources(self, project_id, task_id, resource_id, units=100):
         """Assign a resource to a task"""
-        token = self.get_access_token()
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
-        
-        # Assignment endpoint
-        api_url = f"https://graph.microsoft.com/v1.0/me/drive/items/{project_id}/assignments"
-        
-        # Assignment data
-        assignment_data = {
-            "taskId": task_id,
-            "resourceId": resource_id,
-            "percentWorkComplete": 0,
-            "units": units / 100  # Convert percentage to decimal
-        }
-        
-        # Make request
-        response = requests.post(api_url, headers=headers, json=assignment_data)
-        if response.status_code in (200, 201):
-            return response.json()
-        else:
-            print(f"Failed to assign resource: {response.text}")
-            return None
+        return self.assign_many(project_id, [(task_id, resource_id, units)])[0]
+    
+    def assign_many(self, project_id, assignments):
+        """Create (task_id, resource_id, units) assignments in batches"""
+        api_path = f"/me/drive/items/{project_id}/assignments"
+        
+        batch = [
+            (api_path, {
+                "taskId": task_id,
+                "resourceId": resource_id,
+                "percentWorkComplete": 0,
+                "units": units / 100  # Convert percentage to decimal
+            })
+            for task_id, resource_id, units in assignments
+        ]
+        
+        with self.sync.phase('assignments'):
+            return self.sync.post_many(batch)
 
 def create_project_schedule(project_data, project_name):
     """Create a Microsoft Project schedule from project data"""
+    started = time.perf_counter()
     try:
         # Initialize MS Project client
         client = MSProjectClient(
             client_id=current_app.config['MS_PROJECT_CLIENT_ID'],
-            client_secret=current_app.config['MS_PROJECT_CLIENT_SECRET']
+            client_secret=current_app.config['MS_PROJECT_CLIENT_SECRET'],
+            base_url=current_app.config.get('MS_GRAPH_BASE_URL', GRAPH_BASE_URL),
+            token_url=current_app.config.get('MS_TOKEN_URL', TOKEN_URL),
+            max_workers=current_app.config.get('MS_GRAPH_CONCURRENCY', 4),
+            max_retries=current_app.config.get('MS_GRAPH_MAX_RETRIES', 3)
         )
         
         # Create new project
@@ -171,17 +156,20 @@ def create_project_schedule(project_data, project_name):
         # Add resources
         resource_mapping = {}
         ms_resources = client.add_resources(project_id, project_data["resources"])
-        for i, resource in enumerate(ms_resources):
-            resource_mapping[project_data["resources"][i]["name"]] = resource["id"]
+        for resource, ms_resource in zip(project_data["resources"], ms_resources):
+            if ms_resource:
+                resource_mapping[resource["name"]] = ms_resource["id"]
         
         # Add tasks
         task_mapping = {}
         ms_tasks = client.add_tasks(project_id, project_data["tasks"])
-        for i, task in enumerate(ms_tasks):
-            task_mapping[project_data["tasks"][i]["id"]] = task["id"]
+        for task, ms_task in zip(project_data["tasks"], ms_tasks):
+            if ms_task:
+                task_mapping[task["id"]] = ms_task["id"]
         
         # Assign resources to tasks
-        for i, task in enumerate(project_data["tasks"]):
+        assignments = []
+        for task in project_data["tasks"]:
             ms_task_id = task_mapping.get(task["id"])
             if not ms_task_id:
                 continue
@@ -189,79 +177,55 @@ def create_project_schedule(project_data, project_name):
             for resource_name in task.get("resources", []):
                 ms_resource_id = resource_mapping.get(resource_name)
                 if ms_resource_id:
-                    client.assign_resources(project_id, ms_task_id, ms_resource_id)
+                    assignments.append((ms_task_id, ms_resource_id, 100))
+        client.assign_many(project_id, assignments)
+        
+        for path, status, body in client.sync.failures:
+            current_app.logger.warning("Failed Graph request %s (%s): %s", path, status, body)
+        if client.sync.failures:
+            ERRORS.inc(len(client.sync.failures), component='graph_request')
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage='graph_sync')
+        current_app.logger.info(
+            "MS Project sync timings for %s: %s", project_name,
+            ", ".join(f"{phase}={seconds:.3f}s" for phase, seconds in client.timings.items())
+        )
         
         # In a real application, you would download the generated .mpp file or provide a link
         # For this example, we'll just return a placeholder file path
         return f"generated/{project_name}_{uuid.uuid4()}.mpp"
         
     except Exception as e:
-        print(f"Error creating MS Project schedule: {e}")
+        current_app.logger.exception("Error creating MS Project schedule: %s", e)
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage='graph_sync')
+        ERRORS.inc(component='ms_project')
+        # In on-demand mode the XML is streamed from the stored plan when downloaded
+        if current_app.config.get('PROJECT_XML_ON_DEMAND'):
+            return None
         # Fallback: Generate XML-based schedule file in MPP format
-        return generate_xml_project_file(project_data, project_name)
+        FALLBACKS.inc(kind='xml_file')
+        with STAGE_SECONDS.time(stage='xml_write'):
+            return generate_xml_project_file(project_data, project_name)
 
 
 def generate_xml_project_file(project_data, project_name):
     """Generate an XML file in Microsoft Project-compatible format"""
-    # Create root element
-    root = ET.Element("Project")
-    
-    # Add project information
-    project_info = ET.SubElement(root, "ProjectInfo")
-    ET.SubElement(project_info, "Name").text = project_name
-    ET.SubElement(project_info, "CreationDate").text = datetime.datetime.now().isoformat()
-    
-    # Add tasks
-    tasks = ET.SubElement(root, "Tasks")
-    for task in project_data["tasks"]:
-        task_elem = ET.SubElement(tasks, "Task")
-        ET.SubElement(task_elem, "ID").text = str(task["id"])
-        ET.SubElement(task_elem, "Name").text = task["name"]
-        ET.SubElement(task_elem, "Duration").text = f"{task['duration']}d"
-        
-        if task.get("description"):
-            ET.SubElement(task_elem, "Description").text = task["description"]
-        
-        if task.get("predecessors"):
-            preds = ET.SubElement(task_elem, "Predecessors")
-            for pred_id in task["predecessors"]:
-                pred = ET.SubElement(preds, "Predecessor")
-                ET.SubElement(pred, "ID").text = str(pred_id)
-    
-    # Add resources
-    resources = ET.SubElement(root, "Resources")
-    for resource in project_data["resources"]:
-        res_elem = ET.SubElement(resources, "Resource")
-        ET.SubElement(res_elem, "ID").text = str(resource["id"])
-        ET.SubElement(res_elem, "Name").text = resource["name"]
-        ET.SubElement(res_elem, "Capacity").text = str(resource["capacity"]) + "%"
-    
-    # Add assignments
-    assignments = ET.SubElement(root, "Assignments")
-    for task in project_data["tasks"]:
-        for resource_name in task.get("resources", []):
-            # Find resource ID by name
-            resource_id = None
-            for resource in project_data["resources"]:
-                if resource["name"] == resource_name:
-                    resource_id = resource["id"]
-                    break
-            
-            if resource_id:
-                assignment = ET.SubElement(assignments, "Assignment")
-                ET.SubElement(assignment, "TaskID").text = str(task["id"])
-                ET.SubElement(assignment, "ResourceID").text = str(resource_id)
-    
-    # Create output directory if it doesn't exist
-    output_dir = os.path.join(current_app.instance_path, 'generated')
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Create the file path
-    file_name = f"{project_name.replace(' ', '_')}_{uuid.uuid4()}.xml"
-    file_path = os.path.join(output_dir, file_name)
-    
-    # Write the XML to file
-    tree = ET.ElementTree(root)
-    tree.write(file_path, encoding="utf-8", xml_declaration=True)
-    
-    return file_path
\ No newline at end of file
+    written = []
+
+    def write(path):
+        # The file is shared by every project with this plan, so it records when it was first written
+        creation_date = datetime.datetime.now().isoformat()
+        write_project_xml(project_data, project_name, path, creation_date)
+        written.append(creation_date)
+
+    # Stored by a hash of the plan, so the same plan is only ever written once
+    path = blob_store.put_generated(plan_key(project_data, project_name), '.xml', write)
+    # Web workers map the scheduled snapshot instead of each parsing the XML; a file
+    # written just now is scheduled from the plan in memory rather than read back
+    try:
+        with STAGE_SECONDS.time(stage='snapshot_write'):
+            parsed = parsed_plan(project_data, project_name, written[0]) if written else None
+            project_cache.ensure_snapshot(path, parsed)
+    except Exception as e:
+        current_app.logger.warning("Error writing project snapshot for %s: %s", project_name, e)
+        ERRORS.inc(component='project_snapshot')
+    return path
@@ -0,0 +1,153 @@
+import time
+from flask import current_app
+from app.services.document_parser import extract_document
+from app.services.ai_processor import process_project_overview
+from app.services.plan_validator import validate_plan
+from app.services.ms_project import create_project_schedule
+from app.services.job_queue import job_queue, JobReporter
+from app.services.blob_store import blob_store
+from app.services.near_duplicates import near_duplicates, similar_projects
+from app.services.metrics import (
+    STAGE_SECONDS, DOCUMENT_CHARACTERS, DOCUMENT_PAGES, PLAN_TASKS, PLAN_REPAIRS, UPLOADS
+)
+from app.models.project import Project
+
+# What to do when an upload nearly matches an earlier overview of the same owner
+SIMILAR_CHOICES = ('ask', 'reuse', 'generate')
+
+
+class SimilarOverviewFound(Exception):
+    """Raised instead of calling the model when the uploader asked to choose what to do with a near match"""
+    def __init__(self, matches):
+        super().__init__(f"{len(matches)} similar overviews found")
+        self.matches = matches
+
+
+def reusable_plan(project_id, owner_id):
+    """The current plan of an earlier project of the same owner"""
+    project = Project.get(project_id)
+    if project is None or project.owner_id != owner_id:
+        raise ValueError("The project to reuse was not found")
+    plan, _ = project.load_plan()
+    if plan is None:
+        raise ValueError(f"{project.project_name} has no stored plan to reuse")
+    return plan
+
+
+def run_upload_pipeline(file_path, project_name, owner_id, report=None, similar='generate', reuse_project_id=None):
+    """Turn an uploaded overview into a scheduled project; returns the new project
+
+    similar decides what happens when the overview nearly matches one of the
+    owner's earlier uploads: 'generate' calls the model regardless, 'reuse'
+    takes the closest match's plan instead, and 'ask' raises
+    SimilarOverviewFound so the uploader can choose. reuse_project_id reuses
+    that project's plan without a lookup.
+    """
+    report = report or JobReporter()
+
+    # Extract text from document
+    report(10, 'extracting')
+    extraction = extract_document(file_path)
+    document_text = extraction['text']
+    current_app.logger.info(
+        "Extracted %s (%s pages, %s characters) in %.2fs",
+        file_path, extraction['pages'], extraction['characters'], extraction['seconds']
+    )
+    STAGE_SECONDS.observe(extraction['seconds'], stage='extraction')
+    DOCUMENT_CHARACTERS.observe(extraction['characters'])
+    DOCUMENT_PAGES.observe(extraction['pages'])
+
+    # Near-duplicates of earlier overviews can reuse their plan instead of calling the model
+    with STAGE_SECONDS.time(stage='near_duplicate_lookup'):
+        signature = near_duplicates.signature(document_text)
+        matches = similar_projects(owner_id, signature) if similar != 'generate' and not reuse_project_id else []
+    if matches and similar == 'ask':
+        raise SimilarOverviewFound(matches)
+    if matches:
+        reuse_project_id = matches[0]['project_id']
+        report.timings['similarity'] = matches[0]['similarity']
+
+    if reuse_project_id:
+        report(30, 'reusing an earlier plan')
+        project_data = reusable_plan(reuse_project_id, owner_id)
+        for task in project_data.get('tasks', []):
+            report.event('task', task)
+        report.timings['reused_project_id'] = reuse_project_id
+    else:
+        # Process with AI, forwarding tasks to listeners as the model produces them
+        report(30, 'analyzing')
+        llm_started = time.perf_counter()
+        first_task = {}
+        
+        def on_task(task):
+            if not first_task:
+                first_task['seconds'] = time.perf_counter() - llm_started
+            report.event('task', task)
+        
+        project_data = process_project_overview(document_text, on_task=on_task)
+        llm_seconds = time.perf_counter() - llm_started
+        current_app.logger.info(
+            "AI processing took %.2fs (first task after %s)", llm_seconds,
+            f"{first_task['seconds']:.2f}s" if first_task else "n/a"
+        )
+        report.timings.update(llm_seconds=llm_seconds, first_task_seconds=first_task.get('seconds'))
+        STAGE_SECONDS.observe(llm_seconds, stage='llm')
+        if first_task:
+            STAGE_SECONDS.observe(first_task['seconds'], stage='llm_first_task')
+
+    # Repair what the model got wrong before it reaches the scheduler
+    report(60, 'validating')
+    with STAGE_SECONDS.time(stage='validation'):
+        project_data, repairs = validate_plan(project_data)
+    if repairs.repaired:
+        current_app.logger.warning("Repaired AI plan for %s: %s", file_path, dict(repairs.counts))
+    for kind, count in repairs.counts.items():
+        PLAN_REPAIRS.inc(count, kind=kind)
+    PLAN_TASKS.observe(len(project_data['tasks']))
+    report.timings['repairs'] = dict(repairs.counts)
+
+    # Create Microsoft Project schedule
+    report(70, 'scheduling')
+    with STAGE_SECONDS.time(stage='scheduling'):
+        project_file_path = create_project_schedule(project_data, project_name)
+
+    # Save project info
+    report(95, 'saving')
+    project = Project.create(
+        project_name=project_name,
+        owner_id=owner_id,
+        overview_file=file_path,
+        project_file=project_file_path,
+        task_count=len(project_data.get('tasks', [])),
+        resource_count=len(project_data.get('resources', []))
+    )
+    # Kept so the schedule can be rebuilt or streamed without the generated file
+    project.save_plan(project_data)
+    near_duplicates.add(project.id, owner_id, signature)
+    blob_store.retain(file_path)
+    blob_store.retain(project_file_path)
+    return project
+
+
+@job_queue.handler('upload')
+def upload_job(payload, report):
+    """Job queue entry point for a single uploaded document"""
+    try:
+        with STAGE_SECONDS.time(stage='total'):
+            project = run_upload_pipeline(
+                payload['file_path'],
+                payload['project_name'],
+                payload['owner_id'],
+                report,
+                payload.get('similar', 'generate'),
+                payload.get('reuse_project_id')
+            )
+    except SimilarOverviewFound as found:
+        # Finished without a project: the uploader picks what to do from the job result
+        UPLOADS.inc(status='similar')
+        return {'similar': found.matches}
+    except Exception:
+        UPLOADS.inc(status='failed')
+        raise
+    UPLOADS.inc(status='done')
+    return dict({'project_id': project.id}, **report.timings)
@@ -0,0 +1,309 @@
+import copy
+import sqlite3
+import threading
+from collections import OrderedDict
+from app.services.scheduler import IncrementalSchedule, CycleError
+from app.services.plan_validator import (
+    as_text, as_optional_text, as_duration, as_id, as_list, INVALID, DEFAULT_CAPACITY
+)
+from app.services.blob_store import blob_store
+
+EDIT_OPS = ('add_task', 'update_task', 'remove_task', 'add_dependency', 'remove_dependency')
+# Task fields an update_task edit may change
+EDITABLE_FIELDS = ('name', 'description', 'duration', 'predecessors', 'resources')
+
+
+class PlanEditError(ValueError):
+    """Raised for an edit that names unknown tasks or carries invalid values"""
+
+
+class PlanEditor:
+    """A validated plan open for editing, with its CPM schedule kept current incrementally
+
+    Edits are plain dicts so they can be recorded and replayed:
+
+        {'op': 'add_task', 'task': {'name': ..., 'duration': ..., 'predecessors': [...], ...}}
+        {'op': 'update_task', 'id': 3, 'changes': {'duration': 5, ...}}
+        {'op': 'remove_task', 'id': 3}
+        {'op': 'add_dependency', 'predecessor': 2, 'id': 3}
+        {'op': 'remove_dependency', 'predecessor': 2, 'id': 3}
+
+    apply() checks an edit before changing anything, so a rejected edit
+    leaves the plan as it was, and normalises it in place (add_task gets its
+    id), so the recorded edit replays exactly.
+    """
+    def __init__(self, plan, digest=None, seq=0):
+        self.project_name = plan.get('project_name')
+        self.tasks = {task['id']: task for task in plan.get('tasks', [])}
+        self.resources = plan.get('resources', [])
+        self._resources_by_name = {resource['name'].casefold(): resource for resource in self.resources}
+        self.schedule = IncrementalSchedule(list(self.tasks.values()))
+        self.next_id = max(self.tasks, default=0) + 1
+        self.digest = digest
+        self.seq = seq
+
+    @property
+    def plan(self):
+        return {'project_name': self.project_name, 'tasks': list(self.tasks.values()), 'resources': self.resources}
+
+    @property
+    def version(self):
+        return f"{self.digest}+{self.seq}" if self.seq else self.digest
+
+    def apply(self, edit):
+        """Apply one edit; returns the edited task and the schedule of every task whose dates changed"""
+        if not isinstance(edit, dict):
+            raise PlanEditError("An edit must be an object")
+        if edit.get('op') not in EDIT_OPS:
+            raise PlanEditError(f"Unknown edit operation: {edit.get('op')!r}")
+        task_id, changed = getattr(self, '_' + edit['op'])(edit)
+        result = {
+            'op': edit['op'],
+            'project_duration': self.schedule.project_duration,
+            'changed': [dict(self.schedule.for_task(changed_id), id=changed_id) for changed_id in changed]
+        }
+        if task_id in self.tasks:
+            result['task'] = dict(self.tasks[task_id], **self.schedule.for_task(task_id))
+        return result
+
+    def _task_id(self, value, field='id'):
+        task_id = as_id(value) if value is not None else INVALID
+        if task_id is INVALID or task_id not in self.tasks:
+            raise PlanEditError(f"Unknown task for {field}: {value!r}")
+        return task_id
+
+    def _predecessors(self, value):
+        return list(dict.fromkeys(self._task_id(raw, 'predecessors') for raw in as_list(value)))
+
+    def _resource_names(self, value):
+        """Resource names as declared; names not declared yet come back in the second list"""
+        names = []
+        undeclared = []
+        seen = set()
+        for raw in as_list(value):
+            if isinstance(raw, dict):
+                raw = raw.get('name')
+            name = as_text(raw)
+            if name is INVALID:
+                raise PlanEditError(f"Invalid resource name: {raw!r}")
+            key = name.casefold()
+            if key in seen:
+                continue
+            seen.add(key)
+            resource = self._resources_by_name.get(key)
+            if resource is None:
+                undeclared.append(name)
+            else:
+                name = resource['name']
+            names.append(name)
+        return names, undeclared
+
+    def _declare_resources(self, names):
+        # Named on a task but not declared, as validate_plan handles it: add so assignments have a target
+        next_id = max((resource['id'] for resource in self.resources), default=0) + 1
+        for name in names:
+            resource = {'id': next_id, 'name': name, 'role': None, 'capacity': DEFAULT_CAPACITY}
+            next_id += 1
+            self.resources.append(resource)
+            self._resources_by_name[name.casefold()] = resource
+
+    def _fields(self, raw, names):
+        """Coerce the given fields of raw; raises PlanEditError for any invalid value"""
+        fields = {}
+        for field in names:
+            value = raw.get(field)
+            if field == 'name':
+                value = as_text(value) if value is not None else INVALID
+            elif field == 'description':
+                value = as_optional_text(value) if value is not None else ''
+            elif field == 'duration':
+                value = as_duration(value) if value is not None else INVALID
+            if value is INVALID:
+                raise PlanEditError(f"Invalid {field}: {raw.get(field)!r}")
+            fields[field] = value
+        return fields
+
+    def _add_task(self, edit):
+        raw = edit.get('task')
+        if not isinstance(raw, dict):
+            raise PlanEditError("add_task needs a task object")
+        if raw.get('duration') is None:
+            raw = dict(raw, duration=1)
+        task = self._fields(raw, ('name', 'description', 'duration'))
+        task_id = as_id(raw['id']) if raw.get('id') is not None else self.next_id
+        if task_id is INVALID or task_id in self.tasks:
+            raise PlanEditError(f"Invalid or duplicate task id: {raw.get('id')!r}")
+        predecessors = self._predecessors(raw.get('predecessors'))
+        resources, undeclared = self._resource_names(raw.get('resources'))
+
+        changed = self.schedule.add_task(task_id, task['duration'], predecessors)
+        self._declare_resources(undeclared)
+        task = dict({'id': task_id}, **task, predecessors=predecessors, resources=resources)
+        self.tasks[task_id] = task
+        self.next_id = max(self.next_id, task_id + 1)
+        edit['task'] = copy.deepcopy(task)
+        return task_id, changed
+
+    def _update_task(self, edit):
+        task_id = self._task_id(edit.get('id'))
+        changes = edit.get('changes')
+        if not isinstance(changes, dict) or not changes:
+            raise PlanEditError("update_task needs a changes object")
+        unknown = set(changes) - set(EDITABLE_FIELDS)
+        if unknown:
+            raise PlanEditError(f"Fields cannot be edited: {', '.join(sorted(unknown))}")
+        task = self.tasks[task_id]
+        values = self._fields(changes, [field for field in ('name', 'description', 'duration') if field in changes])
+        undeclared = []
+        if 'resources' in changes:
+            values['resources'], undeclared = self._resource_names(changes['resources'])
+
+        changed = set()
+        if 'predecessors' in changes:
+            predecessors = self._predecessors(changes['predecessors'])
+            if task_id in predecessors:
+                raise CycleError([task_id])
+            changed.update(self._replace_predecessors(task_id, task['predecessors'], predecessors))
+            values['predecessors'] = predecessors
+        if 'duration' in values:
+            changed.update(self.schedule.set_duration(task_id, values['duration']))
+
+        self._declare_resources(undeclared)
+        task.update(values)
+        edit['id'] = task_id
+        edit['changes'] = copy.deepcopy(values)
+        return task_id, changed
+
+    def _replace_predecessors(self, task_id, old, new):
+        """Swap the dependency edges of task_id, undoing them all if one would close a cycle"""
+        removed = [pred for pred in old if pred not in new]
+        added = [pred for pred in new if pred not in old]
+        changed = set()
+        for pred in removed:
+            changed.update(self.schedule.remove_dependency(pred, task_id))
+        done = []
+        try:
+            for pred in added:
+                changed.update(self.schedule.add_dependency(pred, task_id))
+                done.append(pred)
+        except CycleError:
+            for pred in done:
+                self.schedule.remove_dependency(pred, task_id)
+            for pred in removed:
+                self.schedule.add_dependency(pred, task_id)
+            raise
+        return changed
+
+    def _remove_task(self, edit):
+        task_id = self._task_id(edit.get('id'))
+        for successor in self.schedule.successors(task_id):
+            self.tasks[successor]['predecessors'].remove(task_id)
+        changed = self.schedule.remove_task(task_id)
+        del self.tasks[task_id]
+        edit['id'] = task_id
+        return task_id, changed
+
+    def _add_dependency(self, edit):
+        task_id = self._task_id(edit.get('id'))
+        predecessor = self._task_id(edit.get('predecessor'), 'predecessor')
+        changed = self.schedule.add_dependency(predecessor, task_id)
+        predecessors = self.tasks[task_id]['predecessors']
+        if predecessor not in predecessors:
+            predecessors.append(predecessor)
+        edit['id'], edit['predecessor'] = task_id, predecessor
+        return task_id, changed
+
+    def _remove_dependency(self, edit):
+        task_id = self._task_id(edit.get('id'))
+        predecessor = self._task_id(edit.get('predecessor'), 'predecessor')
+        predecessors = self.tasks[task_id]['predecessors']
+        if predecessor not in predecessors:
+            raise PlanEditError(f"Task {task_id} does not depend on task {predecessor}")
+        changed = self.schedule.remove_dependency(predecessor, task_id)
+        predecessors.remove(predecessor)
+        edit['id'], edit['predecessor'] = task_id, predecessor
+        return task_id, changed
+
+
+class PlanEditorCache:
+    """Open PlanEditors by project, kept in step with the edits recorded in storage
+
+    Each edit is applied in memory and appended to the project's plan_edits
+    rows, so an edit costs an incremental reschedule and one small insert
+    rather than rewriting the plan. Every PLAN_EDIT_COMPACT_AFTER edits the
+    current plan is saved whole and the recorded edits are dropped. Another
+    process that recorded an edit first makes the insert fail; the editor is
+    then reloaded from storage and the edit applied again.
+    """
+    def __init__(self, app=None):
+        self.max_entries = 8
+        self.compact_after = 500
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('PLAN_EDITOR_CACHE_ENTRIES', self.max_entries)
+        self.compact_after = app.config.get('PLAN_EDIT_COMPACT_AFTER', self.compact_after)
+        app.extensions['plan_editors'] = self
+
+    def _open(self, project):
+        """Editor holding the project's current plan (caller holds the lock)"""
+        digest, seq = project.plan_state()
+        if digest is None:
+            raise PlanEditError("This project has no stored plan to edit")
+        editor = self._entries.get(project.id)
+        if editor is None or editor.digest != digest or editor.seq > seq:
+            plan, digest = project.load_plan(apply_edits=False)
+            editor = PlanEditor(plan, digest)
+        if editor.seq < seq:
+            for edit_seq, edit in project.plan_edits(after=editor.seq):
+                editor.apply(edit)
+                editor.seq = edit_seq
+        self._entries[project.id] = editor
+        self._entries.move_to_end(project.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return editor
+
+    def edit(self, project, edit, attempts=3):
+        """Apply an edit to the project's plan and record it; returns PlanEditor.apply's result"""
+        with self._lock:
+            for _ in range(attempts):
+                editor = self._open(project)
+                recorded = copy.deepcopy(edit)
+                result = editor.apply(recorded)
+                try:
+                    project.record_plan_edit(editor.seq + 1, recorded)
+                except sqlite3.IntegrityError:
+                    # Another process recorded an edit first: start again from storage
+                    self._entries.pop(project.id, None)
+                    continue
+                except Exception:
+                    # The cached editor holds an edit storage never got; reload it next time
+                    self._entries.pop(project.id, None)
+                    raise
+                editor.seq += 1
+                break
+            else:
+                raise PlanEditError("The plan is being edited elsewhere; try again")
+
+            if editor.seq >= self.compact_after:
+                digest = project.save_plan(editor.plan, expected_seq=editor.seq)
+                if digest is not None:
+                    editor.digest, editor.seq = digest, 0
+
+        # The generated file shows the plan before this edit; downloads now stream from the plan
+        stale_file = project.project_file
+        fields = {'task_count': len(editor.tasks), 'resource_count': len(editor.resources)}
+        if stale_file:
+            fields['project_file'] = None
+        project.update(**fields)
+        if stale_file:
+            blob_store.release(stale_file)
+        result['version'] = editor.version
+        return result
+
+
+plan_editors = PlanEditorCache()
@@ -0,0 +1,422 @@
+import gc
+import re
+import math
+import contextlib
+from collections import Counter
+
+# Leading number in values like "5", "5.5" or "5 days"
+_NUMBER = re.compile(r'\s*(-?\d+(?:\.\d+)?)')
+# Returned by the as_* coercers, shared with the plan editor and chunk merger, for unusable values
+INVALID = object()
+DEFAULT_PROJECT_NAME = "Extracted Project"
+DEFAULT_CAPACITY = 100
+# Issues kept verbatim in the report; the counts always cover all of them
+MAX_REPORTED_ISSUES = 200
+
+
+def as_text(value):
+    if type(value) is str:
+        return value.strip() or INVALID
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return INVALID
+
+
+def as_optional_text(value):
+    if type(value) is str:
+        return value.strip()
+    return as_text(value)
+
+
+def _as_number(value):
+    # Exact type checks first: almost every value is already a plain int
+    if type(value) is int:
+        return value
+    if isinstance(value, bool):
+        return INVALID
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        return value if math.isfinite(value) else INVALID
+    if isinstance(value, str):
+        match = _NUMBER.match(value)
+        if match:
+            return float(match.group(1))
+    return INVALID
+
+
+def as_duration(value):
+    """Whole days, rounding fractions up; zero marks a milestone"""
+    if type(value) is int and value >= 0:
+        return value
+    number = _as_number(value)
+    if number is INVALID or number < 0:
+        return INVALID
+    return int(math.ceil(number))
+
+
+def _as_capacity(value):
+    number = _as_number(value)
+    if number is INVALID or number <= 0:
+        return INVALID
+    return int(math.ceil(number))
+
+
+def as_id(value):
+    """Positive integer id, accepting integral floats and digit strings"""
+    if type(value) is int and value > 0:
+        return value
+    number = _as_number(value)
+    if number is INVALID or number != int(number) or number <= 0:
+        return INVALID
+    return int(number)
+
+
+def as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return value
+    # A single value where a list was expected
+    return [value]
+
+
+def compile_schema(fields):
+    """Build a coercer for (field, coerce, default, required) specs
+
+    The returned function copies each field of obj through its coercer into
+    out and calls on_invalid(position, field, value) when it has to fall back
+    to the default. Optional fields that are simply missing take their
+    default silently.
+    """
+    specs = tuple(fields)
+
+    def coerce_object(obj, out, on_invalid, position):
+        for field, coerce, default, required in specs:
+            value = obj.get(field)
+            coerced = coerce(value) if value is not None else INVALID
+            if coerced is INVALID:
+                if value is not None or required:
+                    on_invalid(position, field, value)
+                coerced = default
+            out[field] = coerced
+        return out
+
+    return coerce_object
+
+
+_coerce_task = compile_schema([
+    ('name', as_text, None, True),
+    ('description', as_optional_text, '', False),
+    ('duration', as_duration, 1, True),
+])
+
+_coerce_resource = compile_schema([
+    ('name', as_text, None, True),
+    ('role', as_optional_text, None, False),
+    ('capacity', _as_capacity, DEFAULT_CAPACITY, False),
+])
+
+
+class RepairReport:
+    """Problems found in a plan and what was done about each"""
+    def __init__(self):
+        self.counts = Counter()
+        self.issues = []
+
+    def add(self, kind, **detail):
+        self.counts[kind] += 1
+        if len(self.issues) < MAX_REPORTED_ISSUES:
+            detail['kind'] = kind
+            self.issues.append(detail)
+
+    @property
+    def repaired(self):
+        return bool(self.counts)
+
+    def to_dict(self):
+        return {
+            'repaired': self.repaired,
+            'counts': dict(self.counts),
+            'issues': list(self.issues)
+        }
+
+    def __repr__(self):
+        return f"<RepairReport {dict(self.counts)}>"
+
+
+@contextlib.contextmanager
+def _gc_paused():
+    """Hold off the cyclic collector, which would rescan the growing plan every few hundred allocations"""
+    if not gc.isenabled():
+        yield
+        return
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+
+
+def validate_plan(project_data):
+    """Normalize a model-produced plan and repair what would break scheduling
+
+    Returns (plan, report). The plan has unique positive integer task and
+    resource ids, integer durations and capacities, predecessors that name
+    existing tasks with no self-references, duplicates or cycles, and every
+    resource a task names present in the resources list. Runs in
+    O(tasks + dependencies + resources) with the garbage collector paused,
+    at several microseconds a task: milliseconds for plans of a few
+    thousand tasks, but a few hundred for 50k, which
+    benchmarks/bench_validator.py holds to BUDGET_50K.
+    """
+    with _gc_paused():
+        return _validate_plan(project_data)
+
+
+def _validate_plan(project_data):
+    report = RepairReport()
+    if not isinstance(project_data, dict):
+        report.add('invalid_plan', value=type(project_data).__name__)
+        project_data = {}
+
+    project_name = as_text(project_data.get('project_name'))
+    if project_name is INVALID:
+        report.add('invalid_project_name')
+        project_name = DEFAULT_PROJECT_NAME
+
+    resources, resources_by_name = _validate_resources(project_data.get('resources'), report)
+    tasks, links = _validate_tasks(project_data.get('tasks'), resources, resources_by_name, report)
+    _break_cycles(tasks, links, report)
+
+    return {
+        'project_name': project_name,
+        'tasks': tasks,
+        'resources': resources
+    }, report
+
+
+def _validate_resources(raw_resources, report):
+    resources = []
+    by_name = {}
+    taken = set()
+    pending = []
+
+    def on_invalid(position, field, value):
+        report.add('invalid_resource_field', position=position, field=field, value=repr(value)[:80])
+
+    for position, raw in enumerate(as_list(raw_resources)):
+        if isinstance(raw, str):
+            raw = {'name': raw}
+        elif not isinstance(raw, dict):
+            report.add('invalid_resource', position=position)
+            continue
+        resource = _coerce_resource(raw, {'id': None}, on_invalid, position)
+        if resource['name'] is None:
+            continue
+        key = resource['name'].casefold()
+        existing = by_name.get(key)
+        if existing is not None:
+            report.add('duplicate_resource', name=resource['name'])
+            existing['capacity'] = max(existing['capacity'], resource['capacity'])
+            continue
+
+        resource_id = as_id(raw.get('id'))
+        if resource_id is INVALID or resource_id in taken:
+            pending.append(resource)
+        else:
+            resource['id'] = resource_id
+            taken.add(resource_id)
+        by_name[key] = resource
+        resources.append(resource)
+
+    _assign_ids(pending, taken, report, 'resource')
+    return resources, by_name
+
+
+def _assign_ids(items, taken, report, kind):
+    """Give items without a usable id the next ids above every id already taken"""
+    next_id = max(taken, default=0) + 1
+    for item in items:
+        item['id'] = next_id
+        taken.add(next_id)
+        report.add(f'reassigned_{kind}_id', name=item['name'], id=next_id)
+        next_id += 1
+
+
+def _validate_tasks(raw_tasks, resources, resources_by_name, report):
+    """Return (tasks, links), where links[i] lists the positions of tasks[i]'s predecessors"""
+    tasks = []
+    raw_links = []
+    # Interned ids to task positions: integer ids, plus the literal spelling of non-integer ones ("T9")
+    by_id = {}
+    by_text = {}
+    taken = set()
+    pending = []
+
+    def on_invalid(position, field, value):
+        report.add('invalid_task_field', position=position, field=field, value=repr(value)[:80])
+
+    for position, raw in enumerate(as_list(raw_tasks)):
+        if not isinstance(raw, dict):
+            report.add('invalid_task', position=position)
+            continue
+        task = _coerce_task(raw, {'id': None}, on_invalid, position)
+        raw_id = raw.get('id')
+        task_id = as_id(raw_id)
+        if task_id is INVALID:
+            pending.append(task)
+        elif task_id in taken:
+            report.add('duplicate_task_id', position=position, id=task_id)
+            pending.append(task)
+        else:
+            task['id'] = task_id
+            taken.add(task_id)
+        # Predecessors refer to the first task that used an id, however it was spelled
+        if task_id is not INVALID:
+            by_id.setdefault(task_id, len(tasks))
+        if type(raw_id) is str:
+            by_text.setdefault(raw_id.strip(), len(tasks))
+        tasks.append(task)
+        raw_links.append((raw.get('predecessors'), raw.get('resources')))
+
+    _assign_ids(pending, taken, report, 'task')
+
+    next_resource_id = [max((resource['id'] for resource in resources), default=0) + 1]
+    # Resource name each raw string has already resolved to; most tasks repeat a few names
+    known_names = {}
+
+    def add_resource(name):
+        resource = {'id': next_resource_id[0], 'name': name, 'role': None, 'capacity': DEFAULT_CAPACITY}
+        next_resource_id[0] += 1
+        resources.append(resource)
+        return resource
+
+    links = []
+    for task, (raw_predecessors, raw_resources) in zip(tasks, raw_links):
+        if task['name'] is None:
+            task['name'] = f"Task {task['id']}"
+        if raw_predecessors:
+            task['predecessors'], positions = _resolve_predecessors(
+                task, raw_predecessors, tasks, by_id, by_text, report
+            )
+        else:
+            task['predecessors'], positions = [], ()
+        links.append(positions)
+        task['resources'] = (
+            _resolve_resources(task, raw_resources, resources_by_name, known_names, add_resource, report)
+            if raw_resources else []
+        )
+    return tasks, links
+
+
+def _resolve_predecessors(task, raw_predecessors, tasks, by_id, by_text, report):
+    resolved = []
+    positions = []
+    task_id = task['id']
+    for raw in as_list(raw_predecessors):
+        if type(raw) is int:
+            position = by_id.get(raw)
+        elif type(raw) is str:
+            position = by_text.get(raw.strip())
+            if position is None:
+                predecessor_id = as_id(raw)
+                position = by_id.get(predecessor_id) if predecessor_id is not INVALID else None
+        else:
+            predecessor_id = as_id(raw)
+            position = by_id.get(predecessor_id) if predecessor_id is not INVALID else None
+        if position is None:
+            report.add('dangling_predecessor', task=task_id, predecessor=repr(raw)[:80])
+            continue
+        predecessor_id = tasks[position]['id']
+        if predecessor_id == task_id:
+            report.add('self_dependency', task=task_id)
+        elif position in positions:
+            # Lists are a handful of ids long, so a scan beats building a set
+            report.add('duplicate_predecessor', task=task_id, predecessor=predecessor_id)
+        else:
+            resolved.append(predecessor_id)
+            positions.append(position)
+    return resolved, positions
+
+
+def _resolve_resources(task, raw_resources, resources_by_name, known_names, add_resource, report):
+    names = []
+    for raw in as_list(raw_resources):
+        name = known_names.get(raw) if type(raw) is str else None
+        if name is None:
+            spelling = raw
+            if isinstance(raw, dict):
+                raw = raw.get('name')
+            name = as_text(raw)
+            if name is INVALID:
+                report.add('invalid_task_resource', task=task['id'], value=repr(raw)[:80])
+                continue
+            key = name.casefold()
+            resource = resources_by_name.get(key)
+            if resource is None:
+                # Named on a task but never declared: add it so assignments have a target
+                resource = resources_by_name[key] = add_resource(name)
+                report.add('undeclared_resource', task=task['id'], name=name)
+            name = resource['name']
+            if type(spelling) is str:
+                known_names[spelling] = name
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def _break_cycles(tasks, links, report):
+    """Drop the dependencies that close cycles, leaving every other edge in place
+
+    links[v] holds the positions of v's predecessors. Kahn's algorithm, run
+    backwards from the tasks nothing depends on, peels off every task that is
+    not on or ahead of a cycle; an iterative depth-first search over what
+    remains then removes each back edge it meets, which leaves the remaining
+    graph acyclic.
+    """
+    n = len(tasks)
+    outdegree = [0] * n
+    for positions in links:
+        for p in positions:
+            outdegree[p] += 1
+
+    ready = [v for v in range(n) if not outdegree[v]]
+    while ready:
+        v = ready.pop()
+        for p in links[v]:
+            outdegree[p] -= 1
+            if not outdegree[p]:
+                ready.append(p)
+    remaining = [v for v in range(n) if outdegree[v]]
+    if not remaining:
+        return
+
+    # 0 = unvisited, 1 = on the current DFS path, 2 = finished
+    state = [0] * n
+    removed = set()
+    for root in remaining:
+        if state[root]:
+            continue
+        state[root] = 1
+        stack = [(root, iter(links[root]))]
+        while stack:
+            v, children = stack[-1]
+            for p in children:
+                if not outdegree[p]:
+                    continue
+                if state[p] == 1:
+                    removed.add((v, p))
+                elif state[p] == 0:
+                    state[p] = 1
+                    stack.append((p, iter(links[p])))
+                    break
+            else:
+                state[v] = 2
+                stack.pop()
+
+    for v, p in removed:
+        task = tasks[v]
+        predecessor_id = tasks[p]['id']
+        task['predecessors'].remove(predecessor_id)
+        report.add('cycle_broken', task=task['id'], predecessor=predecessor_id)
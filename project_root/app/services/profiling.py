@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+import uuid
+import cProfile
+import functools
+import threading
+from collections import Counter
+
+# Seconds between stack samples in sampling mode
+SAMPLE_INTERVAL = 0.005
+
+
+class StackSampler:
+    """Samples one thread's call stack on a timer; cheap enough to leave on for slow routes
+
+    Stacks are kept in the collapsed "frame;frame;frame count" format that
+    flamegraph.pl and speedscope read.
+    """
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as out:
+            for stack, count in self.stacks.most_common():
+                out.write(f"{stack} {count}\n")
+
+
+class RequestProfiler:
+    """Opt-in profiling of selected view functions
+
+    PROFILE_ENDPOINTS lists endpoint names (such as ``projects.download``,
+    or ``*`` for every route). Each request to one of them writes a cProfile
+    ``.prof`` file, or a collapsed-stack ``.folded`` file when PROFILE_MODE
+    is ``sampling``, to PROFILE_DIR. Work done by streamed response bodies
+    after the view returns is not included.
+    """
+    def __init__(self, app=None):
+        self.output_dir = None
+        self.mode = 'cprofile'
+        self.endpoints = set()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Wrap the configured views; call after every blueprint has been registered"""
+        self.endpoints = {name.strip() for name in app.config.get('PROFILE_ENDPOINTS', '').split(',') if name.strip()}
+        if not self.endpoints:
+            return
+        self.mode = app.config.get('PROFILE_MODE', self.mode)
+        self.output_dir = app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+        os.makedirs(self.output_dir, exist_ok=True)
+        for endpoint, view in list(app.view_functions.items()):
+            if endpoint in self.endpoints or ('*' in self.endpoints and endpoint != 'static'):
+                app.view_functions[endpoint] = self.wrap(endpoint, view)
+        app.extensions['profiler'] = self
+
+    def _output_path(self, endpoint, extension):
+        name = f"{endpoint}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}{extension}"
+        return os.path.join(self.output_dir, name)
+
+    def wrap(self, endpoint, view):
+        @functools.wraps(view)
+        def profiled(*args, **kwargs):
+            if self.mode == 'sampling':
+                sampler = StackSampler(threading.get_ident())
+                sampler.start()
+                try:
+                    return view(*args, **kwargs)
+                finally:
+                    sampler.stop()
+                    sampler.dump(self._output_path(endpoint, '.folded'))
+
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                profile.disable()
+                profile.dump_stats(self._output_path(endpoint, '.prof'))
+        return profiled
+
+
+profiler = RequestProfiler()
@@ -0,0 +1,243 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from flask import current_app
+from app.services.project_xml import parse_project_file
+from app.services.scheduler import level_resources
+from app.services.project_snapshot import snapshot_path, read_snapshot, write_snapshot
+from app.models.task_store import TaskStore
+from app.services.metrics import CACHE_REQUESTS, PROJECT_LOAD_SECONDS, ERRORS
+
+
+class ProjectModel:
+    """A parsed and CPM-scheduled project file, with its tasks held in a compact TaskStore"""
+    def __init__(self, project_name, created_at, store, total_duration=None, critical_path=None):
+        self.project_name = project_name
+        self.created_at = created_at
+        self.tasks = store
+        self.resources = self.tasks.resources
+        if total_duration is None:
+            schedule = self.tasks.schedule()
+            total_duration, critical_path = schedule.project_duration, schedule.critical_path
+        self.total_duration = total_duration
+        self.critical_path = critical_path
+        self._leveling = None
+        self._lock = threading.Lock()
+        self.size = self.tasks.nbytes()
+
+    @classmethod
+    def from_file(cls, path):
+        return cls.from_parsed(parse_project_file(path))
+
+    @classmethod
+    def from_parsed(cls, data):
+        """Model over a dict shaped like parse_project_file's result"""
+        return cls(data['project_name'], data['created_at'], TaskStore.from_dicts(data['tasks'], data['resources']))
+
+    @classmethod
+    def from_plan(cls, plan, project_name, created_at):
+        return cls(project_name, created_at, TaskStore.from_dicts(plan['tasks'], plan['resources']))
+
+    @classmethod
+    def from_snapshot(cls, path):
+        """Model over a memory-mapped snapshot; also returns the snapshot's meta dict"""
+        meta, store = read_snapshot(path)
+        model = cls(meta['project_name'], meta['created_at'], store, meta['total_duration'], meta['critical_path'])
+        return model, meta
+
+    def save_snapshot(self, path, source_version):
+        """Write this model as a snapshot of the project file whose (mtime_ns, size) is source_version"""
+        write_snapshot(path, self.tasks, self.critical_path, {
+            'project_name': self.project_name,
+            'created_at': self.created_at,
+            'total_duration': self.total_duration,
+            'source_version': list(source_version)
+        })
+
+    def leveling(self):
+        """Resource-leveled schedule, computed on first use"""
+        with self._lock:
+            if self._leveling is None:
+                self._leveling = level_resources(self.tasks, self.resources, self.tasks.schedule())
+                self.tasks.apply_leveling(self._leveling)
+                self.size = self.tasks.nbytes()
+            return self._leveling
+
+
+class ProjectModelCache:
+    """LRU cache of ProjectModels keyed by file path and modification time
+
+    A project file has a binary snapshot of its scheduled model beside it
+    (see project_snapshot). A miss maps the snapshot when it matches the
+    file's version, so every worker shares one copy of the columns in the
+    page cache; otherwise the XML is parsed and the snapshot rewritten.
+    """
+    def __init__(self, app=None):
+        self.max_entries = 128
+        self.max_bytes = 256 * 1024 * 1024
+        self.revalidate_after = 2.0
+        self.snapshots = True
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('PROJECT_CACHE_MAX_ENTRIES', self.max_entries)
+        self.max_bytes = app.config.get('PROJECT_CACHE_MAX_BYTES', self.max_bytes)
+        self.revalidate_after = app.config.get('PROJECT_CACHE_REVALIDATE', self.revalidate_after)
+        self.snapshots = app.config.get('PROJECT_SNAPSHOTS', self.snapshots)
+        app.extensions['project_cache'] = self
+
+    def get(self, path):
+        """Return the model for path, parsing the file only if it is new or has changed
+
+        A cached entry is trusted without a stat() call for ``revalidate_after``
+        seconds, so repeat views within that window do not touch the disk.
+        """
+        path = os.path.abspath(path)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and now - entry['checked_at'] < self.revalidate_after:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                CACHE_REQUESTS.inc(cache='project', result='hit')
+                return entry['model']
+
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry['version'] == version:
+                entry['checked_at'] = now
+                self._entries.move_to_end(path)
+                self.hits += 1
+                CACHE_REQUESTS.inc(cache='project', result='hit')
+                return entry['model']
+            self.misses += 1
+            CACHE_REQUESTS.inc(cache='project', result='miss')
+
+        model = self.load(path, version)
+        self._insert(path, version, model, now)
+        return model
+
+    def load(self, path, version):
+        """Model for the project file at path, from its snapshot if that is current, else from the XML"""
+        started = time.perf_counter()
+        snapshot = snapshot_path(path)
+        if self.snapshots and os.path.exists(snapshot):
+            try:
+                model, meta = ProjectModel.from_snapshot(snapshot)
+                if tuple(meta['source_version']) == version:
+                    PROJECT_LOAD_SECONDS.observe(time.perf_counter() - started, source='snapshot')
+                    return model
+            except (OSError, ValueError, KeyError) as e:
+                current_app.logger.warning("Ignoring unreadable project snapshot %s: %s", snapshot, e)
+                ERRORS.inc(component='project_snapshot')
+
+        model = ProjectModel.from_file(path)
+        PROJECT_LOAD_SECONDS.observe(time.perf_counter() - started, source='xml')
+        if self.snapshots:
+            self._save_snapshot(model, snapshot, version)
+        return model
+
+    def ensure_snapshot(self, path, parsed=None):
+        """Write the snapshot for a newly generated project file unless a current one exists
+
+        parsed is the file's content as parse_project_file would return it
+        (see project_xml.parsed_plan), given by the code that just wrote the
+        file so the model is built from memory instead of parsing the XML.
+        """
+        if not self.snapshots:
+            return
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        snapshot = snapshot_path(path)
+        if parsed is not None:
+            self._save_snapshot(ProjectModel.from_parsed(parsed), snapshot, version)
+            return
+        if os.path.exists(snapshot):
+            try:
+                _, meta = ProjectModel.from_snapshot(snapshot)
+                if tuple(meta['source_version']) == version:
+                    return
+            except (OSError, ValueError, KeyError):
+                pass
+        self._save_snapshot(ProjectModel.from_file(path), snapshot, version)
+
+    @staticmethod
+    def _save_snapshot(model, snapshot, version):
+        # Only an optimisation: a failure leaves the next miss to parse the XML again
+        try:
+            model.save_snapshot(snapshot, version)
+        except (OSError, ValueError) as e:
+            current_app.logger.warning("Error writing project snapshot %s: %s", snapshot, e)
+            ERRORS.inc(component='project_snapshot')
+
+    def get_plan(self, key, digest, load):
+        """Return the model cached under key for this plan digest, calling load() to build it on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['version'] == digest:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                CACHE_REQUESTS.inc(cache='project', result='hit')
+                return entry['model']
+            self.misses += 1
+            CACHE_REQUESTS.inc(cache='project', result='miss')
+        started = time.perf_counter()
+        model = load()
+        PROJECT_LOAD_SECONDS.observe(time.perf_counter() - started, source='plan')
+        self._insert(key, digest, model, time.monotonic())
+        return model
+
+    def _insert(self, key, version, model, now):
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = {'model': model, 'version': version, 'checked_at': now}
+            self._bytes += model.size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self, path):
+        with self._lock:
+            self._discard(os.path.abspath(path))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _discard(self, path):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._bytes -= entry['model'].size
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'bytes': self._bytes}
+
+
+project_cache = ProjectModelCache()
+
+
+def has_project_file(project):
+    return bool(project.project_file) and os.path.exists(project.project_file)
+
+
+def load_project_model(project):
+    """Scheduled model for a project, from its generated file or else its stored plan"""
+    if has_project_file(project):
+        return project_cache.get(project.project_file)
+    digest = project.plan_digest()
+    if digest is None:
+        raise FileNotFoundError('Project file not found')
+    return project_cache.get_plan(
+        f"plan:{project.id}", digest,
+        lambda: ProjectModel.from_plan(project.load_plan()[0], project.project_name, project.created_at.isoformat())
+    )
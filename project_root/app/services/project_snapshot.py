@@ -0,0 +1,158 @@
+import os
+import sys
+import json
+import mmap
+import uuid
+import struct
+from array import array
+from app.models.task_store import TaskStore
+
+MAGIC = b'PRJSNAP1'
+FORMAT_VERSION = 2
+SUFFIX = '.snap'
+# Magic, format version, length of the JSON header that follows
+_PREAMBLE = struct.Struct('<8sII')
+# Integer columns, all stored as native int64 in this order
+_INT_COLUMNS = ('ids', 'durations', 'pred_start', 'pred_ids', 'res_start', 'res_index',
+                'early_start', 'early_finish', 'late_start', 'late_finish')
+
+
+class SnapshotError(ValueError):
+    """Raised for a file that is not a snapshot this build can read"""
+
+
+class StringTable:
+    """Read-only list of strings decoded on access from UTF-8 bytes and int64 offsets"""
+    __slots__ = ('data', 'offsets')
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def snapshot_path(source_path):
+    """Where the snapshot of a generated project file lives: next to it"""
+    return source_path + SUFFIX
+
+
+def _string_section(strings):
+    offsets = array('q', [0])
+    chunks = []
+    size = 0
+    for text in strings:
+        encoded = (text or '').encode('utf-8')
+        chunks.append(encoded)
+        size += len(encoded)
+        offsets.append(size)
+    return offsets, b''.join(chunks)
+
+
+def write_snapshot(path, store, critical_path, meta):
+    """Write a scheduled TaskStore, its critical path and the JSON-able meta dict to path, atomically
+
+    Sections are 8-byte aligned so every integer column can be mapped as an
+    int64 view without copying. The file is written beside path and renamed
+    into place, so a reader in another process sees the old file or the
+    whole new one.
+    """
+    if store.early_start is None:
+        raise SnapshotError("The store has not been scheduled")
+    sections = [(name, array('q', getattr(store, name)).tobytes()) for name in _INT_COLUMNS]
+    string_columns = [('names', store.names), ('descriptions', store.descriptions)]
+    if store.id_table is None:
+        critical_codes = critical_path
+    else:
+        # String ids are written once, in the id table the id columns index
+        codes = {task_id: code for code, task_id in enumerate(store.id_table)}
+        critical_codes = [codes[task_id] for task_id in critical_path]
+        string_columns.append(('id_table', store.id_table))
+    sections.append(('critical_path', array('q', critical_codes).tobytes()))
+    for name, strings in string_columns:
+        offsets, data = _string_section(strings)
+        sections.append((name + '_offsets', offsets.tobytes()))
+        sections.append((name, data))
+
+    layout = {}
+    offset = 0
+    for name, data in sections:
+        layout[name] = [offset, len(data)]
+        offset += len(data) + (-len(data) % 8)
+    header = dict(meta, id_type='str' if store.id_type is str else 'int', byteorder=sys.byteorder,
+                  count=len(store), resource_names=list(store.resource_names), resources=store.resources,
+                  sections=layout)
+    encoded = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    encoded += b' ' * (-(_PREAMBLE.size + len(encoded)) % 8)
+
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temp_path, 'wb') as out:
+            out.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(encoded)))
+            out.write(encoded)
+            for _, data in sections:
+                out.write(data)
+                out.write(b'\0' * (-len(data) % 8))
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_snapshot(path):
+    """Map a snapshot read-only; returns (meta, TaskStore whose columns are views of the mapping)
+
+    meta is the dict given to write_snapshot plus the critical path.
+    Nothing is copied: the pages are shared with every other process that
+    maps the same file and are only read from disk as they are touched.
+    The store is read-only, and is rescheduled into private arrays if
+    leveling asks for it.
+    """
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise SnapshotError(f"{path} is empty")
+    view = memoryview(mapped)
+    if len(view) < _PREAMBLE.size:
+        raise SnapshotError(f"{path} is truncated")
+    magic, version, header_size = _PREAMBLE.unpack_from(view)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise SnapshotError(f"{path} is not a version {FORMAT_VERSION} project snapshot")
+    base = _PREAMBLE.size + header_size
+    meta = json.loads(bytes(view[_PREAMBLE.size:base]))
+    if meta['byteorder'] != sys.byteorder:
+        raise SnapshotError(f"{path} was written on a {meta['byteorder']}-endian machine")
+
+    def section(name):
+        offset, size = meta['sections'][name]
+        if base + offset + size > len(view):
+            raise SnapshotError(f"{path} is truncated")
+        return view[base + offset:base + offset + size]
+
+    id_type = str if meta['id_type'] == 'str' else int
+    store = TaskStore.from_columns(
+        id_type,
+        {name: section(name).cast('q') for name in _INT_COLUMNS},
+        StringTable(section('names'), section('names_offsets').cast('q')),
+        StringTable(section('descriptions'), section('descriptions_offsets').cast('q')),
+        meta.pop('resources'),
+        meta.pop('resource_names'),
+        StringTable(section('id_table'), section('id_table_offsets').cast('q')) if id_type is str else None
+    )
+    if len(store.ids) != meta['count']:
+        raise SnapshotError(f"{path} is inconsistent")
+    # The views keep the mapping open for as long as the store is in use
+    meta['critical_path'] = [store.decode_id(code) for code in section('critical_path').cast('q')]
+    return meta, store
@@ -0,0 +1,245 @@
+import os
+
+
+def _child_text(fields, tag, default=None):
+    child = fields.get(tag)
+    return child.text if child is not None and child.text is not None else default
+
+
+def iter_project_file(source):
+    """Stream a generated project XML file (path or binary file object) as (kind, data) events
+
+    Yields ('info', {...}) once, then ('task', dict), ('resource', dict) and
+    ('assignment', (task_id, resource_id)) in document order. Each element is
+    cleared, and its processed siblings dropped, as soon as it has been read,
+    so memory use stays flat regardless of the size of the file.
+    """
+    from lxml import etree
+    context = etree.iterparse(source, events=('end',), tag=('ProjectInfo', 'Task', 'Resource', 'Assignment'))
+    for _, elem in context:
+        # Read direct children in one sweep; find() per field is several times slower in lxml
+        fields = {child.tag: child for child in elem}
+        if elem.tag == 'Task':
+            preds = fields.get('Predecessors')
+            yield 'task', {
+                'id': _child_text(fields, 'ID'),
+                'name': _child_text(fields, 'Name', ''),
+                'duration': int(_child_text(fields, 'Duration', '0').replace('d', '')),  # Convert "5d" to 5
+                'description': _child_text(fields, 'Description'),
+                'predecessors': [pred[0].text for pred in preds if len(pred)] if preds is not None else [],
+                'resources': []
+            }
+        elif elem.tag == 'Resource':
+            yield 'resource', {
+                'id': _child_text(fields, 'ID'),
+                'name': _child_text(fields, 'Name', ''),
+                'capacity': int(_child_text(fields, 'Capacity', '100').replace('%', ''))
+            }
+        elif elem.tag == 'Assignment':
+            yield 'assignment', (_child_text(fields, 'TaskID'), _child_text(fields, 'ResourceID'))
+        else:
+            yield 'info', {
+                'project_name': _child_text(fields, 'Name', ''),
+                'created_at': _child_text(fields, 'CreationDate')
+            }
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+    del context
+
+
+def parse_project_file(source):
+    """Parse a generated project XML file (path or binary file object) into plain dicts in one pass
+
+    Resources are indexed by id and assignments grouped by task id while the
+    document is streamed, so linking resources to tasks is a dict lookup per
+    assignment instead of an XPath search per task.
+    """
+    project = {
+        'project_name': '',
+        'created_at': None,
+        'tasks': [],
+        'resources': []
+    }
+    resources_by_id = {}
+    assignments_by_task = {}
+
+    for kind, data in iter_project_file(source):
+        if kind == 'task':
+            project['tasks'].append(data)
+        elif kind == 'resource':
+            project['resources'].append(data)
+            resources_by_id[data['id']] = data
+        elif kind == 'assignment':
+            assignments_by_task.setdefault(data[0], []).append(data[1])
+        else:
+            project.update(data)
+
+    link_assignments(project['tasks'], resources_by_id, assignments_by_task)
+    return project
+
+
+def parsed_plan(project_data, project_name, creation_date):
+    """What parse_project_file returns for the file write_project_xml writes from the same arguments
+
+    Lets the code that has just written a plan build its model straight from
+    the plan instead of reading the file back.
+    """
+    tasks = []
+    for task in project_data["tasks"]:
+        tasks.append({
+            'id': str(task["id"]),
+            'name': '' if task["name"] is None else str(task["name"]),
+            'duration': int(task["duration"]),
+            'description': task.get("description") or None,
+            'predecessors': [str(pred_id) for pred_id in task.get("predecessors") or ()],
+            'resources': []
+        })
+    resources = []
+    resources_by_id = {}
+    resource_ids = {}
+    for resource in project_data["resources"]:
+        data = {
+            'id': str(resource["id"]),
+            'name': '' if resource["name"] is None else str(resource["name"]),
+            'capacity': int(resource["capacity"])
+        }
+        resources.append(data)
+        resources_by_id[data['id']] = data
+        resource_ids.setdefault(resource["name"], resource["id"])
+    # The same assignments iter_project_xml writes: declared resources only, the first of a name winning
+    assignments_by_task = {}
+    for task in project_data["tasks"]:
+        for resource_name in task.get("resources", []):
+            resource_id = resource_ids.get(resource_name)
+            if resource_id:
+                assignments_by_task.setdefault(str(task["id"]), []).append(str(resource_id))
+    link_assignments(tasks, resources_by_id, assignments_by_task)
+    return {'project_name': project_name, 'created_at': creation_date, 'tasks': tasks, 'resources': resources}
+
+
+def link_assignments(tasks, resources_by_id, assignments_by_task):
+    """Fill each task's resource names from the id indexes"""
+    for task in tasks:
+        for resource_id in assignments_by_task.get(task['id'], ()):
+            resource = resources_by_id.get(resource_id)
+            if resource is not None:
+                task['resources'].append(resource['name'])
+
+
+XML_DECLARATION = "<?xml version='1.0' encoding='utf-8'?>\n"
+# Flush the output buffer to the writer roughly every 64 KB
+CHUNK_SIZE = 64 * 1024
+
+
+def _escape(text):
+    """Escape element text exactly as ElementTree does"""
+    text = str(text)
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    return text
+
+
+def _element(tag, text):
+    if text is None or text == '':
+        return f"<{tag} />"
+    return f"<{tag}>{_escape(text)}</{tag}>"
+
+
+def iter_project_xml(project_data, project_name, creation_date):
+    """Yield the project XML document as UTF-8 byte chunks
+
+    The output is byte-for-byte what ElementTree.write(encoding="utf-8",
+    xml_declaration=True) produced for the same data, but no element tree is
+    built and memory use is bounded by CHUNK_SIZE.
+    """
+    parts = []
+    size = 0
+
+    def flush():
+        nonlocal parts, size
+        chunk = ''.join(parts).encode('utf-8', 'xmlcharrefreplace')
+        parts = []
+        size = 0
+        return chunk
+
+    parts.append(XML_DECLARATION)
+    parts.append("<Project><ProjectInfo>")
+    parts.append(_element('Name', project_name))
+    parts.append(_element('CreationDate', creation_date))
+    parts.append("</ProjectInfo>")
+
+    # Tasks
+    tasks = project_data["tasks"]
+    parts.append("<Tasks>" if tasks else "<Tasks />")
+    for task in tasks:
+        piece = (
+            "<Task>" + _element('ID', str(task["id"])) + _element('Name', task["name"])
+            + _element('Duration', f"{task['duration']}d")
+        )
+        if task.get("description"):
+            piece += _element('Description', task["description"])
+        if task.get("predecessors"):
+            piece += "<Predecessors>" + ''.join(
+                "<Predecessor>" + _element('ID', str(pred_id)) + "</Predecessor>"
+                for pred_id in task["predecessors"]
+            ) + "</Predecessors>"
+        parts.append(piece + "</Task>")
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield flush()
+    if tasks:
+        parts.append("</Tasks>")
+
+    # Resources
+    resources = project_data["resources"]
+    parts.append("<Resources>" if resources else "<Resources />")
+    for resource in resources:
+        piece = (
+            "<Resource>" + _element('ID', str(resource["id"])) + _element('Name', resource["name"])
+            + _element('Capacity', str(resource["capacity"]) + "%") + "</Resource>"
+        )
+        parts.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield flush()
+    if resources:
+        parts.append("</Resources>")
+
+    # Assignments, resolving names through a prebuilt map (first resource with a name wins)
+    resource_ids = {}
+    for resource in resources:
+        resource_ids.setdefault(resource["name"], resource["id"])
+    opened = False
+    for task in tasks:
+        for resource_name in task.get("resources", []):
+            resource_id = resource_ids.get(resource_name)
+            if resource_id:
+                if not opened:
+                    parts.append("<Assignments>")
+                    opened = True
+                piece = (
+                    "<Assignment>" + _element('TaskID', str(task["id"]))
+                    + _element('ResourceID', str(resource_id)) + "</Assignment>"
+                )
+                parts.append(piece)
+                size += len(piece)
+                if size >= CHUNK_SIZE:
+                    yield flush()
+    parts.append("</Assignments>" if opened else "<Assignments />")
+    parts.append("</Project>")
+    yield flush()
+
+
+def write_project_xml(project_data, project_name, out, creation_date):
+    """Stream the project XML document to a path or a binary file-like object"""
+    if isinstance(out, (str, bytes, os.PathLike)):
+        with open(out, 'wb') as f:
+            return write_project_xml(project_data, project_name, f, creation_date)
+    for chunk in iter_project_xml(project_data, project_name, creation_date):
+        out.write(chunk)
+    return out
@@ -0,0 +1,560 @@
+import heapq
+
+
+class CycleError(ValueError):
+    """Raised when task dependencies form a cycle"""
+    def __init__(self, task_ids):
+        self.task_ids = task_ids
+        super().__init__(f"Dependency cycle between tasks: {', '.join(str(t) for t in task_ids[:10])}"
+                         + (" ..." if len(task_ids) > 10 else ""))
+
+
+class ScheduleResult:
+    """Critical path method results, stored as arrays aligned with ``ids``"""
+    def __init__(self, ids, order, early_start, early_finish, late_start, late_finish, project_duration,
+                 critical_chain=()):
+        self.ids = ids
+        self.index = {task_id: i for i, task_id in enumerate(ids)}
+        self.order = order
+        self.early_start = early_start
+        self.early_finish = early_finish
+        self.late_start = late_start
+        self.late_finish = late_finish
+        self.project_duration = project_duration
+        self._critical_chain = critical_chain
+
+    def total_float(self, i):
+        return self.late_start[i] - self.early_start[i]
+
+    @property
+    def critical_tasks(self):
+        """Ids of all zero-float tasks in topological order"""
+        return [self.ids[i] for i in self.order if self.late_start[i] == self.early_start[i]]
+
+    @property
+    def critical_path(self):
+        """One longest chain of zero-float tasks from project start to finish"""
+        return [self.ids[i] for i in self._critical_chain]
+
+    def for_task(self, task_id):
+        """Schedule values for a single task as a dict"""
+        i = self.index[task_id]
+        return {
+            'early_start': self.early_start[i],
+            'early_finish': self.early_finish[i],
+            'late_start': self.late_start[i],
+            'late_finish': self.late_finish[i],
+            'total_float': self.total_float(i),
+            'critical': self.late_start[i] == self.early_start[i]
+        }
+
+    def apply(self, tasks):
+        """Copy schedule values onto the task dicts that were scheduled"""
+        for task in tasks:
+            task.update(self.for_task(task['id']))
+        return tasks
+
+
+def compute_schedule(tasks):
+    """Run a CPM forward and backward pass over task dicts with id, duration and predecessors
+
+    Tasks may come in any order; predecessors that do not name a known task are ignored.
+    Runs in O(V + E) and raises CycleError if the dependencies are not acyclic.
+    """
+    if not isinstance(tasks, list):
+        tasks = list(tasks)
+    ids = [task['id'] for task in tasks]
+    durations = [int(task.get('duration') or 0) for task in tasks]
+    n = len(ids)
+    index = {task_id: i for i, task_id in enumerate(ids)}
+    # Predecessor ids may be ints while task ids are strings (or the reverse)
+    str_index = None
+
+    # Predecessors in CSR form: pred_flat[pred_start[v]:pred_start[v + 1]]
+    pred_start = [0] * (n + 1)
+    pred_flat = []
+    for i, task in enumerate(tasks):
+        for pred_id in task.get('predecessors') or ():
+            p = index.get(pred_id)
+            if p is None:
+                if str_index is None:
+                    str_index = {str(task_id): j for j, task_id in enumerate(ids)}
+                p = str_index.get(str(pred_id))
+                if p is None:
+                    continue
+            pred_flat.append(p)
+        pred_start[i + 1] = len(pred_flat)
+    return schedule_csr(ids, durations, pred_start, pred_flat)
+
+
+def schedule_csr(ids, durations, pred_start, pred_flat):
+    """Run CPM over tasks already in CSR form
+
+    The predecessors of the task at position v are the positions
+    pred_flat[pred_start[v]:pred_start[v + 1]]. ``durations`` and the CSR
+    arrays may be lists or ``array`` columns.
+    """
+    n = len(ids)
+    outdegree = [0] * n
+    for p in pred_flat:
+        outdegree[p] += 1
+
+    # Successors in CSR form, filled by counting sort over the predecessor edges
+    succ_start = [0] * (n + 1)
+    total = 0
+    for v in range(n):
+        succ_start[v] = total
+        total += outdegree[v]
+    succ_start[n] = total
+    succ_flat = [0] * total
+    cursor = succ_start[:n]
+    for v in range(n):
+        for k in range(pred_start[v], pred_start[v + 1]):
+            p = pred_flat[k]
+            succ_flat[cursor[p]] = v
+            cursor[p] += 1
+
+    # Kahn topological sort
+    indegree = [pred_start[v + 1] - pred_start[v] for v in range(n)]
+    order = [v for v in range(n) if indegree[v] == 0]
+    head = 0
+    while head < len(order):
+        v = order[head]
+        head += 1
+        for k in range(succ_start[v], succ_start[v + 1]):
+            s = succ_flat[k]
+            indegree[s] -= 1
+            if indegree[s] == 0:
+                order.append(s)
+    if len(order) != n:
+        raise CycleError([ids[i] for i in range(n) if indegree[i] > 0])
+
+    # Forward pass
+    early_start = [0] * n
+    early_finish = [0] * n
+    for v in order:
+        es = 0
+        for k in range(pred_start[v], pred_start[v + 1]):
+            ef = early_finish[pred_flat[k]]
+            if ef > es:
+                es = ef
+        early_start[v] = es
+        early_finish[v] = es + durations[v]
+    project_duration = max(early_finish) if n else 0
+
+    # Backward pass
+    late_start = [0] * n
+    late_finish = [0] * n
+    for v in reversed(order):
+        lf = project_duration
+        for k in range(succ_start[v], succ_start[v + 1]):
+            ls = late_start[succ_flat[k]]
+            if ls < lf:
+                lf = ls
+        late_finish[v] = lf
+        late_start[v] = lf - durations[v]
+
+    chain = _critical_chain(pred_start, pred_flat, early_start, early_finish, late_start, project_duration)
+    return ScheduleResult(ids, order, early_start, early_finish, late_start, late_finish, project_duration, chain)
+
+
+def _critical_chain(pred_start, pred_flat, early_start, early_finish, late_start, project_duration):
+    """Walk back from a critical finishing task through tight critical predecessors"""
+    current = None
+    for v in range(len(early_finish)):
+        if early_finish[v] == project_duration and late_start[v] == early_start[v]:
+            current = v
+            break
+    chain = []
+    while current is not None:
+        chain.append(current)
+        previous = None
+        for k in range(pred_start[current], pred_start[current + 1]):
+            p = pred_flat[k]
+            if early_finish[p] == early_start[current] and late_start[p] == early_start[p]:
+                previous = p
+                break
+        current = previous
+    chain.reverse()
+    return chain
+
+
+class IncrementalSchedule:
+    """CPM dates kept current under task and dependency edits, without full recomputes
+
+    Each task keeps its early start and its tail: the longest chain of work
+    that has to follow it. Late dates are derived from the tail and the
+    project duration, so they need no pass of their own. An edit marks the
+    tasks whose inputs changed as dirty and re-evaluates them in topological
+    order, early starts forward through successors and tails backward
+    through predecessors, stopping wherever a value comes out unchanged. The
+    topological order is kept with the Pearce-Kelly algorithm, which only
+    renumbers the tasks between the two ends of a new dependency.
+
+    Every edit returns the ids of the tasks whose early dates or float to
+    the project end changed; when the project duration changes, the late
+    dates of every task move with it.
+    """
+    def __init__(self, tasks):
+        if not isinstance(tasks, list):
+            tasks = list(tasks)
+        result = compute_schedule(tasks)
+        n = len(result.ids)
+        self.ids = list(result.ids)
+        self.index = dict(result.index)
+        self.durations = [result.early_finish[v] - result.early_start[v] for v in range(n)]
+        self.preds = [[] for _ in range(n)]
+        self.succs = [[] for _ in range(n)]
+        str_index = None
+        for v, task in enumerate(tasks):
+            for pred_id in task.get('predecessors') or ():
+                p = self.index.get(pred_id)
+                if p is None:
+                    if str_index is None:
+                        str_index = {str(task_id): j for j, task_id in enumerate(self.ids)}
+                    p = str_index.get(str(pred_id))
+                    if p is None:
+                        continue
+                self.preds[v].append(p)
+                self.succs[p].append(v)
+        self.alive = [True] * n
+        self.rank = [0] * n
+        for position, v in enumerate(result.order):
+            self.rank[v] = position
+        self._next_rank = n
+        self.early_start = list(result.early_start)
+        self.tail = [result.project_duration - finish for finish in result.late_finish]
+        self._duration = result.project_duration
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, task_id):
+        return task_id in self.index
+
+    @property
+    def project_duration(self):
+        if self._duration is None:
+            self._duration = max(
+                (self.early_start[v] + self.durations[v] for v in self.index.values()), default=0
+            )
+        return self._duration
+
+    def _position(self, task_id):
+        v = self.index.get(task_id)
+        if v is None:
+            raise KeyError(task_id)
+        return v
+
+    def for_task(self, task_id):
+        """Schedule values for a single task as a dict, as ScheduleResult.for_task returns them"""
+        v = self._position(task_id)
+        early_start = self.early_start[v]
+        late_finish = self.project_duration - self.tail[v]
+        late_start = late_finish - self.durations[v]
+        return {
+            'early_start': early_start,
+            'early_finish': early_start + self.durations[v],
+            'late_start': late_start,
+            'late_finish': late_finish,
+            'total_float': late_start - early_start,
+            'critical': late_start == early_start
+        }
+
+    def predecessors(self, task_id):
+        return [self.ids[p] for p in self.preds[self._position(task_id)]]
+
+    def successors(self, task_id):
+        return [self.ids[s] for s in self.succs[self._position(task_id)]]
+
+    def add_task(self, task_id, duration=0, predecessors=()):
+        if task_id in self.index:
+            raise ValueError(f"Task {task_id} already exists")
+        preds = list(dict.fromkeys(self._position(pred_id) for pred_id in predecessors))
+        v = len(self.ids)
+        self.ids.append(task_id)
+        self.index[task_id] = v
+        self.durations.append(int(duration))
+        self.preds.append(preds)
+        self.succs.append([])
+        self.alive.append(True)
+        # Last in the order, so every predecessor already comes before it
+        self.rank.append(self._next_rank)
+        self._next_rank += 1
+        self.early_start.append(0)
+        self.tail.append(0)
+        for p in preds:
+            self.succs[p].append(v)
+        self._finish_changed(None, self.durations[v])
+        return self._propagate([v], preds, {v})
+
+    def remove_task(self, task_id):
+        v = self._position(task_id)
+        del self.index[task_id]
+        self.alive[v] = False
+        preds, succs = self.preds[v], self.succs[v]
+        for p in preds:
+            self.succs[p].remove(v)
+        for s in succs:
+            self.preds[s].remove(v)
+        self.preds[v] = []
+        self.succs[v] = []
+        self._finish_changed(self.early_start[v] + self.durations[v], None)
+        return self._propagate(succs, preds, set())
+
+    def set_duration(self, task_id, duration):
+        v = self._position(task_id)
+        duration = int(duration)
+        if duration == self.durations[v]:
+            return []
+        old_finish = self.early_start[v] + self.durations[v]
+        self.durations[v] = duration
+        self._finish_changed(old_finish, self.early_start[v] + duration)
+        return self._propagate(self.succs[v], self.preds[v], {v})
+
+    def add_dependency(self, pred_id, task_id):
+        """Make task_id wait for pred_id; raises CycleError, leaving the schedule as it was, if that closes a cycle"""
+        p = self._position(pred_id)
+        v = self._position(task_id)
+        if p == v:
+            raise CycleError([task_id])
+        if p in self.preds[v]:
+            return []
+        if self.rank[p] > self.rank[v]:
+            self._reorder(p, v)
+        self.preds[v].append(p)
+        self.succs[p].append(v)
+        return self._propagate([v], [p], set())
+
+    def remove_dependency(self, pred_id, task_id):
+        p = self._position(pred_id)
+        v = self._position(task_id)
+        if p not in self.preds[v]:
+            return []
+        self.preds[v].remove(p)
+        self.succs[p].remove(v)
+        return self._propagate([v], [p], set())
+
+    def _reorder(self, p, v):
+        """Pearce-Kelly: renumber the tasks ranked between v and p so that p comes before v"""
+        rank = self.rank
+        lower, upper = rank[v], rank[p]
+        # Everything after v that p's new edge would have to precede
+        forward = []
+        seen = {v}
+        stack = [v]
+        while stack:
+            w = stack.pop()
+            forward.append(w)
+            for s in self.succs[w]:
+                if rank[s] == upper:
+                    raise CycleError([self.ids[v], self.ids[p]])
+                if s not in seen and rank[s] < upper:
+                    seen.add(s)
+                    stack.append(s)
+        # Everything before p that has to stay ahead of it
+        backward = []
+        seen = {p}
+        stack = [p]
+        while stack:
+            w = stack.pop()
+            backward.append(w)
+            for q in self.preds[w]:
+                if q not in seen and rank[q] > lower:
+                    seen.add(q)
+                    stack.append(q)
+        backward.sort(key=rank.__getitem__)
+        forward.sort(key=rank.__getitem__)
+        moved = backward + forward
+        for w, new_rank in zip(moved, sorted(rank[w] for w in moved)):
+            rank[w] = new_rank
+
+    def _finish_changed(self, old, new):
+        """Track the project duration as one task's early finish moves (None: task added or removed)"""
+        duration = self._duration
+        if duration is None:
+            return
+        if new is not None and new > duration:
+            self._duration = new
+        elif old is not None and old == duration and (new is None or new < duration):
+            # The task that defined the project end moved earlier; find the new end when asked
+            self._duration = None
+
+    def _propagate(self, forward, backward, changed):
+        """Re-evaluate dirty tasks and whatever their changes reach; returns the ids that changed"""
+        rank = self.rank
+        durations = self.durations
+        early_start = self.early_start
+        tail = self.tail
+
+        heap = [(rank[v], v) for v in set(forward)]
+        heapq.heapify(heap)
+        queued = {v for _, v in heap}
+        while heap:
+            _, v = heapq.heappop(heap)
+            start = 0
+            for p in self.preds[v]:
+                finish = early_start[p] + durations[p]
+                if finish > start:
+                    start = finish
+            if start != early_start[v]:
+                self._finish_changed(early_start[v] + durations[v], start + durations[v])
+                early_start[v] = start
+                changed.add(v)
+                # Successors are ranked after v, so none of them has been evaluated yet
+                for s in self.succs[v]:
+                    if s not in queued:
+                        queued.add(s)
+                        heapq.heappush(heap, (rank[s], s))
+
+        heap = [(-rank[v], v) for v in set(backward)]
+        heapq.heapify(heap)
+        queued = {v for _, v in heap}
+        while heap:
+            _, v = heapq.heappop(heap)
+            longest = 0
+            for s in self.succs[v]:
+                after = tail[s] + durations[s]
+                if after > longest:
+                    longest = after
+            if longest != tail[v]:
+                tail[v] = longest
+                changed.add(v)
+                for p in self.preds[v]:
+                    if p not in queued:
+                        queued.add(p)
+                        heapq.heappush(heap, (-rank[p], p))
+
+        ids = self.ids
+        alive = self.alive
+        return [ids[v] for v in changed if alive[v]]
+
+
+class LevelingResult:
+    """Resource-leveled start/finish times aligned with ``ids`` plus per-resource usage"""
+    def __init__(self, ids, start, finish, project_duration, utilization):
+        self.ids = ids
+        self.index = {task_id: i for i, task_id in enumerate(ids)}
+        self.start = start
+        self.finish = finish
+        self.project_duration = project_duration
+        self.utilization = utilization
+
+    def for_task(self, task_id):
+        i = self.index[task_id]
+        return {'leveled_start': self.start[i], 'leveled_finish': self.finish[i]}
+
+    def apply(self, tasks):
+        """Copy leveled dates onto the task dicts that were scheduled"""
+        for task in tasks:
+            task.update(self.for_task(task['id']))
+        return tasks
+
+
+def level_resources(tasks, resources, schedule=None):
+    """Serial schedule generation that respects resource capacity
+
+    Eligible tasks are taken in order of CPM late start (then early start, then
+    list position) and placed at the earliest time their predecessors are done
+    and every assigned resource has a free unit. Each resource is modelled as
+    capacity // demand parallel slots kept in a heap of the times they next
+    become free, so placing a task costs O(r log slots) rather than a scan
+    over days. Resources named by a task but missing from ``resources`` are
+    treated as unlimited.
+    """
+    if not isinstance(tasks, list):
+        tasks = list(tasks)
+    schedule = schedule or compute_schedule(tasks)
+    n = len(tasks)
+    ids = schedule.ids
+    durations = [schedule.early_finish[i] - schedule.early_start[i] for i in range(n)]
+
+    # Capacity is a percentage of one full-time unit; each assignment needs up to 100%
+    slots = {}
+    demand = {}
+    for resource in resources:
+        capacity = int(str(resource.get('capacity', 100)).rstrip('%') or 0)
+        demand[resource['name']] = min(100, capacity) if capacity > 0 else 100
+        slots[resource['name']] = [0] * max(1, capacity // demand[resource['name']])
+
+    # Predecessor and successor lists by position, reusing the CPM index
+    position = schedule.index
+    str_position = None
+    preds = [[] for _ in range(n)]
+    succs = [[] for _ in range(n)]
+    for i, task in enumerate(tasks):
+        for pred_id in task.get('predecessors') or ():
+            p = position.get(pred_id)
+            if p is None:
+                if str_position is None:
+                    str_position = {str(task_id): j for j, task_id in enumerate(ids)}
+                p = str_position.get(str(pred_id))
+                if p is None:
+                    continue
+            preds[i].append(p)
+            succs[p].append(i)
+
+    task_resources = [
+        [name for name in dict.fromkeys(task.get('resources') or ()) if name in slots]
+        for task in tasks
+    ]
+    remaining = [len(p) for p in preds]
+    ready_at = [0] * n
+    start = [0] * n
+    finish = [0] * n
+    events = {name: [] for name in slots}
+
+    eligible = [
+        (schedule.late_start[i], schedule.early_start[i], i) for i in range(n) if remaining[i] == 0
+    ]
+    heapq.heapify(eligible)
+    while eligible:
+        _, _, v = heapq.heappop(eligible)
+        t = ready_at[v]
+        for name in task_resources[v]:
+            if slots[name][0] > t:
+                t = slots[name][0]
+        start[v] = t
+        finish[v] = t + durations[v]
+        if durations[v]:
+            for name in task_resources[v]:
+                heapq.heapreplace(slots[name], finish[v])
+                events[name].append((t, demand[name]))
+                events[name].append((finish[v], -demand[name]))
+        for s in succs[v]:
+            if finish[v] > ready_at[s]:
+                ready_at[s] = finish[v]
+            remaining[s] -= 1
+            if remaining[s] == 0:
+                heapq.heappush(eligible, (schedule.late_start[s], schedule.early_start[s], s))
+
+    project_duration = max(finish) if n else 0
+    utilization = {}
+    for resource in resources:
+        name = resource['name']
+        capacity = len(slots[name]) * demand[name]
+        profile = _usage_profile(events[name])
+        busy = sum((end - begin) * units for begin, end, units in profile)
+        utilization[name] = {
+            'capacity': capacity,
+            'peak': max((units for _, _, units in profile), default=0),
+            'utilization': busy / (capacity * project_duration) if capacity and project_duration else 0.0,
+            'profile': profile
+        }
+    return LevelingResult(ids, start, finish, project_duration, utilization)
+
+
+def _usage_profile(events):
+    """Collapse (time, delta) events into (start, end, units) segments of constant usage"""
+    profile = []
+    units = 0
+    events.sort()
+    for k, (time, delta) in enumerate(events):
+        units += delta
+        next_time = events[k + 1][0] if k + 1 < len(events) else time
+        if next_time > time and units:
+            if profile and profile[-1][1] == time and profile[-1][2] == units:
+                profile[-1] = (profile[-1][0], next_time, units)
+            else:
+                profile.append((time, next_time, units))
+    return profile
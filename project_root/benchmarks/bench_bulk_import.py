@@ -0,0 +1,66 @@
+"""Bulk import throughput as the worker count grows, with a fake model and fake Graph server
+
+Run from project_root:  python -m benchmarks.bench_bulk_import [num_documents]
+"""
+import io
+import os
+import sys
+import zipfile
+import tempfile
+import contextlib
+from config import Config
+from app import create_app
+from app.services.bulk_import import import_source
+from benchmarks.fakes import FakeModel, FakeGraphServer, make_overview
+
+MODEL_LATENCY = 0.3
+WORKER_COUNTS = (1, 2, 4, 8)
+# With 4 workers the import must run at least this many times faster than with 1
+MIN_SPEEDUP_4 = 2.5
+
+
+def make_archive(path, num_documents):
+    with zipfile.ZipFile(path, 'w') as archive:
+        for i in range(num_documents):
+            # Distinct text per document, so nothing is served from a cache
+            archive.writestr(f"overview_{i}.txt", f"Overview {i}\n\n" + make_overview(3 + i % 4))
+
+
+def run(num_documents):
+    with tempfile.TemporaryDirectory() as tmp, FakeGraphServer(latency=0.005) as graph:
+        class BenchConfig(Config):
+            TESTING = True
+            DATABASE_PATH = os.path.join(tmp, 'app.sqlite3')
+            JOB_QUEUE_PATH = os.path.join(tmp, 'jobs.sqlite3')
+            JOB_QUEUE_WORKERS = 0
+            AI_CACHE_ENABLED = False
+            BLOB_STORE_PATH = os.path.join(tmp, 'blobs')
+            BLOB_GC_INTERVAL = 0
+            METRICS_PATH = os.path.join(tmp, 'metrics.sqlite3')
+            MS_PROJECT_CLIENT_ID = 'bench'
+            MS_PROJECT_CLIENT_SECRET = 'bench'
+            MS_TOKEN_URL = graph.token_url
+            MS_GRAPH_BASE_URL = graph.base_url
+
+        app = create_app(BenchConfig)
+        app.extensions['model_client'] = FakeModel(latency=MODEL_LATENCY, tasks_per_call=30)
+        archive = os.path.join(tmp, 'overviews.zip')
+        make_archive(archive, num_documents)
+
+        rates = {}
+        with app.app_context():
+            for workers in WORKER_COUNTS:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    report = import_source(archive, 'bench', workers)
+                rates[workers] = report['documents_per_minute']
+                print(f"{workers:>2} workers: {report['succeeded']}/{report['documents']} documents in "
+                      f"{report['seconds']:6.2f}s  {report['documents_per_minute']:8.1f}/min  "
+                      f"speedup {rates[workers] / rates[1]:4.1f}x")
+        return rates
+
+
+if __name__ == '__main__':
+    rates = run(int(sys.argv[1]) if len(sys.argv) > 1 else 16)
+    if rates[4] / rates[1] < MIN_SPEEDUP_4:
+        print(f"FAIL: 4 workers gave a {rates[4] / rates[1]:.1f}x speedup (budget {MIN_SPEEDUP_4}x)")
+        sys.exit(1)
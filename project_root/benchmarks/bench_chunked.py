@@ -0,0 +1,44 @@
+"""Chunked (map-reduce) AI processing benchmark against a fake model with fixed latency
+
+Latency should track ceil(chunks / concurrency) x model latency.
+Run from project_root:  python -m benchmarks.bench_chunked
+"""
+import os
+import math
+import time
+import tempfile
+from config import Config
+from app import create_app
+from app.services.ai_processor import process_project_overview
+from benchmarks.fakes import FakeModel, make_overview
+
+MODEL_LATENCY = 0.2
+
+
+def run(num_sections, concurrency, chunk_chars=2000):
+    class BenchConfig(Config):
+        TESTING = True
+        DATABASE_PATH = os.path.join(tmp, 'app.sqlite3')
+        JOB_QUEUE_PATH = os.path.join(tmp, 'jobs.sqlite3')
+        JOB_QUEUE_WORKERS = 0
+        AI_CACHE_ENABLED = False
+        AI_CHUNK_CHARS = chunk_chars
+        AI_CHUNK_CONCURRENCY = concurrency
+
+    app = create_app(BenchConfig)
+    model = FakeModel(latency=MODEL_LATENCY)
+    text = make_overview(num_sections)
+    with app.app_context():
+        started = time.perf_counter()
+        plan = process_project_overview(text, model)
+        elapsed = time.perf_counter() - started
+    expected = math.ceil(model.calls / concurrency) * MODEL_LATENCY
+    print(f"{len(text):>7} chars  {model.calls:>3} chunks  concurrency {concurrency:>2}: "
+          f"{elapsed:5.2f}s (ideal {expected:4.2f}s)  {len(plan['tasks'])} merged tasks")
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        for sections in (10, 40):
+            for concurrency in (1, 4, 8):
+                run(sections, concurrency)
@@ -0,0 +1,68 @@
+"""Dashboard load test: latency for one user while the total number of projects grows
+
+Run from project_root:  python -m benchmarks.bench_dashboard [total_projects ...]
+"""
+import os
+import sys
+import time
+import tempfile
+from config import Config
+from app import create_app
+from app.models.storage import storage
+from app.models.user import User
+from app.models.project import Project
+
+# Projects owned by the user whose dashboard is measured
+OWN_PROJECTS = 20
+# Number of other users' projects inserted so far
+total_added = [0]
+
+
+def make_app(tmp):
+    class BenchConfig(Config):
+        TESTING = True
+        DATABASE_PATH = os.path.join(tmp, 'app.sqlite3')
+        JOB_QUEUE_PATH = os.path.join(tmp, 'jobs.sqlite3')
+        JOB_QUEUE_WORKERS = 0
+        AI_CACHE_ENABLED = False
+    return create_app(BenchConfig)
+
+
+def add_other_projects(count, owners=500):
+    """Bulk-insert projects for other users"""
+    with storage.connection() as conn:
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO projects (id, project_name, owner_id, overview_file, project_file, created_at) "
+            "VALUES (?, ?, ?, '', '', '2024-01-01T00:00:00')",
+            ((f"bulk-{total_added[0] + i}", f"Project {i}", f"owner-{i % owners}") for i in range(count))
+        )
+        conn.execute("COMMIT")
+    total_added[0] += count
+
+
+def measure(client, requests=200):
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get('/dashboard')
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.99) - 1]
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        with app.app_context():
+            user = User.create('bench', 'bench@example.com', 'password')
+            for i in range(OWN_PROJECTS):
+                Project.create(f"Own project {i}", user.id, 'overview.txt', 'plan.xml')
+        client = app.test_client()
+        client.post('/login', data={'email': 'bench@example.com', 'password': 'password'})
+        for size in sizes:
+            add_other_projects(size - total_added[0])
+            p50, p99 = measure(client)
+            print(f"{size:>8} projects in store: dashboard p50 {p50 * 1000:6.2f} ms  p99 {p99 * 1000:6.2f} ms")
@@ -0,0 +1,110 @@
+"""Incremental rescheduling benchmark: single-task edits versus a full CPM recompute
+
+Applies random edits of every kind to a large plan through PlanEditor and
+checks the final dates against compute_schedule.
+Run from project_root:  python -m benchmarks.bench_incremental [num_tasks] [num_edits]
+"""
+import sys
+import time
+import random
+from app.services.plan_editor import PlanEditor
+from app.services.scheduler import compute_schedule, CycleError
+from benchmarks.bench_scheduler import make_plan
+
+# Median single-task edit on a 50k-task plan must stay under this many milliseconds
+BUDGET_MEDIAN_MS = 5.0
+
+
+def make_editable_plan(num_tasks):
+    tasks = sorted(make_plan(num_tasks), key=lambda task: task['id'])
+    for task in tasks:
+        task.update(name=f"Task {task['id']}", description='', resources=[])
+    return {'project_name': 'Incremental benchmark', 'tasks': tasks, 'resources': []}
+
+
+def random_edit(editor, rng):
+    ids = list(editor.tasks) if len(editor.tasks) < 1000 else None
+    pick = (lambda: rng.choice(ids)) if ids else (lambda: _random_id(editor, rng))
+    kind = rng.random()
+    if kind < 0.4:
+        return {'op': 'update_task', 'id': pick(), 'changes': {'duration': rng.randint(0, 20)}}
+    if kind < 0.6:
+        task_id = pick()
+        # Nearby tasks, like a planner linking related work; some point backwards and
+        # force a reorder of the topological order (or close a cycle and are rejected)
+        predecessor = task_id + rng.randint(-200, 40)
+        if predecessor not in editor.tasks or predecessor == task_id:
+            predecessor = pick()
+        return {'op': 'add_dependency', 'id': task_id, 'predecessor': predecessor}
+    if kind < 0.75:
+        task_id = pick()
+        predecessors = editor.tasks[task_id]['predecessors']
+        if not predecessors:
+            return {'op': 'update_task', 'id': task_id, 'changes': {'duration': rng.randint(0, 20)}}
+        return {'op': 'remove_dependency', 'id': task_id, 'predecessor': rng.choice(predecessors)}
+    if kind < 0.9:
+        return {'op': 'add_task', 'task': {'name': 'New task', 'duration': rng.randint(1, 10),
+                                           'predecessors': [pick() for _ in range(rng.randint(0, 3))]}}
+    return {'op': 'remove_task', 'id': pick()}
+
+
+def _random_id(editor, rng):
+    while True:
+        task_id = rng.randint(1, editor.next_id - 1)
+        if task_id in editor.tasks:
+            return task_id
+
+
+def run(num_tasks, num_edits, seed=7):
+    plan = make_editable_plan(num_tasks)
+    started = time.perf_counter()
+    full = compute_schedule(plan['tasks'])
+    full_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    editor = PlanEditor(plan)
+    open_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(seed)
+    timings = {}
+    changed = []
+    rejected = 0
+    for _ in range(num_edits):
+        edit = random_edit(editor, rng)
+        started = time.perf_counter()
+        try:
+            result = editor.apply(edit)
+        except CycleError:
+            rejected += 1
+            continue
+        timings.setdefault(edit['op'], []).append((time.perf_counter() - started) * 1000)
+        changed.append(len(result['changed']))
+
+    # The incremental dates must match a from-scratch schedule of the edited plan
+    check = compute_schedule(editor.plan['tasks'])
+    assert check.project_duration == editor.schedule.project_duration
+    for task_id in editor.tasks:
+        assert check.for_task(task_id) == editor.schedule.for_task(task_id), task_id
+
+    every = sorted(ms for values in timings.values() for ms in values)
+    median = every[len(every) // 2]
+    print(f"{num_tasks} tasks: full recompute {full_ms:.1f} ms, opening the editor {open_ms:.1f} ms "
+          f"(project duration {full.project_duration}d)")
+    for op, values in sorted(timings.items()):
+        values.sort()
+        print(f"  {op:<18} {len(values):>5} edits  p50 {values[len(values) // 2]:7.3f} ms  "
+              f"p99 {values[int(len(values) * 0.99) - 1]:7.3f} ms  max {values[-1]:7.2f} ms")
+    changed.sort()
+    print(f"  all edits: p50 {median:.3f} ms ({full_ms / median:.0f}x faster than a full recompute), "
+          f"tasks rescheduled per edit p50 {changed[len(changed) // 2]} / max {changed[-1]}; "
+          f"{rejected} cyclic edits rejected; final dates match a full recompute")
+    return median
+
+
+if __name__ == '__main__':
+    num_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    num_edits = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    median = run(num_tasks, num_edits)
+    if num_tasks <= 50000 and median > BUDGET_MEDIAN_MS:
+        print(f"FAIL: median edit took {median:.2f} ms (budget {BUDGET_MEDIAN_MS} ms)")
+        sys.exit(1)
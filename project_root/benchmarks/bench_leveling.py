@@ -0,0 +1,47 @@
+"""Resource leveling benchmark
+
+Run from project_root:  python -m benchmarks.bench_leveling [num_tasks] [num_resources]
+"""
+import sys
+import time
+import random
+from app.services.scheduler import compute_schedule, level_resources
+from benchmarks.bench_scheduler import make_plan
+
+# Upper bound in seconds for leveling 10k tasks over 500 resources
+BUDGET = 1.0
+
+
+def make_resources(num_resources, seed=7):
+    rng = random.Random(seed)
+    return [
+        {'id': i, 'name': f"Resource {i}", 'capacity': rng.choice([50, 100, 100, 200, 300])}
+        for i in range(1, num_resources + 1)
+    ]
+
+
+def run(num_tasks, num_resources):
+    rng = random.Random(1)
+    tasks = make_plan(num_tasks)
+    resources = make_resources(num_resources)
+    for task in tasks:
+        task['resources'] = [r['name'] for r in rng.sample(resources, rng.randint(1, 3))]
+
+    schedule = compute_schedule(tasks)
+    started = time.perf_counter()
+    leveled = level_resources(tasks, resources, schedule)
+    elapsed = time.perf_counter() - started
+    busiest = max(leveled.utilization.values(), key=lambda u: u['utilization'])
+    print(f"{num_tasks} tasks / {num_resources} resources: leveled in {elapsed * 1000:.1f} ms; "
+          f"duration {schedule.project_duration}d -> {leveled.project_duration}d, "
+          f"busiest resource {busiest['utilization']:.0%}")
+    return elapsed
+
+
+if __name__ == '__main__':
+    num_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    num_resources = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    elapsed = run(num_tasks, num_resources)
+    if elapsed > BUDGET:
+        print(f"FAIL: leveling took {elapsed:.2f}s (budget {BUDGET}s)")
+        sys.exit(1)
@@ -0,0 +1,113 @@
+"""Near-duplicate lookup latency and recall with tens of thousands of indexed overviews
+
+Fills the index with random signatures (unrelated documents) plus real
+signatures of distinct synthetic overviews, then looks up lightly edited
+copies of those overviews. Signature computation depends on document length and is
+timed separately from the lookup.
+Run from project_root:  python -m benchmarks.bench_near_duplicates [num_documents]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+from array import array
+from config import Config
+from app import create_app
+from app.services.near_duplicates import near_duplicates, minhash, NUM_PERM
+
+NUM_ORIGINALS = 200
+# Median lookup against the full index must stay under this many milliseconds
+BUDGET_P50_MS = 1.0
+# Share of edited copies that must find their original
+MIN_RECALL = 0.9
+
+
+def make_document(rng, vocabulary):
+    """An overview of random sentences, so no two share more than common phrasing by chance"""
+    sentences = []
+    for _ in range(rng.randrange(30, 150)):
+        words = [rng.choice(vocabulary) for _ in range(rng.randrange(6, 16))]
+        sentences.append(' '.join(words).capitalize() + '.')
+    return ' '.join(sentences)
+
+
+def edit(text, rng):
+    """A lightly edited copy: a few words changed and a sentence added"""
+    words = text.split()
+    for _ in range(max(1, len(words) // 100)):
+        words[rng.randrange(len(words))] = rng.choice(['revised', 'updated', 'new', 'later'])
+    return ' '.join(words) + ' Added a final review with the steering committee.'
+
+
+def run(num_documents, seed=5):
+    rng = random.Random(seed)
+    syllables = ['ba', 'co', 'de', 'fi', 'gu', 'la', 'mo', 'ne', 'pi', 'ru', 'sa', 'te', 'vo', 'xi', 'zu']
+    vocabulary = [''.join(rng.choice(syllables) for _ in range(rng.randrange(1, 4))) for _ in range(3000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            TESTING = True
+            DATABASE_PATH = os.path.join(tmp, 'app.sqlite3')
+            JOB_QUEUE_PATH = os.path.join(tmp, 'jobs.sqlite3')
+            JOB_QUEUE_WORKERS = 0
+            BLOB_STORE_PATH = os.path.join(tmp, 'blobs')
+            BLOB_GC_INTERVAL = 0
+            METRICS_ENABLED = False
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            originals = []
+            signature_ms = []
+            for i in range(NUM_ORIGINALS):
+                text = make_document(rng, vocabulary)
+                started = time.perf_counter()
+                signature = minhash(text)
+                signature_ms.append((time.perf_counter() - started) * 1000)
+                near_duplicates.add(f"original-{i}", 'bench', signature)
+                originals.append(text)
+
+            started = time.perf_counter()
+            for i in range(num_documents - NUM_ORIGINALS):
+                noise = array('Q', (rng.getrandbits(64) for _ in range(NUM_PERM)))
+                near_duplicates.add(f"other-{i}", 'bench', noise)
+            fill_seconds = time.perf_counter() - started
+
+            queries = [minhash(edit(text, rng)) for text in originals]
+            misses = [array('Q', (rng.getrandbits(64) for _ in range(NUM_PERM))) for _ in range(NUM_ORIGINALS)]
+            for signature in queries[:20]:
+                near_duplicates.query('bench', signature)  # warm-up
+
+            timings = []
+            found = 0
+            for i, signature in enumerate(queries):
+                started = time.perf_counter()
+                matches = near_duplicates.query('bench', signature)
+                timings.append((time.perf_counter() - started) * 1000)
+                found += any(project_id == f"original-{i}" for project_id, _ in matches)
+            false_matches = 0
+            for signature in misses:
+                started = time.perf_counter()
+                false_matches += bool(near_duplicates.query('bench', signature))
+                timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    signature_ms.sort()
+    p50 = timings[len(timings) // 2]
+    recall = found / len(queries)
+    print(f"{num_documents} documents indexed ({fill_seconds:.1f}s to fill)")
+    print(f"  lookup: p50 {p50:.3f} ms  p99 {timings[int(len(timings) * 0.99) - 1]:.3f} ms  "
+          f"max {timings[-1]:.3f} ms over {len(timings)} lookups")
+    print(f"  recall of edited copies: {recall:.1%}; unrelated documents matched: {false_matches}")
+    print(f"  signature of one overview: p50 {signature_ms[len(signature_ms) // 2]:.1f} ms "
+          f"(computed once per upload, before the lookup)")
+    return p50, recall
+
+
+if __name__ == '__main__':
+    p50, recall = run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
+    if p50 > BUDGET_P50_MS:
+        print(f"FAIL: median lookup took {p50:.3f} ms (budget {BUDGET_P50_MS} ms)")
+        sys.exit(1)
+    if recall < MIN_RECALL:
+        print(f"FAIL: only {recall:.0%} of edited copies found their original (need {MIN_RECALL:.0%})")
+        sys.exit(1)
@@ -0,0 +1,175 @@
+"""End-to-end upload pipeline benchmark with local fakes for the model and Microsoft Graph
+
+Runs extract -> AI processing -> validation -> scheduling over synthetic
+overviews of increasing size, once syncing to a fake Graph server and once
+falling back to writing the XML file. Throughput, p50/p99 latency and peak
+memory are compared with a JSON baseline; anything worse than the baseline by
+more than the tolerance is reported as a regression.
+
+Run from project_root:  python -m benchmarks.bench_pipeline [--runs N] [--save] [--baseline PATH]
+Baselines depend on the machine: record one with --save before comparing.
+"""
+import io
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import contextlib
+import platform
+import tempfile
+import tracemalloc
+from config import Config
+from app import create_app
+from app.services.pipeline import run_upload_pipeline
+from benchmarks.fakes import FakeModel, FakeGraphServer, make_overview
+
+# (name, overview sections, tasks the fake model returns per call)
+SIZES = [
+    ('small', 2, 10),
+    ('medium', 20, 50),
+    ('large', 80, 200),
+]
+MODES = ('graph', 'xml')
+MODEL_LATENCY = 0.01
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline_pipeline.json')
+# A metric regresses when it is this much worse than the baseline ...
+TOLERANCE = 0.25
+# ... and the latency difference is larger than this many milliseconds (ignores timer noise)
+MIN_LATENCY_DELTA_MS = 5.0
+
+
+def make_app(tmp, graph):
+    class BenchConfig(Config):
+        TESTING = True
+        DATABASE_PATH = os.path.join(tmp, 'app.sqlite3')
+        JOB_QUEUE_PATH = os.path.join(tmp, 'jobs.sqlite3')
+        JOB_QUEUE_WORKERS = 0
+        AI_CACHE_ENABLED = False
+        BLOB_STORE_PATH = os.path.join(tmp, 'blobs')
+        BLOB_GC_INTERVAL = 0
+        METRICS_PATH = os.path.join(tmp, 'metrics.sqlite3')
+        MS_PROJECT_CLIENT_ID = 'bench'
+        MS_PROJECT_CLIENT_SECRET = 'bench'
+        MS_TOKEN_URL = graph.token_url
+        MS_GRAPH_BASE_URL = graph.base_url
+
+    return create_app(BenchConfig)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def run_scenario(app, graph, tmp, name, sections, tasks_per_call, mode, runs):
+    graph.deny_tokens = mode == 'xml'
+    app.extensions['model_client'] = FakeModel(latency=MODEL_LATENCY, tasks_per_call=tasks_per_call)
+    overview_path = os.path.join(tmp, f"{name}.txt")
+    with open(overview_path, 'w', encoding='utf-8') as out:
+        out.write(make_overview(sections))
+
+    counter = [0]
+
+    def run_once():
+        counter[0] += 1
+        # A new name each time, so the XML fallback writes a new file instead of reusing one
+        return run_upload_pipeline(overview_path, f"Bench {name} {mode} {counter[0]}", 'bench')
+
+    # The XML fallback prints the (expected) Graph error on every run
+    with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        project = run_once()  # warm-up
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(runs):
+            run_started = time.perf_counter()
+            run_once()
+            latencies.append(time.perf_counter() - run_started)
+        elapsed = time.perf_counter() - started
+
+        tracemalloc.start()
+        run_once()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'tasks': project.task_count,
+        'runs': runs,
+        'throughput_per_s': runs / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'peak_memory_mib': peak / (1024 * 1024)
+    }
+
+
+def find_regressions(results, baseline, tolerance=TOLERANCE):
+    """Describe every metric that is worse than the baseline by more than the tolerance"""
+    regressions = []
+    for scenario, result in results.items():
+        base = baseline.get(scenario)
+        if not base:
+            continue
+        for metric in ('p50_ms', 'p99_ms'):
+            if (result[metric] > base[metric] * (1 + tolerance)
+                    and result[metric] - base[metric] > MIN_LATENCY_DELTA_MS):
+                regressions.append(f"{scenario} {metric}: {result[metric]:.1f} vs {base[metric]:.1f}")
+        if result['throughput_per_s'] < base['throughput_per_s'] / (1 + tolerance):
+            regressions.append(f"{scenario} throughput_per_s: "
+                               f"{result['throughput_per_s']:.2f} vs {base['throughput_per_s']:.2f}")
+        if result['peak_memory_mib'] > base['peak_memory_mib'] * (1 + tolerance):
+            regressions.append(f"{scenario} peak_memory_mib: "
+                               f"{result['peak_memory_mib']:.1f} vs {base['peak_memory_mib']:.1f}")
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20, help='timed runs per scenario')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON file')
+    parser.add_argument('--save', action='store_true', help='record these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, FakeGraphServer() as graph:
+        app = make_app(tmp, graph)
+        for name, sections, tasks_per_call in SIZES:
+            for mode in MODES:
+                scenario = f"{name}/{mode}"
+                result = run_scenario(app, graph, tmp, name, sections, tasks_per_call, mode, args.runs)
+                results[scenario] = result
+                print(f"{scenario:<14} {result['tasks']:>5} tasks  {result['throughput_per_s']:7.2f}/s  "
+                      f"p50 {result['p50_ms']:8.1f}ms  p99 {result['p99_ms']:8.1f}ms  "
+                      f"peak {result['peak_memory_mib']:6.1f} MiB")
+
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as out:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'scenarios': results
+            }, out, indent=2, sort_keys=True)
+            out.write('\n')
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one with --save")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)['scenarios']
+    regressions = find_regressions(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        print(f"FAIL: {len(regressions)} metrics regressed by more than {args.tolerance:.0%}")
+        return 1
+    print("No regressions against the baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,45 @@
+"""CPM scheduler benchmark
+
+Run from project_root:  python -m benchmarks.bench_scheduler [num_tasks ...]
+"""
+import sys
+import time
+import random
+from app.services.scheduler import compute_schedule
+
+# Upper bound in seconds for scheduling 100k tasks
+BUDGET_100K = 2.0
+
+
+def make_plan(num_tasks, max_preds=3, window=50, seed=42):
+    """Random DAG whose predecessors lie within `window` tasks, listed in shuffled order"""
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(1, num_tasks + 1):
+        candidates = range(max(1, i - window), i)
+        preds = rng.sample(candidates, min(len(candidates), rng.randint(0, max_preds)))
+        tasks.append({'id': i, 'duration': rng.randint(1, 20), 'predecessors': preds})
+    rng.shuffle(tasks)
+    return tasks
+
+
+def run(num_tasks, repeat=3):
+    tasks = make_plan(num_tasks)
+    edges = sum(len(t['predecessors']) for t in tasks)
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = compute_schedule(tasks)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{num_tasks:>8} tasks {edges:>8} edges  {best * 1000:9.1f} ms  "
+          f"duration={result.project_duration}d critical_path={len(result.critical_path)} tasks")
+    return best
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    timings = {size: run(size) for size in sizes}
+    if 100000 in timings and timings[100000] > BUDGET_100K:
+        print(f"FAIL: 100k tasks took {timings[100000]:.2f}s (budget {BUDGET_100K}s)")
+        sys.exit(1)
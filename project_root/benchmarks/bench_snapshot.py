@@ -0,0 +1,90 @@
+"""Project load time: parsing and scheduling the XML versus mapping the binary snapshot
+
+Also times a full read of every task, which is when the snapshot's pages are
+actually touched, and the memory each load allocates in this process.
+Run from project_root:  python -m benchmarks.bench_snapshot [num_tasks ...]
+"""
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+from app.services.project_xml import write_project_xml
+from app.services.project_cache import ProjectModel
+from app.services.project_snapshot import snapshot_path
+from benchmarks.bench_incremental import make_editable_plan
+
+SIZES = (1000, 10000, 50000)
+RUNS = 5
+# Opening the snapshot of the largest plan must be at least this many times faster than parsing its XML
+MIN_SPEEDUP = 50
+
+
+def make_project_file(directory, num_tasks):
+    plan = make_editable_plan(num_tasks)
+    plan['resources'] = [{'id': i + 1, 'name': f"Resource {i + 1}", 'capacity': 100} for i in range(20)]
+    for task in plan['tasks']:
+        task['resources'] = [f"Resource {task['id'] % 20 + 1}"]
+    path = os.path.join(directory, f"plan_{num_tasks}.xml")
+    write_project_xml(plan, f"Snapshot benchmark {num_tasks}", path, '2024-01-01T00:00:00')
+    stat = os.stat(path)
+    ProjectModel.from_file(path).save_snapshot(snapshot_path(path), (stat.st_mtime_ns, stat.st_size))
+    return path
+
+
+def best_of(load, runs=RUNS):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        load()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def read_all(model):
+    for task in model.tasks:
+        task.to_dict()
+
+
+def allocated(load):
+    tracemalloc.start()
+    model = load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del model
+    return peak / (1024 * 1024)
+
+
+def run(sizes):
+    speedups = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_tasks in sizes:
+            path = make_project_file(tmp, num_tasks)
+            snapshot = snapshot_path(path)
+            from_xml = lambda: ProjectModel.from_file(path)
+            from_snapshot = lambda: ProjectModel.from_snapshot(snapshot)[0]
+            runs = RUNS if num_tasks <= 10000 else 2
+
+            xml_ms = best_of(from_xml, runs)
+            snapshot_ms = best_of(from_snapshot)
+            xml_read_ms = best_of(lambda: read_all(from_xml()), runs)
+            snapshot_read_ms = best_of(lambda: read_all(from_snapshot()))
+            speedups[num_tasks] = xml_ms / snapshot_ms
+            print(f"{num_tasks:>6} tasks  xml {os.path.getsize(path) / 1e6:6.1f} MB, "
+                  f"snapshot {os.path.getsize(snapshot) / 1e6:6.1f} MB")
+            print(f"        load:            xml {xml_ms:9.2f} ms   snapshot {snapshot_ms:8.3f} ms  "
+                  f"({speedups[num_tasks]:,.0f}x)")
+            print(f"        load + read all: xml {xml_read_ms:9.2f} ms   snapshot {snapshot_read_ms:8.2f} ms")
+            print(f"        allocated:       xml {allocated(from_xml):9.1f} MiB  "
+                  f"snapshot {allocated(from_snapshot):8.2f} MiB (the rest is shared page cache)")
+    return speedups
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    speedups = run(sizes)
+    largest = max(speedups)
+    if speedups[largest] < MIN_SPEEDUP:
+        print(f"FAIL: the snapshot of {largest} tasks loaded only {speedups[largest]:.0f}x faster "
+              f"than the XML (budget {MIN_SPEEDUP}x)")
+        sys.exit(1)
@@ -0,0 +1,46 @@
+"""Time to first task with streamed model output versus waiting for the full response
+
+Run from project_root:  python -m benchmarks.bench_streaming
+"""
+import os
+import time
+import tempfile
+from config import Config
+from app import create_app
+from app.services.ai_processor import process_project_overview
+from benchmarks.fakes import FakeModel, FakeStreamingModel
+
+OVERVIEW = "Project: Streaming benchmark\n\nBuild, test and ship the product."
+
+
+def run(app, model, label):
+    started = time.perf_counter()
+    first = []
+
+    def on_task(task):
+        if not first:
+            first.append(time.perf_counter() - started)
+
+    with app.app_context():
+        plan = process_project_overview(OVERVIEW, model, on_task=on_task)
+    total = time.perf_counter() - started
+    # Without streaming, no task is usable before the whole response has been parsed
+    first_task = first[0] if isinstance(model, FakeStreamingModel) else total
+    print(f"{label:<10} first task after {first_task:5.2f}s, full plan ({len(plan['tasks'])} tasks) after {total:5.2f}s")
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            TESTING = True
+            DATABASE_PATH = os.path.join(tmp, 'app.sqlite3')
+            JOB_QUEUE_PATH = os.path.join(tmp, 'jobs.sqlite3')
+            JOB_QUEUE_WORKERS = 0
+            AI_CACHE_ENABLED = False
+
+        app = create_app(BenchConfig)
+        # Same total generation time: 0.3s to the first token, then ~8 characters every 10ms
+        streaming = FakeStreamingModel(latency=0.3, tasks_per_call=20, piece_delay=0.01)
+        run(app, streaming, 'streaming')
+        blocking = FakeModel(latency=0.3 + streaming.piece_delay * (len(streaming.complete('', '')) // 8), tasks_per_call=20)
+        run(app, blocking, 'blocking')
@@ -0,0 +1,70 @@
+"""Memory benchmark: scheduled task dicts versus the columnar TaskStore
+
+Run from project_root:  python -m benchmarks.bench_task_store [num_tasks]
+"""
+import sys
+import random
+import tracemalloc
+from app.models.task_store import TaskStore
+from app.services.scheduler import compute_schedule
+from benchmarks.bench_scheduler import make_plan
+
+# The store must hold a plan in at most this fraction of the memory the dicts take
+BUDGET_RATIO = 0.5
+
+
+def make_parsed_plan(num_tasks, num_resources=200, seed=5):
+    """Tasks shaped like parse_project_file output: string ids, names and resource names per task"""
+    rng = random.Random(seed)
+    resources = [{'id': str(i), 'name': f"Resource {i}", 'capacity': 100} for i in range(1, num_resources + 1)]
+    tasks = []
+    for task in make_plan(num_tasks):
+        tasks.append({
+            'id': str(task['id']),
+            'name': f"Task {task['id']}",
+            'duration': task['duration'],
+            'description': '',
+            'predecessors': [str(pred) for pred in task['predecessors']],
+            # Separate string objects, as a parser produces them
+            'resources': [f"Resource {rng.randint(1, num_resources)}" for _ in range(rng.randint(1, 3))]
+        })
+    return tasks, resources
+
+
+def measure(build):
+    tracemalloc.start()
+    kept = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return kept, current, peak
+
+
+def build_dicts(num_tasks):
+    tasks, resources = make_parsed_plan(num_tasks)
+    compute_schedule(tasks).apply(tasks)
+    return tasks, resources
+
+
+def build_store(num_tasks):
+    tasks, resources = make_parsed_plan(num_tasks)
+    store = TaskStore.from_dicts(tasks, resources)
+    store.schedule()
+    return store
+
+
+def run(num_tasks):
+    _, dict_bytes, dict_peak = measure(lambda: build_dicts(num_tasks))
+    store, store_bytes, store_peak = measure(lambda: build_store(num_tasks))
+    mib = 1024 * 1024
+    print(f"{num_tasks} tasks: dicts {dict_bytes / mib:.1f} MiB (peak {dict_peak / mib:.1f}), "
+          f"TaskStore {store_bytes / mib:.1f} MiB (peak {store_peak / mib:.1f}, "
+          f"nbytes estimate {store.nbytes() / mib:.1f}); ratio {store_bytes / dict_bytes:.2f}")
+    return store_bytes / dict_bytes
+
+
+if __name__ == '__main__':
+    num_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    ratio = run(num_tasks)
+    if ratio > BUDGET_RATIO:
+        print(f"FAIL: TaskStore uses {ratio:.0%} of the dict representation (budget {BUDGET_RATIO:.0%})")
+        sys.exit(1)
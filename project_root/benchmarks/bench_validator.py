@@ -0,0 +1,59 @@
+"""Plan validation benchmark
+
+Run from project_root:  python -m benchmarks.bench_validator [num_tasks ...]
+"""
+import sys
+import time
+import random
+from app.services.plan_validator import validate_plan
+from benchmarks.bench_scheduler import make_plan
+
+# Upper bound in seconds for validating 50k tasks
+BUDGET_50K = 0.75
+
+
+def make_model_output(num_tasks, seed=3):
+    """A plan shaped like model output with the usual mistakes sprinkled in"""
+    rng = random.Random(seed)
+    resources = [{'id': i, 'name': f"Resource {i}", 'capacity': 100} for i in range(1, 51)]
+    tasks = make_plan(num_tasks)
+    for task in tasks:
+        task['name'] = f"Task {task['id']}"
+        task['description'] = ''
+        task['resources'] = [f"Resource {rng.randint(1, 60)}"]
+        roll = rng.random()
+        if roll < 0.01:
+            task['duration'] = f"{task['duration']} days"
+        elif roll < 0.02:
+            task['id'] = str(task['id'])
+        elif roll < 0.025:
+            task['predecessors'].append(num_tasks + rng.randint(1, 100))
+        elif roll < 0.027:
+            task['id'] = rng.randint(1, num_tasks)
+    # A few cycles: make early tasks depend on late ones
+    by_id = {task['id']: task for task in tasks if isinstance(task['id'], int)}
+    for i in range(1, 20):
+        if i in by_id:
+            by_id[i]['predecessors'].append(num_tasks - i)
+    return {'project_name': 'Benchmark', 'tasks': tasks, 'resources': resources}
+
+
+def run(num_tasks, repeat=3):
+    plan = make_model_output(num_tasks)
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _, report = validate_plan(plan)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    repairs = ', '.join(f"{kind}={count}" for kind, count in sorted(report.counts.items()))
+    print(f"{num_tasks:>8} tasks  {best * 1000:9.1f} ms  ({best / num_tasks * 1e6:.1f} us/task)  {repairs}")
+    return best
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+    timings = {size: run(size) for size in sizes}
+    if 50000 in timings and timings[50000] > BUDGET_50K:
+        print(f"FAIL: 50k tasks took {timings[50000]:.2f}s (budget {BUDGET_50K}s)")
+        sys.exit(1)
@@ -0,0 +1,89 @@
+"""Project XML reader benchmark: DOM parsing versus the streaming iterparse reader
+
+Each reader runs in a fresh interpreter so peak RSS is measured independently.
+Run from project_root:  python -m benchmarks.bench_xml_reader [num_tasks]
+"""
+import os
+import sys
+import json
+import tempfile
+import subprocess
+
+READERS = {
+    # The previous path: a full ElementTree DOM, then task dicts built from it
+    'dom': """
+import xml.etree.ElementTree as ET
+root = ET.parse(path).getroot()
+tasks = [
+    {
+        'id': t.find('ID').text,
+        'name': t.find('Name').text,
+        'duration': int(t.find('Duration').text.replace('d', '')),
+        'predecessors': [p.text for p in t.findall('./Predecessors/Predecessor/ID')],
+    }
+    for t in root.findall('./Tasks/Task')
+]
+count = len(tasks)
+""",
+    # Consume the event stream without keeping anything
+    'stream': """
+from app.services.project_xml import iter_project_file
+count = sum(1 for kind, _ in iter_project_file(path) if kind == 'task')
+""",
+    # Build the task/resource dicts the app uses, via the stream
+    'parse': """
+from app.services.project_xml import parse_project_file
+count = len(parse_project_file(path)['tasks'])
+""",
+}
+
+HARNESS = """
+import sys, time, json, resource
+path = sys.argv[1]
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+started = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - started
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'count': count, 'seconds': elapsed, 'peak_kb': peak, 'delta_kb': peak - baseline}}))
+"""
+
+
+def write_plan(path, num_tasks, num_resources=200):
+    """Write a synthetic project file in the format generate_xml_project_file produces"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("<?xml version='1.0' encoding='utf-8'?>\n<Project><ProjectInfo><Name>Benchmark</Name>"
+                "<CreationDate>2024-01-01T00:00:00</CreationDate></ProjectInfo><Tasks>")
+        for i in range(1, num_tasks + 1):
+            preds = ''.join(f"<Predecessor><ID>{p}</ID></Predecessor>" for p in range(max(1, i - 2), i))
+            f.write(f"<Task><ID>{i}</ID><Name>Task {i}</Name><Duration>{i % 20 + 1}d</Duration>"
+                    f"<Description>Synthetic task number {i}</Description>"
+                    f"{'<Predecessors>' + preds + '</Predecessors>' if preds else ''}</Task>")
+        f.write("</Tasks><Resources>")
+        for r in range(1, num_resources + 1):
+            f.write(f"<Resource><ID>{r}</ID><Name>Resource {r}</Name><Capacity>100%</Capacity></Resource>")
+        f.write("</Resources><Assignments>")
+        for i in range(1, num_tasks + 1):
+            f.write(f"<Assignment><TaskID>{i}</TaskID><ResourceID>{i % num_resources + 1}</ResourceID></Assignment>")
+        f.write("</Assignments></Project>")
+
+
+def run(num_tasks):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'plan.xml')
+        write_plan(path, num_tasks)
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"{num_tasks} tasks, {size_mb:.1f} MB")
+        for name, body in READERS.items():
+            output = subprocess.run(
+                [sys.executable, '-c', HARNESS.format(body=body), path],
+                capture_output=True, text=True, check=True, cwd=os.getcwd()
+            ).stdout
+            result = json.loads(output)
+            print(f"  {name:<7} {result['seconds'] * 1000:8.1f} ms  peak RSS {result['peak_kb'] / 1024:7.1f} MB "
+                  f"(+{result['delta_kb'] / 1024:.1f} MB)")
+
+
+if __name__ == '__main__':
+    for size in [int(arg) for arg in sys.argv[1:]] or [10000, 100000]:
+        run(size)
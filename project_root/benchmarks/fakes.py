@@ -0,0 +1,232 @@
+"""Local stand-ins for external services used by the benchmarks"""
+import re
+import json
+import time
+import itertools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeModel:
+    """Model client that answers with a small plan derived from the prompt, after a fixed delay"""
+    def __init__(self, latency=0.2, tasks_per_call=5):
+        self.latency = latency
+        self.tasks_per_call = tasks_per_call
+        self.calls = 0
+
+    def complete(self, system_prompt, user_message, max_tokens=4000):
+        self.calls += 1
+        time.sleep(self.latency)
+        part = re.search(r"part (\d+) of", user_message)
+        label = part.group(1) if part else "1"
+        tasks = [
+            {
+                "id": i,
+                "name": f"Section {label} task {i}" if i > 1 else "Project kickoff",
+                "description": "Generated by the fake model",
+                "duration": 1 + i % 5,
+                "predecessors": [i - 1] if i > 1 else [],
+                "resources": ["Engineer" if i % 2 else "Project Manager"]
+            }
+            for i in range(1, self.tasks_per_call + 1)
+        ]
+        return json.dumps({
+            "project_name": "Fake Project",
+            "tasks": tasks,
+            "resources": [
+                {"id": 1, "name": "Engineer", "role": "Engineering", "capacity": 100},
+                {"id": 2, "name": "Project Manager", "role": "Management", "capacity": 100}
+            ]
+        })
+
+
+def make_overview(num_sections, paragraphs_per_section=4):
+    """Synthetic project overview with headed sections"""
+    sections = []
+    for s in range(1, num_sections + 1):
+        body = "\n\n".join(
+            f"Workstream {s} paragraph {p}: the team will design, build and verify component {s}.{p}, "
+            f"coordinating with stakeholders and documenting decisions along the way."
+            for p in range(1, paragraphs_per_section + 1)
+        )
+        sections.append(f"{s}. Section {s}\n\n{body}")
+    return "Project: Synthetic Benchmark\n\n" + "\n\n".join(sections)
+
+
+class FakeStreamingModel(FakeModel):
+    """FakeModel that also streams its answer a few characters at a time"""
+    def __init__(self, latency=0.2, tasks_per_call=5, piece_size=8, piece_delay=0.002):
+        super().__init__(latency, tasks_per_call)
+        self.piece_size = piece_size
+        self.piece_delay = piece_delay
+
+    def stream(self, system_prompt, user_message, max_tokens=4000):
+        text = FakeModel.complete(self, system_prompt, user_message, max_tokens)
+        for start in range(0, len(text), self.piece_size):
+            time.sleep(self.piece_delay)
+            yield text[start:start + self.piece_size]
+
+
+class FakeGraphServer:
+    """Local HTTP server answering the Microsoft token and Graph calls made by MSProjectClient
+
+    Every POST succeeds with a fresh id; $batch requests are answered item by
+    item after an optional delay, as Graph would. With deny_tokens set, token
+    requests fail, which sends uploads down the XML fallback. Failures can be
+    injected: batch_failures holds (status, headers) answers for whole $batch
+    requests and item_failures the same for batch items, each used up in
+    order. An item whose dependsOn item failed in the same batch gets a 424.
+    Every received batch is kept in batches. Use as a context manager and
+    point MS_TOKEN_URL / MS_GRAPH_BASE_URL at token_url / base_url.
+    """
+    def __init__(self, latency=0.0, deny_tokens=False, batch_failures=(), item_failures=()):
+        self.latency = latency
+        self.deny_tokens = deny_tokens
+        self.batch_failures = list(batch_failures)
+        self.item_failures = list(item_failures)
+        self.requests = 0
+        self.batches = []
+        self._lock = threading.Lock()
+        ids = itertools.count(1)
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def reply(self, status, body, headers=()):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def answer_batch(self, items):
+                with fake._lock:
+                    fake.batches.append(items)
+                    if fake.batch_failures:
+                        status, headers = fake.batch_failures.pop(0)
+                        self.reply(status, {'error': {'code': 'scripted'}}, headers.items())
+                        return
+                    responses = []
+                    failed = set()
+                    for item in items:
+                        if any(dep in failed for dep in item.get('dependsOn', ())):
+                            status, headers = 424, {}
+                        elif fake.item_failures:
+                            status, headers = fake.item_failures.pop(0)
+                        else:
+                            status, headers = 201, {}
+                        if status >= 300:
+                            failed.add(item['id'])
+                            body = {'error': {'code': 'scripted'}}
+                        else:
+                            body = {'id': f"fake-{next(ids)}"}
+                        responses.append({'id': item['id'], 'status': status, 'headers': headers, 'body': body})
+                self.reply(200, {'responses': responses})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length)
+                fake.requests += 1
+                time.sleep(fake.latency)
+                if self.path == '/token' and fake.deny_tokens:
+                    self.reply(401, {'error': 'invalid_client'})
+                elif self.path == '/token':
+                    self.reply(200, {'access_token': 'fake-token', 'expires_in': 3600})
+                elif self.path.endswith('/$batch'):
+                    self.answer_batch(json.loads(body)['requests'])
+                else:
+                    self.reply(201, {'id': f"fake-{next(ids)}"})
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def token_url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/token"
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/v1.0"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fake-graph', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
+
+
+class FakeOpenAIServer:
+    """Local HTTP server answering OpenAI chat completion requests from a script
+
+    Each request takes the next (status, headers) pair from `script`; once it
+    runs out, requests succeed with a completion whose text is `reply`. Use as
+    a context manager and point OPENAI_BASE_URL at base_url.
+    """
+    def __init__(self, script=(), reply='{"tasks": []}'):
+        self.script = list(script)
+        self.reply = reply
+        self.requests = []
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def reply_json(self, status, body, headers=()):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                with fake._lock:
+                    fake.requests.append((time.monotonic(), body))
+                    status, headers = fake.script.pop(0) if fake.script else (200, {})
+                if status != 200:
+                    self.reply_json(status, {'error': {'message': f"scripted {status}", 'type': 'fake'}},
+                                    headers.items())
+                    return
+                self.reply_json(200, {
+                    'id': f"chatcmpl-{len(fake.requests)}",
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': body.get('model', 'fake'),
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': fake.reply}}],
+                    'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2}
+                })
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fake-openai', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
@@ -7,6 +7,73 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'you-will-never-guess'
     UPLOAD_FOLDER = 'uploads'
     ALLOWED_EXTENSIONS = {'txt', 'pdf', 'docx', 'doc'}
+    # Users and projects; DATABASE_PATH defaults to <instance>/app.sqlite3
+    DATABASE_PATH = os.environ.get('DATABASE_PATH')
+    DATABASE_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE', 8))
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+    # Shared OpenAI client; OPENAI_BASE_URL can point at a local mock server
+    OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL')
+    OPENAI_REQUESTS_PER_MINUTE = int(os.environ.get('OPENAI_REQUESTS_PER_MINUTE', 500))
+    OPENAI_TOKENS_PER_MINUTE = int(os.environ.get('OPENAI_TOKENS_PER_MINUTE', 150000))
+    OPENAI_MAX_CONCURRENCY = int(os.environ.get('OPENAI_MAX_CONCURRENCY', 8))
+    OPENAI_MAX_RETRIES = int(os.environ.get('OPENAI_MAX_RETRIES', 5))
+    OPENAI_TIMEOUT = float(os.environ.get('OPENAI_TIMEOUT', 120))
+    # Overviews longer than AI_CHUNK_CHARS are split and sent to the model in parallel
+    AI_CHUNK_CHARS = int(os.environ.get('AI_CHUNK_CHARS', 24000))
+    AI_CHUNK_CONCURRENCY = int(os.environ.get('AI_CHUNK_CONCURRENCY', 4))
     MS_PROJECT_CLIENT_ID = os.environ.get('MS_PROJECT_CLIENT_ID')
-    MS_PROJECT_CLIENT_SECRET = os.environ.get('MS_PROJECT_CLIENT_SECRET')
\ No newline at end of file
+    MS_PROJECT_CLIENT_SECRET = os.environ.get('MS_PROJECT_CLIENT_SECRET')
+    # Microsoft Graph sync; the URLs can point at a local stub server
+    MS_GRAPH_BASE_URL = os.environ.get('MS_GRAPH_BASE_URL', 'https://graph.microsoft.com/v1.0')
+    MS_TOKEN_URL = os.environ.get('MS_TOKEN_URL', 'https://login.microsoftonline.com/common/oauth2/v2.0/token')
+    MS_GRAPH_CONCURRENCY = int(os.environ.get('MS_GRAPH_CONCURRENCY', 4))
+    MS_GRAPH_MAX_RETRIES = int(os.environ.get('MS_GRAPH_MAX_RETRIES', 3))
+    # Background upload processing; JOB_QUEUE_PATH defaults to <instance>/jobs.sqlite3.
+    # Workers start with the first request a process serves, so CLI commands run none
+    JOB_QUEUE_PATH = os.environ.get('JOB_QUEUE_PATH')
+    JOB_QUEUE_WORKERS = int(os.environ.get('JOB_QUEUE_WORKERS', 2))
+    # Seconds a claimed job stays leased to its process without a heartbeat before others may rerun it,
+    # and how many times a job is claimed before one that keeps killing its process is failed
+    JOB_QUEUE_LEASE_SECONDS = float(os.environ.get('JOB_QUEUE_LEASE_SECONDS', 60))
+    JOB_QUEUE_MAX_ATTEMPTS = int(os.environ.get('JOB_QUEUE_MAX_ATTEMPTS', 3))
+    # Cache of AI extraction results keyed by document content; AI_CACHE_PATH defaults to <instance>/ai_cache.sqlite3
+    AI_CACHE_ENABLED = os.environ.get('AI_CACHE_ENABLED', '1') != '0'
+    AI_CACHE_PATH = os.environ.get('AI_CACHE_PATH')
+    AI_CACHE_TTL = int(os.environ.get('AI_CACHE_TTL', 30 * 24 * 3600))
+    AI_CACHE_MAX_ENTRIES = int(os.environ.get('AI_CACHE_MAX_ENTRIES', 5000))
+    AI_CACHE_MAX_BYTES = int(os.environ.get('AI_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    # In-memory cache of parsed, scheduled project files
+    PROJECT_CACHE_MAX_ENTRIES = int(os.environ.get('PROJECT_CACHE_MAX_ENTRIES', 128))
+    PROJECT_CACHE_MAX_BYTES = int(os.environ.get('PROJECT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    PROJECT_CACHE_REVALIDATE = float(os.environ.get('PROJECT_CACHE_REVALIDATE', 2.0))
+    # Write a memory-mappable snapshot beside each generated project file and load from it
+    PROJECT_SNAPSHOTS = os.environ.get('PROJECT_SNAPSHOTS', '1') != '0'
+    # Content-addressed uploads and generated files; BLOB_STORE_PATH defaults to <instance>/blobs
+    BLOB_STORE_PATH = os.environ.get('BLOB_STORE_PATH')
+    # Unreferenced blobs are deleted once older than BLOB_GC_GRACE seconds, checked every BLOB_GC_INTERVAL
+    BLOB_GC_GRACE = int(os.environ.get('BLOB_GC_GRACE', 24 * 3600))
+    BLOB_GC_INTERVAL = int(os.environ.get('BLOB_GC_INTERVAL', 3600))
+    # Prometheus-style metrics shared by all worker processes; METRICS_PATH defaults to <instance>/metrics.sqlite3
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+    METRICS_PATH = os.environ.get('METRICS_PATH')
+    # Bulk import of zipped overviews: documents processed at once, and limits per archive
+    BULK_IMPORT_CONCURRENCY = int(os.environ.get('BULK_IMPORT_CONCURRENCY', 4))
+    BULK_IMPORT_MAX_FILES = int(os.environ.get('BULK_IMPORT_MAX_FILES', 500))
+    BULK_IMPORT_MAX_FILE_BYTES = int(os.environ.get('BULK_IMPORT_MAX_FILE_BYTES', 50 * 1024 * 1024))
+    # Near-duplicate overviews: estimated similarity at which an earlier project's plan is offered for reuse
+    NEAR_DUPLICATES_ENABLED = os.environ.get('NEAR_DUPLICATES_ENABLED', '1') != '0'
+    NEAR_DUPLICATE_THRESHOLD = float(os.environ.get('NEAR_DUPLICATE_THRESHOLD', 0.8))
+    # JSON API: tasks or projects per page by default, and the most a client may ask for
+    API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 100))
+    API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 1000))
+    # Plans open for editing kept in memory; every PLAN_EDIT_COMPACT_AFTER edits the whole plan is saved again
+    PLAN_EDITOR_CACHE_ENTRIES = int(os.environ.get('PLAN_EDITOR_CACHE_ENTRIES', 8))
+    PLAN_EDIT_COMPACT_AFTER = int(os.environ.get('PLAN_EDIT_COMPACT_AFTER', 500))
+    # Stream project XML from the stored plan on download instead of writing it under instance/generated
+    PROJECT_XML_ON_DEMAND = os.environ.get('PROJECT_XML_ON_DEMAND', '0') == '1'
+    # Gzip XML downloads for clients that accept it
+    DOWNLOAD_GZIP = os.environ.get('DOWNLOAD_GZIP', '1') != '0'
+    # Opt-in request profiling: comma-separated endpoints (e.g. projects.download, or *), cprofile or sampling
+    PROFILE_ENDPOINTS = os.environ.get('PROFILE_ENDPOINTS', '')
+    PROFILE_MODE = os.environ.get('PROFILE_MODE', 'cprofile')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR')
\ No newline at end of file
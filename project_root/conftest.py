@@ -0,0 +1,42 @@
+# conftest.py
+import os
+import pytest
+from config import Config
+from app import create_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    """An app whose databases, blobs and metrics live under tmp_path, with no background threads"""
+    class TestConfig(Config):
+        TESTING = True
+        DATABASE_PATH = os.path.join(tmp_path, 'app.sqlite3')
+        JOB_QUEUE_PATH = os.path.join(tmp_path, 'jobs.sqlite3')
+        JOB_QUEUE_WORKERS = 0
+        AI_CACHE_PATH = os.path.join(tmp_path, 'ai_cache.sqlite3')
+        BLOB_STORE_PATH = os.path.join(tmp_path, 'blobs')
+        BLOB_GC_INTERVAL = 0
+        METRICS_PATH = os.path.join(tmp_path, 'metrics.sqlite3')
+        # Nothing listens on the discard port, so Graph sync fails fast and uploads take the XML fallback
+        MS_TOKEN_URL = 'http://127.0.0.1:9/token'
+        MS_GRAPH_BASE_URL = 'http://127.0.0.1:9/v1.0'
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def user(app):
+    from app.models.user import User
+    return User.create('tester', 'tester@example.com', 'secret')
+
+
+@pytest.fixture
+def client(app, user):
+    """A test client logged in as user"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = user.id
+        session['_fresh'] = True
+    return client
@@ -0,0 +1,110 @@
+# test_api.py
+import base64
+import json
+import pytest
+from app.models.project import Project
+from app.services.plan_validator import validate_plan
+
+# Tasks 1-5 form the critical chain; 6-12 hang off task 1 with slack
+CHAIN = 5
+TASKS = 12
+
+
+@pytest.fixture
+def project(user):
+    tasks = [
+        {'id': i, 'name': f"Chain {i}", 'duration': 5, 'predecessors': [i - 1] if i > 1 else [], 'resources': ['Ann']}
+        for i in range(1, CHAIN + 1)
+    ] + [
+        {'id': i, 'name': f"Side {i}", 'duration': 1, 'predecessors': [1], 'resources': ['Bob']}
+        for i in range(CHAIN + 1, TASKS + 1)
+    ]
+    plan, _ = validate_plan({'project_name': 'API test', 'tasks': tasks, 'resources': ['Ann', 'Bob']})
+    project = Project.create('API test', user.id, None, task_count=TASKS, resource_count=2)
+    project.save_plan(plan)
+    return project
+
+
+def tasks_url(project, **args):
+    query = '&'.join(f"{name}={value}" for name, value in args.items())
+    return f"/api/projects/{project.id}/tasks" + (f"?{query}" if query else '')
+
+
+def cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def test_requires_login(app, project):
+    response = app.test_client().get(tasks_url(project))
+    assert response.status_code == 401
+
+
+def test_task_pages_round_trip(client, project):
+    """Following next links visits every task once, in plan order"""
+    ids = []
+    url = tasks_url(project, limit=5)
+    pages = 0
+    while url:
+        body = client.get(url).get_json()
+        assert body['total_tasks'] == TASKS
+        ids.extend(task['id'] for task in body['data'])
+        url = body['links']['next']
+        pages += 1
+    assert ids == list(range(1, TASKS + 1))
+    assert pages == 3
+
+
+def test_cursor_from_an_older_version_is_refused(client, project):
+    body = client.get(tasks_url(project, limit=5)).get_json()
+    project.update(project_name='Renamed')
+    response = client.get(tasks_url(project, limit=5, cursor=body['next_cursor']))
+    assert response.status_code == 409
+
+
+@pytest.mark.parametrize('position', [True, -1, TASKS + 1, '3'])
+def test_invalid_cursor_positions(client, project, position):
+    body = client.get(tasks_url(project, limit=5)).get_json()
+    version = json.loads(base64.urlsafe_b64decode(body['next_cursor'] + '=='))[1]
+    response = client.get(tasks_url(project, cursor=cursor([position, version])))
+    assert response.status_code == 400
+    assert client.get(tasks_url(project, cursor='not-a-cursor')).status_code == 400
+
+
+def test_fields(client, project):
+    body = client.get(tasks_url(project, fields='id,name,critical', limit=1)).get_json()
+    assert body['data'] == [{'id': 1, 'name': 'Chain 1', 'critical': True}]
+
+    response = client.get(tasks_url(project, fields='id,secret'))
+    assert response.status_code == 400
+    assert 'secret' in response.get_json()['error']
+
+
+def test_filters(client, project):
+    critical = client.get(tasks_url(project, critical='true', fields='id')).get_json()['data']
+    assert [task['id'] for task in critical] == list(range(1, CHAIN + 1))
+    slack = client.get(tasks_url(project, critical='false', fields='id')).get_json()['data']
+    assert [task['id'] for task in slack] == list(range(CHAIN + 1, TASKS + 1))
+
+    bob = client.get(tasks_url(project, resource='bob', fields='id,resources', limit=3)).get_json()
+    assert [task['id'] for task in bob['data']] == [6, 7, 8]
+    assert all(task['resources'] == ['Bob'] for task in bob['data'])
+    rest = client.get(bob['links']['next']).get_json()
+    assert [task['id'] for task in rest['data']] == [9, 10, 11]
+    assert [task['id'] for task in client.get(rest['links']['next']).get_json()['data']] == [12]
+
+    assert client.get(tasks_url(project, resource='nobody')).get_json()['data'] == []
+    assert client.get(tasks_url(project, critical='maybe')).status_code == 400
+
+
+def test_not_modified(client, project):
+    response = client.get(tasks_url(project))
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+
+    repeat = client.get(tasks_url(project), headers={'If-None-Match': etag})
+    assert repeat.status_code == 304 and repeat.data == b''
+    # Another representation of the same data has its own ETag
+    assert client.get(tasks_url(project, limit=2), headers={'If-None-Match': etag}).status_code == 200
+
+    project.update(project_name='Renamed')
+    assert client.get(tasks_url(project), headers={'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,29 @@
+# test_blob_store.py
+import os
+from app.models.storage import storage
+from app.services.blob_store import blob_store
+from app.services.pipeline import run_upload_pipeline
+from benchmarks.fakes import FakeModel, make_overview
+
+
+def blob_rows():
+    return {row['name']: row['refcount'] for row in storage.fetch_all("SELECT name, refcount FROM blobs")}
+
+
+def test_same_plan_uploaded_twice_shares_one_schedule_file(app, tmp_path):
+    """Uploading the same plan again reuses its generated XML instead of writing another"""
+    app.config['AI_CACHE_ENABLED'] = False
+    app.extensions['model_client'] = FakeModel(latency=0, tasks_per_call=8)
+    overview = os.path.join(tmp_path, 'overview.txt')
+    with open(overview, 'w', encoding='utf-8') as out:
+        out.write(make_overview(2))
+
+    first = run_upload_pipeline(overview, 'Same plan', 'owner-1')
+    second = run_upload_pipeline(overview, 'Same plan', 'owner-1')
+
+    assert first.id != second.id
+    assert first.project_file == second.project_file
+    xml_blobs = {name: refcount for name, refcount in blob_rows().items() if name.endswith('.xml')}
+    assert xml_blobs == {blob_store.name_of(first.project_file): 2}
+    generated = [name for _, _, names in os.walk(blob_store.root) for name in names if name.endswith('.xml')]
+    assert len(generated) == 1
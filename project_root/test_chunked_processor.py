@@ -0,0 +1,114 @@
+# test_chunked_processor.py
+import pytest
+from app.services.ai_processor import process_project_overview
+from app.services.chunked_processor import split_document, reduce_plans
+from benchmarks.fakes import FakeModel, make_overview
+
+CHUNK_CHARS = 1500
+
+
+class FailingPartModel(FakeModel):
+    """FakeModel whose answer for one overview part fails, as a 429 or timeout would"""
+    def __init__(self, failing_part, **kwargs):
+        super().__init__(latency=0, **kwargs)
+        self.failing_part = failing_part
+
+    def complete(self, system_prompt, user_message, max_tokens=4000):
+        if f"part {self.failing_part} of" in user_message:
+            self.calls += 1
+            raise TimeoutError("model timed out")
+        return super().complete(system_prompt, user_message, max_tokens)
+
+
+def chunk_plan(tasks, resources=()):
+    return {"project_name": "Chunked", "tasks": tasks, "resources": list(resources)}
+
+
+def test_reduce_dedupes_renumbers_and_remaps_predecessors():
+    first = chunk_plan([
+        {"id": 1, "name": "Kickoff", "duration": 2, "predecessors": [], "resources": ["PM"]},
+        {"id": 2, "name": "Design", "duration": "5 days", "predecessors": [1], "resources": ["engineer"]},
+    ], [{"id": 1, "name": "PM"}, {"id": 2, "name": "Engineer", "capacity": 50}])
+    second = chunk_plan([
+        {"id": 1, "name": "kickoff ", "duration": 3, "predecessors": []},
+        {"id": 2, "name": "Build", "duration": 4, "predecessors": [1, "Design"], "resources": ["Engineer"]},
+        {"id": 3, "name": "Test", "duration": 1, "predecessors": [2]},
+        {"id": 4, "name": "Docs", "duration": 1, "predecessors": []},
+    ], [{"id": 7, "name": "ENGINEER", "capacity": 80}])
+
+    plan = reduce_plans([first, None, second])
+
+    by_name = {task["name"]: task for task in plan["tasks"]}
+    assert [task["id"] for task in plan["tasks"]] == [1, 2, 3, 4, 5]
+    assert by_name["Kickoff"]["duration"] == 3
+    assert by_name["Design"]["duration"] == 5
+    assert by_name["Design"]["predecessors"] == [1]
+    # Local ids map to merged ids; names reach tasks from other chunks
+    assert by_name["Build"]["predecessors"] == [1, 2]
+    assert by_name["Test"]["predecessors"] == [by_name["Build"]["id"]]
+    # A new task without predecessors follows the previous chunk's exit task
+    assert by_name["Docs"]["predecessors"] == [by_name["Design"]["id"]]
+    assert [(r["id"], r["name"], r["capacity"]) for r in plan["resources"]] == [(1, "PM", 100), (2, "Engineer", 80)]
+    assert by_name["Design"]["resources"] == ["Engineer"]
+
+
+def test_split_document_respects_chunk_size():
+    text = make_overview(8)
+    chunks = split_document(text, CHUNK_CHARS)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= CHUNK_CHARS for chunk in chunks)
+
+
+@pytest.fixture
+def chunked_app(app):
+    app.config.update(AI_CHUNK_CHARS=CHUNK_CHARS, AI_CHUNK_CONCURRENCY=2)
+    return app
+
+
+def test_chunked_plan_is_cached_and_streams_tasks(chunked_app):
+    text = make_overview(8)
+    model = FakeModel(latency=0, tasks_per_call=4)
+    streamed = []
+    plan = process_project_overview(text, model, on_task=streamed.append)
+    calls = model.calls
+    assert calls == len(split_document(text, CHUNK_CHARS))
+    # The kickoff task every part names is merged into one
+    assert sum(task["name"] == "Project kickoff" for task in plan["tasks"]) == 1
+    assert streamed == plan["tasks"]
+
+    streamed = []
+    assert process_project_overview(text, model, on_task=streamed.append) == plan
+    assert model.calls == calls
+    assert streamed == plan["tasks"]
+
+
+def test_failed_chunk_keeps_other_parts_but_is_not_cached(chunked_app, caplog):
+    text = make_overview(8)
+    model = FailingPartModel(failing_part=2, tasks_per_call=4)
+    plan = process_project_overview(text, model)
+    assert "Error processing overview part 2 of" in caplog.text
+    assert "not caching the partial plan" in caplog.text
+    calls = model.calls
+    names = {task["name"] for task in plan["tasks"]}
+    assert "Section 1 task 2" in names and "Section 3 task 2" in names
+    assert not any(name.startswith("Section 2 ") for name in names)
+
+    # Not cached: the next upload asks the model again rather than reusing the partial plan
+    process_project_overview(text, model)
+    assert model.calls == 2 * calls
+
+
+def test_cached_plans_are_kept_per_model(chunked_app):
+    """A plan cached for one model is not served when another model is asked about the same document"""
+    text = make_overview(8)
+    first, second = FakeModel(latency=0), FakeModel(latency=0)
+    second.model = "other-model"
+    for model in (first, first, second, second):
+        process_project_overview(text, model)
+    parts = len(split_document(text, CHUNK_CHARS))
+    assert first.calls == second.calls == parts
+
+    short = "A short overview that fits in one request."
+    process_project_overview(short, first)
+    process_project_overview(short, second)
+    assert (first.calls, second.calls) == (parts + 1, parts + 1)
@@ -0,0 +1,120 @@
+# test_graph_sync.py
+import time
+import datetime
+from email.utils import format_datetime
+from app.services.graph_sync import GraphSyncEngine, retry_after_seconds, dependency_levels, BATCH_SIZE
+from app.services.ms_project import MSProjectClient
+from benchmarks.fakes import FakeGraphServer
+
+
+def make_engine(server, **settings):
+    return GraphSyncEngine(lambda: 'fake-token', base_url=server.base_url, backoff=0.01, **settings)
+
+
+def requests_for(count):
+    return [('/me/drive/items/p/tasks', {'name': f"Task {i}"}) for i in range(count)]
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds('2.5') == 2.5
+    assert retry_after_seconds('-3') == 0.0
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds('soon') is None
+    future = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=30)
+    assert 25 <= retry_after_seconds(format_datetime(future, usegmt=True)) <= 30
+    past = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=1)
+    assert retry_after_seconds(format_datetime(past, usegmt=True)) == 0.0
+
+
+def test_dependency_levels_cut_cycles():
+    assert dependency_levels([[], [0], [1], [0, 2], []]) == [0, 1, 2, 3, 0]
+    levels = dependency_levels([[2], [0], [1]])
+    assert sorted(levels) == [0, 1, 2]
+
+
+def test_failed_items_are_retried_alone():
+    """429 and 5xx items are sent again on their own; the rest are not repeated"""
+    with FakeGraphServer(item_failures=[(429, {'Retry-After': '0'}), (503, {})]) as server:
+        engine = make_engine(server)
+        results = engine.post_many(requests_for(5))
+    assert all(result and result['id'].startswith('fake-') for result in results)
+    assert engine.failures == []
+    assert [len(batch) for batch in server.batches] == [5, 2]
+    assert [item['id'] for item in server.batches[1]] == ['0', '1']
+
+
+def test_failed_dependency_is_retried_with_its_dependency():
+    """An item answered 424 because its dependsOn item failed is sent again alongside it"""
+    with FakeGraphServer(item_failures=[(500, {})]) as server:
+        engine = make_engine(server)
+        results = engine.post_many(requests_for(3), depends_on=[[], [0], []])
+    assert all(results)
+    first = {item['id']: item for item in server.batches[0]}
+    assert first['1']['dependsOn'] == ['0'] and 'dependsOn' not in first['2']
+    assert sorted(item['id'] for item in server.batches[1]) == ['0', '1']
+
+
+def test_batch_retry_after_http_date():
+    """A throttled $batch waits until the HTTP date in its Retry-After header"""
+    when = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=2)
+    throttled = (429, {'Retry-After': format_datetime(when, usegmt=True)})
+    with FakeGraphServer(batch_failures=[throttled]) as server:
+        engine = make_engine(server)
+        started = time.monotonic()
+        results = engine.post_many(requests_for(2))
+        elapsed = time.monotonic() - started
+    assert all(results)
+    assert len(server.batches) == 2
+    # HTTP dates have whole-second resolution
+    assert 0.9 <= elapsed < 5
+
+
+def test_non_retryable_failures_are_recorded():
+    with FakeGraphServer(item_failures=[(201, {}), (400, {})]) as server:
+        engine = make_engine(server)
+        results = engine.post_many(requests_for(3))
+    assert results[0] and results[2] and results[1] is None
+    assert engine.failures == [('/me/drive/items/p/tasks', 400, {'error': {'code': 'scripted'}})]
+    assert len(server.batches) == 1
+
+
+def test_retries_give_up():
+    with FakeGraphServer(batch_failures=[(503, {})] * 3) as server:
+        engine = make_engine(server, max_retries=2)
+        results = engine.post_many(requests_for(2))
+    assert results == [None, None]
+    assert [status for _, status, _ in engine.failures] == [None, None]
+
+
+def test_dependencies_are_delivered_first():
+    """Every item's dependencies arrive in an earlier batch, or in the same batch through dependsOn"""
+    count = 3 * BATCH_SIZE
+    depends_on = [[i - 1] if i % 3 else [] for i in range(count)]
+    depends_on[5].append(count - 1)
+    with FakeGraphServer() as server:
+        engine = make_engine(server)
+        assert all(engine.post_many(requests_for(count), depends_on))
+
+    batch_of = {}
+    for number, batch in enumerate(server.batches):
+        for item in batch:
+            batch_of[int(item['id'])] = number
+    for number, batch in enumerate(server.batches):
+        for item in batch:
+            for dep in depends_on[int(item['id'])]:
+                assert batch_of[dep] < number or (batch_of[dep] == number and str(dep) in item['dependsOn'])
+
+
+def test_phase_timings():
+    """Each MSProjectClient call records the wall time of its sync phase"""
+    with FakeGraphServer(latency=0.02) as server:
+        client = MSProjectClient('id', 'secret', base_url=server.base_url, token_url=server.token_url)
+        project_id = client.create_project('Timed')['id']
+        client.add_resources(project_id, [{'id': 1, 'name': 'Ann', 'capacity': 100}])
+        tasks = client.add_tasks(project_id, [
+            {'id': 1, 'name': 'A', 'duration': 1, 'predecessors': []},
+            {'id': 2, 'name': 'B', 'duration': 2, 'predecessors': [1]}
+        ])
+        client.assign_many(project_id, [(tasks[0]['id'], 'r1', 100)])
+    assert set(client.timings) == {'create_project', 'resources', 'tasks', 'assignments'}
+    assert all(seconds >= 0.02 for seconds in client.timings.values())
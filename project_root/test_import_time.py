@@ -0,0 +1,61 @@
+# test_import_time.py
+import os
+import re
+import sys
+import json
+import tempfile
+import subprocess
+
+# create_app() cold start, summed over `python -X importtime`, must stay under this many milliseconds
+IMPORT_BUDGET_MS = float(os.environ.get('IMPORT_TIME_BUDGET_MS', 600))
+# Only loaded once an upload, model call or Graph sync needs them
+LAZY_MODULES = ('openai', 'httpx', 'requests', 'docx', 'PyPDF2', 'lxml')
+RUNS = 3
+
+_CHILD = """
+import sys, json
+from app import create_app
+create_app()
+print(json.dumps(sorted(m for m in %r if m in sys.modules)))
+""" % (LAZY_MODULES,)
+
+_IMPORT_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| (\S.*)$")
+
+
+def cold_start():
+    """(milliseconds spent importing, lazy modules that were loaded anyway) for one fresh interpreter"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_PATH=os.path.join(tmp, 'app.sqlite3'),
+            JOB_QUEUE_PATH=os.path.join(tmp, 'jobs.sqlite3'),
+            JOB_QUEUE_WORKERS='0',
+            AI_CACHE_PATH=os.path.join(tmp, 'ai_cache.sqlite3'),
+            BLOB_STORE_PATH=os.path.join(tmp, 'blobs'),
+            BLOB_GC_INTERVAL='0',
+            METRICS_PATH=os.path.join(tmp, 'metrics.sqlite3')
+        )
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', _CHILD],
+            cwd=here, env=env, capture_output=True, text=True, check=True
+        )
+    # Top-level imports only: their cumulative time already includes everything they pulled in
+    total_us = sum(int(match.group(1)) for match in map(_IMPORT_LINE.match, result.stderr.splitlines()) if match)
+    return total_us / 1000, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_create_app_import_time():
+    """Cold start stays within budget and leaves the heavy service dependencies unloaded"""
+    timings = []
+    for _ in range(RUNS):
+        milliseconds, loaded = cold_start()
+        assert not loaded, f"create_app() imported {', '.join(loaded)}; import them where they are used"
+        timings.append(milliseconds)
+    best = min(timings)
+    print(f"create_app() imports: best {best:.0f} ms of {RUNS} runs (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    assert best <= IMPORT_BUDGET_MS, f"create_app() spent {best:.0f} ms importing (budget {IMPORT_BUDGET_MS:.0f} ms)"
+
+
+if __name__ == "__main__":
+    test_create_app_import_time()
@@ -0,0 +1,124 @@
+# test_job_queue.py
+import os
+import time
+import pytest
+from flask import Flask
+from app.services.job_queue import JobQueue, QUEUED, RUNNING, DONE, FAILED
+
+
+def make_queue(tmp_path, **config):
+    """A queue on a temporary SQLite file, as another process sharing it would open it"""
+    app = Flask(__name__)
+    app.config.update(JOB_QUEUE_PATH=os.path.join(tmp_path, 'jobs.sqlite3'), **config)
+    queue = JobQueue(app)
+    queue.register('echo', lambda payload, report: {'echo': payload['value']})
+    return queue
+
+
+def expire_leases(queue):
+    """What a lease looks like once its process has stopped sending heartbeats"""
+    queue._connection().execute("UPDATE jobs SET lease_expires = 0 WHERE status = ?", (RUNNING,))
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = make_queue(tmp_path)
+    yield queue
+    queue.stop()
+
+
+def test_enqueue_and_run(queue):
+    job_id = queue.enqueue('echo', {'value': 42}, owner_id='owner-1')
+    job = queue.get(job_id)
+    assert (job['status'], job['owner_id'], job['payload']) == (QUEUED, 'owner-1', {'value': 42})
+
+    assert queue.run_pending() == 1
+    job = queue.get(job_id)
+    assert (job['status'], job['progress'], job['result'], job['attempts']) == (DONE, 100, {'echo': 42}, 1)
+    assert job['lease_expires'] is None
+    assert queue.run_pending() == 0
+
+
+def test_failing_handler_marks_job_failed(queue):
+    def explode(payload, report):
+        report(50, 'halfway')
+        raise ValueError("bad document")
+
+    queue.register('explode', explode)
+    job_id = queue.enqueue('explode', {})
+    queue.run_pending()
+    job = queue.get(job_id)
+    assert (job['status'], job['error'], job['progress']) == (FAILED, 'bad document', 50)
+
+    unknown = queue.enqueue('missing', {})
+    queue.run_pending()
+    assert queue.get(unknown)['status'] == FAILED
+
+
+def test_claims_are_leased(queue, tmp_path):
+    """A running job is not claimed elsewhere until its lease expires, and then only by one process"""
+    other = make_queue(tmp_path)
+    job_id = queue.enqueue('echo', {'value': 1})
+    claimed = queue._claim_next()
+    assert claimed['id'] == job_id and claimed['claimed_by'] == queue.boot_id
+    assert claimed['lease_expires'] > time.time()
+    assert other._claim_next() is None
+
+    expire_leases(queue)
+    reclaimed = other._claim_next()
+    assert reclaimed['id'] == job_id and reclaimed['attempts'] == 2
+
+    # The first process finishing late does not overwrite the job it lost
+    queue._finish(job_id, FAILED, error='stale')
+    assert queue.get(job_id)['status'] == RUNNING
+    other.run_job(reclaimed)
+    assert queue.get(job_id)['status'] == DONE
+
+
+def test_renew_leases(queue):
+    queue.lease_seconds = 1
+    job_id = queue.enqueue('echo', {'value': 1})
+    queue._claim_next()
+    queue.lease_seconds = 600
+    queue.renew_leases()
+    assert queue.get(job_id)['lease_expires'] > time.time() + 500
+
+
+def test_job_that_keeps_killing_workers_is_failed(queue):
+    """After max_attempts claims whose process died, the job is failed instead of claimed again"""
+    queue.max_attempts = 2
+    job_id = queue.enqueue('echo', {'value': 1})
+    later = queue.enqueue('echo', {'value': 2})
+    for attempt in (1, 2):
+        assert queue._claim_next()['id'] == job_id
+        expire_leases(queue)
+
+    assert queue._claim_next()['id'] == later
+    job = queue.get(job_id)
+    assert job['status'] == FAILED and 'Gave up after 2 attempts' in job['error']
+
+
+def test_workers_start_with_the_first_request(tmp_path):
+    queue = make_queue(tmp_path, JOB_QUEUE_WORKERS=1, JOB_QUEUE_POLL_INTERVAL=0.01)
+    try:
+        assert queue._workers == []
+        job_id = queue.enqueue('echo', {'value': 7})
+        with queue.app.test_request_context():
+            queue.app.preprocess_request()
+        assert len(queue._workers) == 1
+        deadline = time.time() + 5
+        while queue.get(job_id)['status'] != DONE and time.time() < deadline:
+            time.sleep(0.01)
+        assert queue.get(job_id)['result'] == {'echo': 7}
+    finally:
+        queue.stop()
+
+
+def test_follow_up_is_enqueued_once(queue):
+    job_id = queue.enqueue('echo', {'value': 1})
+    queue.run_pending()
+    first = queue.enqueue_follow_up(job_id, 'echo', {'value': 2})
+    assert queue.enqueue_follow_up(job_id, 'echo', {'value': 3}) == first
+    assert queue.get(job_id)['result'] == {'echo': 1, 'follow_up_job_id': first}
+    assert queue.get(first)['payload'] == {'value': 2}
+    assert queue.run_pending() == 1
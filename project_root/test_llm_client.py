@@ -0,0 +1,79 @@
+# test_llm_client.py
+import time
+import asyncio
+import openai
+import pytest
+from app.services.llm_client import LLMClientManager, TokenBucket
+from benchmarks.fakes import FakeOpenAIServer
+
+MESSAGES = [{'role': 'user', 'content': 'Plan a project'}]
+
+
+def make_manager(server, **settings):
+    manager = LLMClientManager()
+    manager.api_key = 'test-key'
+    manager.base_url = server.base_url
+    manager.backoff = 0.01
+    manager.max_backoff = 0.05
+    for name, value in settings.items():
+        setattr(manager, name, value)
+    return manager
+
+
+def test_retries_rate_limits_and_server_errors():
+    """429s (with and without Retry-After) and 500s are retried until the request succeeds"""
+    script = [(429, {'Retry-After': '3600'}), (429, {}), (500, {})]
+    with FakeOpenAIServer(script, reply='done') as server:
+        manager = make_manager(server)
+        started = time.monotonic()
+        assert manager.complete(MESSAGES, 'fake-model', 0.3, max_tokens=10) == 'done'
+        # Retry-After is capped at max_backoff rather than honoured for an hour
+        assert time.monotonic() - started < 5
+    assert len(server.requests) == 4
+    assert server.requests[0][1]['model'] == 'fake-model'
+    assert manager.stats() == {'in_flight': 0, 'queued': 0, 'requests': 4, 'retries': 3, 'rate_limited': 2}
+
+
+def test_gives_up_after_max_retries():
+    with FakeOpenAIServer([(500, {})] * 3) as server:
+        manager = make_manager(server, max_retries=2)
+        with pytest.raises(openai.InternalServerError):
+            manager.complete(MESSAGES, 'fake-model', 0.3, max_tokens=10)
+    assert len(server.requests) == 3
+    assert manager.stats()['retries'] == 2
+
+
+def test_non_retryable_errors_are_not_retried():
+    with FakeOpenAIServer([(400, {})]) as server:
+        manager = make_manager(server)
+        with pytest.raises(openai.BadRequestError):
+            manager.complete(MESSAGES, 'fake-model', 0.3, max_tokens=10)
+    assert len(server.requests) == 1
+    assert manager.stats()['retries'] == 0
+
+
+def test_requests_per_minute_bucket_throttles():
+    """With the request budget spent, the next request waits for the bucket to refill"""
+    with FakeOpenAIServer(reply='ok') as server:
+        manager = make_manager(server, requests_per_minute=240)
+        manager._ensure_started()
+        manager._request_bucket.tokens = 0
+        started = time.monotonic()
+        manager.complete(MESSAGES, 'fake-model', 0.3, max_tokens=10)
+        manager.complete(MESSAGES, 'fake-model', 0.3, max_tokens=10)
+        elapsed = time.monotonic() - started
+    # 240 per minute refills one request every 0.25 s
+    assert 0.45 <= elapsed < 2
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(600)
+
+    async def drain():
+        await bucket.acquire(600)
+        started = time.monotonic()
+        await bucket.acquire(5)
+        return time.monotonic() - started
+
+    # 600 per minute refills 10 a second, so 5 take half a second
+    assert 0.4 <= asyncio.run(drain()) < 1.5
@@ -0,0 +1,67 @@
+# test_near_duplicates.py
+import random
+from app.services.job_queue import job_queue, DONE
+from app.services.near_duplicates import near_duplicates, minhash, similarity, band_keys, BANDS
+
+VOCABULARY = [f"word{i}" for i in range(500)]
+
+
+def make_text(seed, words=600):
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def edit(text, changes=4):
+    """The text with a few words replaced, as a re-saved overview would be"""
+    words = text.split()
+    for i in range(changes):
+        words[(i + 1) * len(words) // (changes + 1)] = 'revised'
+    return ' '.join(words)
+
+
+def test_minhash():
+    text = make_text(1)
+    assert minhash('') is None and minhash('   ') is None
+    assert minhash(text) == minhash(text)
+    assert similarity(minhash(text), minhash(edit(text))) >= 0.8
+    assert similarity(minhash(text), minhash(make_text(2))) < 0.2
+
+
+def test_band_keys():
+    signature = minhash(make_text(1))
+    keys = band_keys('owner-1', signature)
+    assert len(keys) == BANDS == len(set(keys))
+    assert keys == band_keys('owner-1', minhash(make_text(1)))
+    # Buckets are per owner, so one user's uploads never surface another's
+    assert not set(keys) & set(band_keys('owner-2', signature))
+
+
+def test_query(app):
+    original = make_text(1)
+    near_duplicates.add('p-original', 'owner-1', minhash(original))
+    near_duplicates.add('p-other', 'owner-1', minhash(make_text(2)))
+
+    matches = near_duplicates.query('owner-1', minhash(edit(original)))
+    assert [project_id for project_id, _ in matches] == ['p-original']
+    assert matches[0][1] >= near_duplicates.threshold
+
+    assert near_duplicates.query('owner-1', minhash(make_text(3))) == []
+    assert near_duplicates.query('owner-2', minhash(edit(original))) == []
+
+
+def test_repeat_similar_choice_returns_the_same_job(client, user):
+    """Only the first POST starts a follow-up upload; later ones get its job id back"""
+    job_id = job_queue.enqueue('upload', {'file_path': 'overview.txt', 'project_name': 'Plan', 'owner_id': user.id},
+                               owner_id=user.id)
+    job_queue._claim_next()
+    job_queue._finish(job_id, DONE, result={'similar': [{'project_id': 'p-original', 'similarity': 0.9}]})
+
+    headers = {'Accept': 'application/json'}
+    first = client.post(f"/jobs/{job_id}/similar", json={'choice': 'generate'}, headers=headers)
+    assert first.status_code == 202
+    follow_up = first.get_json()['job_id']
+    assert job_queue.get(follow_up)['payload']['similar'] == 'generate'
+
+    repeat = client.post(f"/jobs/{job_id}/similar", json={'choice': 'generate'}, headers=headers)
+    assert repeat.status_code == 202 and repeat.get_json()['job_id'] == follow_up
+    assert client.post(f"/jobs/{job_id}/similar", data={'choice': 'generate'}).headers['Location'].endswith(follow_up)
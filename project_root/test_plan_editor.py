@@ -0,0 +1,86 @@
+# test_plan_editor.py
+import random
+import sqlite3
+import pytest
+from app.services.plan_editor import PlanEditor, PlanEditorCache
+from app.services.scheduler import compute_schedule, CycleError
+from benchmarks.bench_incremental import make_editable_plan, random_edit
+
+SEQUENCES = 200
+EDITS_PER_SEQUENCE = 40
+
+
+def assert_matches_full_schedule(editor):
+    full = compute_schedule(editor.plan['tasks'])
+    assert full.project_duration == editor.schedule.project_duration
+    for task_id in editor.tasks:
+        assert full.for_task(task_id) == editor.schedule.for_task(task_id), task_id
+
+
+def test_incremental_schedule_matches_full_recompute():
+    """Random edit sequences leave the same dates as scheduling the edited plan from scratch"""
+    for seed in range(SEQUENCES):
+        rng = random.Random(seed)
+        editor = PlanEditor(make_editable_plan(rng.randint(5, 150)))
+        for _ in range(EDITS_PER_SEQUENCE):
+            try:
+                editor.apply(random_edit(editor, rng))
+            except CycleError:
+                continue
+        assert_matches_full_schedule(editor)
+
+
+class FakeProject:
+    """Just enough of Project for PlanEditorCache: a stored plan plus its recorded edits"""
+    def __init__(self, plan):
+        self.id = 'project-1'
+        self.plan = plan
+        self.edits = []
+        self.fail_next_record = None
+        self.project_file = None
+
+    def plan_state(self):
+        return 'digest', len(self.edits)
+
+    def load_plan(self, apply_edits=True):
+        return make_editable_plan(len(self.plan['tasks'])), 'digest'
+
+    def plan_edits(self, after=0):
+        return [(seq, edit) for seq, edit in enumerate(self.edits, 1) if seq > after]
+
+    def record_plan_edit(self, seq, edit):
+        if self.fail_next_record is not None:
+            error, self.fail_next_record = self.fail_next_record, None
+            raise error
+        assert seq == len(self.edits) + 1
+        self.edits.append(edit)
+
+    def save_plan(self, plan, expected_seq=None):
+        return None
+
+    def update(self, **fields):
+        pass
+
+
+def test_failed_record_evicts_cached_editor():
+    """An edit storage did not record is not kept in memory for later edits to build on"""
+    project = FakeProject(make_editable_plan(20))
+    cache = PlanEditorCache()
+    cache.edit(project, {'op': 'update_task', 'id': 1, 'changes': {'duration': 7}})
+
+    project.fail_next_record = sqlite3.OperationalError('database is locked')
+    with pytest.raises(sqlite3.OperationalError):
+        cache.edit(project, {'op': 'update_task', 'id': 2, 'changes': {'duration': 30}})
+    assert project.id not in cache._entries
+
+    cache.edit(project, {'op': 'update_task', 'id': 3, 'changes': {'duration': 9}})
+    editor = cache._entries[project.id]
+    assert editor.tasks[2]['duration'] != 30
+    assert editor.tasks[1]['duration'] == 7 and editor.tasks[3]['duration'] == 9
+    assert editor.seq == len(project.edits) == 2
+    assert_matches_full_schedule(editor)
+
+
+if __name__ == "__main__":
+    test_incremental_schedule_matches_full_recompute()
+    test_failed_record_evicts_cached_editor()
@@ -0,0 +1,131 @@
+# test_plan_validator.py
+import gc
+from app.services.plan_validator import validate_plan, DEFAULT_CAPACITY, DEFAULT_PROJECT_NAME
+from app.services.scheduler import compute_schedule
+
+
+def task(task_id, predecessors=(), resources=(), **fields):
+    return dict({'id': task_id, 'name': f"Task {task_id}", 'duration': 1,
+                 'predecessors': list(predecessors), 'resources': list(resources)}, **fields)
+
+
+def validate(tasks, resources=()):
+    return validate_plan({'project_name': 'Test', 'tasks': tasks, 'resources': list(resources)})
+
+
+def by_id(plan):
+    return {t['id']: t for t in plan['tasks']}
+
+
+def test_clean_plan_is_left_alone():
+    """A plan with nothing to repair comes back unchanged with an empty report"""
+    tasks = [task(1, resources=['Ann']), task(2, [1]), task(3, [1, 2], ['Ann'])]
+    plan, report = validate(tasks, [{'id': 1, 'name': 'Ann', 'capacity': 50}])
+    assert not report.repaired
+    assert [t['predecessors'] for t in plan['tasks']] == [[], [1], [1, 2]]
+    assert plan['resources'] == [{'id': 1, 'name': 'Ann', 'role': None, 'capacity': 50}]
+
+
+def test_duplicate_task_id_is_reassigned():
+    """The second task with an id gets a fresh one and predecessors keep pointing at the first"""
+    plan, report = validate([task(1), task(1, name='Copy'), task(2, [1])])
+    assert report.counts['duplicate_task_id'] == 1
+    assert report.counts['reassigned_task_id'] == 1
+    assert [t['id'] for t in plan['tasks']] == [1, 3, 2]
+    assert by_id(plan)[2]['predecessors'] == [1]
+
+
+def test_missing_and_textual_ids():
+    """Digit strings become ids, other spellings are reassigned but still resolve as predecessors"""
+    plan, report = validate([task('4'), task('T9'), task(None, ['T9', ' 4 '])])
+    assert [t['id'] for t in plan['tasks']] == [4, 5, 6]
+    assert report.counts['reassigned_task_id'] == 2
+    assert plan['tasks'][2]['predecessors'] == [5, 4]
+
+
+def test_dangling_self_and_duplicate_predecessors_are_dropped():
+    plan, report = validate([task(1), task(2, [1, 1, '1', 2, 99, None])])
+    assert by_id(plan)[2]['predecessors'] == [1]
+    assert report.counts['duplicate_predecessor'] == 2
+    assert report.counts['self_dependency'] == 1
+    assert report.counts['dangling_predecessor'] == 2
+
+
+def test_cycles_are_broken():
+    """Only edges that close cycles are dropped and the result schedules"""
+    tasks = [task(1, [3]), task(2, [1]), task(3, [2]), task(4, [3]), task(5, [5, 4]), task(6, [7]), task(7, [6])]
+    plan, report = validate(tasks)
+    assert report.counts['cycle_broken'] == 2
+    assert report.counts['self_dependency'] == 1
+    kept = {(t['id'], p) for t in plan['tasks'] for p in t['predecessors']}
+    assert {(4, 3), (5, 4)} <= kept
+    assert len(kept) == 5
+    compute_schedule(plan['tasks'])
+
+
+def test_undeclared_resource_is_added_once():
+    """A resource named only on tasks is declared once, matched case-insensitively; numbers count as names"""
+    plan, report = validate(
+        [task(1, resources=['Bob']), task(2, resources=['bob', {'name': 'BOB'}, 'Ann', 7.5, None])],
+        [{'id': 3, 'name': 'Ann'}]
+    )
+    assert report.counts['undeclared_resource'] == 2
+    assert report.counts['invalid_task_resource'] == 1
+    assert plan['resources'][1] == {'id': 4, 'name': 'Bob', 'role': None, 'capacity': DEFAULT_CAPACITY}
+    assert plan['resources'][2]['id'] == 5
+    assert by_id(plan)[2]['resources'] == ['Bob', 'Ann', '7.5']
+
+
+def test_duplicate_resource_keeps_largest_capacity():
+    plan, report = validate([], [{'id': 1, 'name': 'Ann', 'capacity': 50},
+                                 {'id': 1, 'name': 'ann ', 'capacity': 80},
+                                 {'id': 1, 'name': 'Bob'}, 'Cy'])
+    assert report.counts['duplicate_resource'] == 1
+    assert report.counts['reassigned_resource_id'] == 2
+    assert [(r['id'], r['name'], r['capacity']) for r in plan['resources']] == [
+        (1, 'Ann', 80), (2, 'Bob', DEFAULT_CAPACITY), (3, 'Cy', DEFAULT_CAPACITY)
+    ]
+
+
+def test_invalid_fields_fall_back_to_defaults():
+    """Durations like "5 days" are read, unusable values take their defaults"""
+    plan, report = validate([
+        task(1, duration='5 days'), task(2, duration='2.5'), task(3, duration=-1),
+        task(4, duration=True, name='  '), 'not a task'
+    ])
+    assert [t['duration'] for t in plan['tasks']] == [5, 3, 1, 1]
+    assert plan['tasks'][3]['name'] == 'Task 4'
+    assert report.counts['invalid_task_field'] == 3
+    assert report.counts['invalid_task'] == 1
+
+
+def test_non_dict_plan():
+    plan, report = validate_plan(['not', 'a', 'plan'])
+    assert plan == {'project_name': DEFAULT_PROJECT_NAME, 'tasks': [], 'resources': []}
+    assert report.counts['invalid_plan'] == 1
+    assert report.counts['invalid_project_name'] == 1
+
+
+
+def test_garbage_collector_is_restored():
+    validate([task(1)])
+    assert gc.isenabled()
+    gc.disable()
+    try:
+        validate([task(1)])
+        assert not gc.isenabled()
+    finally:
+        gc.enable()
+
+
+if __name__ == "__main__":
+    test_clean_plan_is_left_alone()
+    test_duplicate_task_id_is_reassigned()
+    test_missing_and_textual_ids()
+    test_dangling_self_and_duplicate_predecessors_are_dropped()
+    test_cycles_are_broken()
+    test_undeclared_resource_is_added_once()
+    test_duplicate_resource_keeps_largest_capacity()
+    test_invalid_fields_fall_back_to_defaults()
+    test_non_dict_plan()
+    test_garbage_collector_is_restored()